@@ -0,0 +1,19 @@
+"""Benchmarks for the hot paths of fvf: simulating trials, saving results,
+munging and plotting.
+
+Run all benchmarks, and compare them with the stored baseline::
+
+    python -m benchmarks
+
+Each benchmark runs in its own process, so that peak resident set size
+(RSS) is measured for that benchmark alone. For each, the runner reports
+the best wall time over repeats, trials/sec, fixations/sec (where trials
+are simulated or analyzed) and peak RSS. It exits with status 1 if
+throughput drops, or peak RSS grows, by more than the tolerance relative
+to benchmarks/baseline.json. After an intended change in performance,
+update the baseline with::
+
+    python -m benchmarks --save-baseline
+
+Benchmarks are defined in benchmarks/suite.py.
+"""
@@ -0,0 +1,155 @@
+"""Run benchmarks and compare them with the baseline; see benchmarks/__init__.py"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from fvf.telemetry import peak_rss_mb
+
+from .suite import BENCHMARKS
+
+BASELINE_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# metrics compared with baseline; True if higher is better
+METRICS = {
+    'trials_per_sec': True,
+    'fixations_per_sec': True,
+    'peak_rss_mb': False,
+}
+
+
+def run_one(name, repeat):
+    """run one benchmark in this process, and return its metrics.
+    Best (shortest) time over repeats is reported, as is usual for benchmarks"""
+    benchmark = BENCHMARKS[name]
+    state = benchmark.setup()
+    best_time, best_counts = None, None
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            counts = benchmark.run(state)
+            elapsed = time.perf_counter() - start
+            if best_time is None or elapsed < best_time:
+                best_time, best_counts = elapsed, counts
+    finally:
+        if benchmark.teardown is not None:
+            benchmark.teardown(state)
+    return {
+        'time': best_time,
+        'trials_per_sec': best_counts.trials / best_time,
+        'fixations_per_sec': best_counts.fixations / best_time if best_counts.fixations is not None else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_isolated(name, repeat):
+    """run one benchmark in a new process, so peak RSS is measured for it alone"""
+    output = subprocess.run([sys.executable, '-m', 'benchmarks', '--run-one', name, '--repeat', str(repeat)],
+                            check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """compare results with baseline
+
+    Returns
+    -------
+    regressions : list
+        of (benchmark name, metric, baseline value, current value)
+        for metrics that are worse than baseline by more than tolerance
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            current, expected = metrics.get(metric), baseline[name].get(metric)
+            if current is None or expected is None:
+                continue
+            if higher_is_better:
+                worse = current < expected * (1 - tolerance)
+            else:
+                worse = current > expected * (1 + tolerance)
+            if worse:
+                regressions.append((name, metric, expected, current))
+    return regressions
+
+
+def _format(value):
+    return '-' if value is None else f'{value:.4g}'
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='Run benchmarks of fvf, and compare them with a baseline.')
+    parser.add_argument('patterns', nargs='*', default=['*'],
+                        help="run only benchmarks whose names match these glob patterns, e.g. 'munge.*'. "
+                             "Default is all benchmarks.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times each benchmark is run. Default is 3.')
+    parser.add_argument('--baseline', default=BASELINE_JSON,
+                        help='JSON file with baseline metrics. Default is benchmarks/baseline.json.')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save metrics as the new baseline, instead of comparing with it')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative change in a metric, relative to baseline, that counts as a regression. '
+                             'Default is 0.25.')
+    parser.add_argument('--output', default=None, help='if specified, save metrics in this JSON file')
+    parser.add_argument('--list', action='store_true', help='list names of benchmarks and exit')
+    parser.add_argument('--run-one', default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.repeat)))
+        return 0
+    names = [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in args.patterns)]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)['benchmarks']
+
+    results = {}
+    print(f'{"benchmark":<32}{"time (s)":>12}{"trials/s":>12}{"fixations/s":>14}{"peak RSS (MiB)":>16}')
+    for name in names:
+        metrics = run_isolated(name, args.repeat)
+        results[name] = metrics
+        print(f'{name:<32}{_format(metrics["time"]):>12}{_format(metrics["trials_per_sec"]):>12}'
+              f'{_format(metrics["fixations_per_sec"]):>14}{_format(metrics["peak_rss_mb"]):>16}')
+
+    document = {'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                            'cpu_count': os.cpu_count()},
+                'benchmarks': results}
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(document, fp, indent=2)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # keep baseline of benchmarks that were not run
+            with open(args.baseline) as fp:
+                document['benchmarks'] = dict(json.load(fp)['benchmarks'], **results)
+        with open(args.baseline, 'w') as fp:
+            json.dump(document, fp, indent=2)
+        print(f'saved baseline in {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, expected, current in regressions:
+        print(f'REGRESSION {name} {metric}: baseline {_format(expected)}, now {_format(current)}')
+    if not baseline:
+        print(f'no baseline in {args.baseline}; save one with --save-baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
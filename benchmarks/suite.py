@@ -0,0 +1,195 @@
+"""Definitions of benchmarks. Each benchmark has a setup function, that is not timed,
+and a run function, that is timed, and returns the number of trials and of
+fixations it simulated or analyzed, used to compute throughput."""
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+SEED = 42
+
+SEARCH_TYPES = ('easy', 'medium', 'hard')
+DISPLAY_SIZES = (6, 12, 18)
+
+
+class Counts(NamedTuple):
+    """number of trials and fixations processed by one run of a benchmark;
+    fixations is None if the benchmark does not know it"""
+    trials: int
+    fixations: int = None
+
+
+class Benchmark(NamedTuple):
+    """a benchmark: setup() returns state, that is passed to run(state), which is timed,
+    and then to teardown(state), if there is one"""
+    name: str
+    setup: Callable
+    run: Callable
+    teardown: Callable = None
+
+
+BENCHMARKS = {}
+
+
+def _register(name, setup, run, teardown=None):
+    BENCHMARKS[name] = Benchmark(name, setup, run, teardown)
+
+
+def _synthetic_results(num_trials_per_condition, seed=SEED):
+    """results dict with summary-level TrialBatch for every condition, made without simulating,
+    so that munging can be benchmarked on result sets much larger than is quick to simulate"""
+    from fvf.model import TrialBatch
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    for search_type in SEARCH_TYPES:
+        for display_size in DISPLAY_SIZES:
+            for target_present in (True, False):
+                num_fixations = rng.geometric(1 / display_size, size=num_trials_per_condition)
+                results[(search_type, display_size, target_present)] = TrialBatch(
+                    rng.random(num_trials_per_condition) < 0.9 if target_present
+                    else rng.random(num_trials_per_condition) < 0.05,
+                    num_fixations * 250,
+                    num_fixations,
+                    display_size,
+                )
+    return results
+
+
+def _num_fixations(results):
+    return int(sum(batch.num_fixations.sum() for batch in results.values()))
+
+
+# ---- FVFModel.run_trial, one trial at a time, by search type and display size
+def _run_trial_setup(search_type, display_size, num_trials=200):
+    def setup():
+        from fvf.model import FVFModel
+        from fvf.simulator import make_search_arrs
+
+        rng = np.random.default_rng(SEED)
+        return FVFModel(), search_type, make_search_arrs(num_trials, display_size, True, rng=rng), rng
+    return setup
+
+
+def _run_trial(state):
+    fvf_model, search_type, search_arrs, rng = state
+    num_fixations = 0
+    for search_arr in search_arrs:
+        trial = fvf_model.run_trial(search_type, search_arr, record='summary', rng=rng)
+        num_fixations += trial.num_fixations
+    return Counts(search_arrs.shape[0], num_fixations)
+
+
+for _search_type in SEARCH_TYPES:
+    for _display_size in DISPLAY_SIZES:
+        _register(f'run_trial.{_search_type}.{_display_size}', _run_trial_setup(_search_type, _display_size),
+                  _run_trial)
+
+
+# ---- Simulator._run_one_condition, vectorized batches, at several numbers of trials
+def _run_one_condition_setup(num_trials):
+    def setup():
+        from fvf.model import FVFModel
+
+        return FVFModel(), num_trials
+    return setup
+
+
+def _run_one_condition(state):
+    from fvf.simulator import Simulator
+
+    fvf_model, num_trials = state
+    trials = Simulator._run_one_condition(fvf_model, 'medium', 12, True, num_trials=num_trials, record='summary',
+                                          rng=np.random.default_rng(SEED))
+    return Counts(len(trials), int(trials.num_fixations.sum()))
+
+
+for _num_trials in (1000, 10000, 100000):
+    _register(f'run_one_condition.{_num_trials}', _run_one_condition_setup(_num_trials), _run_one_condition)
+
+
+# ---- Simulator.runall, all 18 default conditions
+def _runall_setup():
+    from fvf.simulator import Simulator
+
+    return Simulator(trials_per_condition=5000, seed=SEED)
+
+
+def _runall(sim):
+    results = sim.runall(record='summary')
+    return Counts(sum(len(batch) for batch in results.values()), _num_fixations(results))
+
+
+_register('runall', _runall_setup, _runall)
+
+
+# ---- saving results, as the fvf command-line interface does, with traces
+def _save_results_setup():
+    import tempfile
+
+    from fvf.simulator import Simulator
+
+    results = Simulator(trials_per_condition=2000, seed=SEED).runall(record='trace')
+    return results, tempfile.mkdtemp()
+
+
+def _save_results(state):
+    from fvf.results import save
+
+    results, results_dir = state
+    save(results, results_dir)
+    return Counts(sum(len(batch) for batch in results.values()), _num_fixations(results))
+
+
+def _save_results_teardown(state):
+    import shutil
+
+    shutil.rmtree(state[1])
+
+
+_register('save_results', _save_results_setup, _save_results, _save_results_teardown)
+
+
+# ---- munging large synthetic result sets
+def _munge_setup():
+    return _synthetic_results(100000)
+
+
+def _munge_reaction_times(results):
+    from fvf import munge
+
+    munge.reaction_times(results)
+    return Counts(sum(len(batch) for batch in results.values()), _num_fixations(results))
+
+
+def _munge_num_fixations(results):
+    from fvf import munge
+
+    munge.num_fixations(results)
+    return Counts(sum(len(batch) for batch in results.values()), _num_fixations(results))
+
+
+_register('munge.reaction_times', _munge_setup, _munge_reaction_times)
+_register('munge.num_fixations', _munge_setup, _munge_num_fixations)
+
+
+# ---- plotting distributions of reaction times
+def _plot_setup():
+    import matplotlib
+    matplotlib.use('Agg')
+    from fvf import munge
+
+    results = _synthetic_results(100000)
+    return munge.reaction_times(results), results
+
+
+def _plot_reaction_times_distrib(state):
+    import matplotlib.pyplot as plt
+    from fvf import plot
+
+    rt_results, results = state
+    fig = plot.reaction_times_distrib(rt_results.RTs_by_condition)
+    plt.close(fig)
+    return Counts(sum(len(batch) for batch in results.values()), _num_fixations(results))
+
+
+_register('plot.reaction_times_distrib', _plot_setup, _plot_reaction_times_distrib)
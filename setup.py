@@ -24,12 +24,12 @@ VERSION = '0.1.0a1'
 
 # What packages are required for this module to be executed?
 REQUIRED = [
-    'numpy', 'scipy', 'matplotlib', 'jupyterlab', 'nengo', 'tqdm'
+    'numpy', 'scipy', 'matplotlib', 'jupyterlab', 'nengo'
 ]
 
 # What packages are optional?
 EXTRAS = {
-    # 'fancy feature': ['django'],
+    'jit': ['numba'],
 }
 
 # The rest you shouldn't have to touch too much :)
@@ -107,7 +107,7 @@ setup(
     packages=find_packages(where="src", exclude=('tests',)),
     package_dir={"": "src"},
     entry_points={
-        'console_scripts': ['fvf=fvf.__main__:main'],
+        'console_scripts': ['fvf=fvf.__main__:main', 'fvf-export=fvf.export:main'],
     },
     install_requires=REQUIRED,
     extras_require=EXTRAS,
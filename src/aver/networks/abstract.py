@@ -11,9 +11,13 @@ class ActiveVision(nengo.Network):
     3. what information is taken in during a fixation?
     4. how is information integrated across fixations?
 
-    So, each question is represented by a static method of this abstract class. To define
-    an active vision model, simply sub-class the ActiveVisionNetwork, and then implement
-    those static methods. For an example, see aver.networks.example
+    So, each question is represented by a method of this abstract class that builds a
+    sub-network. To define an active vision model, simply sub-class ActiveVision,
+    implement those methods, and implement the wire method, that connects the
+    sub-networks to each other. When an instance is created, each method is called
+    inside the network, and the sub-networks it returns are the attributes
+    when_net, where_net, what_net and how_net. Then wire is called, also inside the
+    network. For an example, see aver.networks.fvf
 
     Methods
     -------
@@ -21,6 +25,7 @@ class ActiveVision(nengo.Network):
     WhereNet: network that determines where to move the gaze
     WhatNet: network that determines what information is taken in during a fixation
     HowNet: Network that determines how information is integrated across fixations
+    wire: connects the four networks
 
     References
     ----------
@@ -29,36 +34,32 @@ class ActiveVision(nengo.Network):
     No. 37. Oxford University Press, 2003.
     https://www.worldcat.org/title/active-vision-the-psychology-of-looking-and-seeing/
     """
-    @staticmethod
-    def WhenNet():
+    def WhenNet(self):
         """Network that determines when to terminate one fixation and move the gaze"""
         raise NotImplementedError
 
-    @staticmethod
-    def WhereNet():
+    def WhereNet(self):
         """Network that determines where to move the gaze"""
         raise NotImplementedError
 
-    @staticmethod
-    def WhatNet():
+    def WhatNet(self):
         """Network that determines what information is taken in during a fixation"""
         raise NotImplementedError
 
-    @staticmethod
-    def HowNet():
+    def HowNet(self):
         """Network that determines how information is integrated across fixations"""
         raise NotImplementedError
 
-    def __init__(self, net=None, label=None, seed=None, add_to_container=None):
-        super(ActiveVisionNetwork, self).__init__(label, seed, add_to_container)
+    def wire(self):
+        """connect when_net, where_net, what_net and how_net to each other"""
+        raise NotImplementedError
 
-        if net:
-            self.net = net
-        else:
-            self.net = nengo.Network()
+    def __init__(self, label=None, seed=None, add_to_container=None):
+        super().__init__(label, seed, add_to_container)
 
-        with self.net:
-            when_net = self.WhenNet()
-            where_net = self.WhereNet()
-            what_net = self.WhatNet()
-            how_net = self.HowNet()
+        with self:
+            self.when_net = self.WhenNet()
+            self.where_net = self.WhereNet()
+            self.what_net = self.WhatNet()
+            self.how_net = self.HowNet()
+            self.wire()
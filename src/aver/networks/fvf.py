@@ -0,0 +1,434 @@
+"""Spiking Nengo network that implements the fixation-based framework of fvf.model.
+
+FVFNetwork is an ActiveVision network whose four sub-networks answer the
+questions of active vision the way FVFModel does:
+
+- When: a fixation clock. At the end of each fixation, it reads what the
+  What and How networks represent, and either responds, or starts a new
+  fixation by sending a saccade.
+- Where: on each saccade, moves the gaze to a new patch that is not one of
+  the prev_patch_memory most recent patches (inhibition of return), and
+  draws the size of the functional visual field (fvf).
+- What: a retina that takes in the items in the fvf, and an ensemble of
+  spiking neurons per trial that represents whether the target is in the fvf.
+- How: an integrator, made of a recurrently connected ensemble of spiking
+  neurons per trial, that accumulates the proportion of the search array
+  that has been seen across fixations.
+
+The target is found when the What ensemble represents a value above 0.5 at
+the end of a fixation, and search is quit when the How integrator represents
+a value above quit_threshold, so responses and reaction times depend on the
+neural representations, and not only on the draws made by the Where network.
+
+Many independent trials are tiled in one network: each trial has its own
+ensembles and its own slots in the When, Where and What nodes, and all of them
+are simulated in a single call to nengo.Simulator.run, so one build serves a
+whole batch of trials. Results are returned as a fvf.model.TrialBatch, e.g.::
+
+    trials = run_trials('medium', make_search_arrs(100, 12, True), seed=42)
+"""
+import numpy as np
+import nengo
+
+from fvf.model import FVFModel, RECORD_LEVELS, TrialBatch
+
+from .abstract import ActiveVision
+
+# synapses, in seconds
+SYNAPSE = 0.005
+INTEGRATOR_SYNAPSE = 0.1
+READOUT_SYNAPSE = 0.01
+# value of What ensemble above which the target is found
+DETECT_THRESHOLD = 0.5
+
+
+def _generator(rng):
+    """numpy.random.Generator seeded from the numpy.random.RandomState Nengo passes to processes,
+    so draws change when the simulator is reset with a new seed"""
+    return np.random.default_rng(rng.randint(2 ** 31, size=4))
+
+
+class _When(nengo.Process):
+    """fixation clock that decides, for each trial, at the end of each fixation,
+    whether to respond or to make a saccade.
+
+    Input is (What, How) decoded values for all trials. Output is (saccade, responded,
+    response, number of fixations) for all trials; saccade is 1 on the step a fixation starts.
+    """
+    def __init__(self, num_trials, steps_per_fixation, quit_threshold, max_fixations):
+        self.num_trials = num_trials
+        self.steps_per_fixation = steps_per_fixation
+        self.quit_threshold = quit_threshold
+        self.max_fixations = max_fixations
+        super().__init__(default_size_in=2 * num_trials, default_size_out=4 * num_trials)
+
+    def make_step(self, shape_in, shape_out, dt, rng, state):
+        num_trials, steps_per_fixation = self.num_trials, self.steps_per_fixation
+        quit_threshold, max_fixations = self.quit_threshold, self.max_fixations
+        output = np.zeros((4, num_trials))
+        saccade, responded, response, num_fixations = output
+        step_ind = [0]
+
+        def step_when(t, x):
+            step_ind[0] += 1
+            saccade[:] = 0.
+            if (step_ind[0] - 1) % steps_per_fixation == 0:
+                if step_ind[0] > 1:
+                    active = responded == 0.
+                    found = active & (x[:num_trials] > DETECT_THRESHOLD)
+                    quit_search = active & ~found & ((x[num_trials:] > quit_threshold)
+                                                     | (num_fixations >= max_fixations))
+                    responded[found | quit_search] = 1.
+                    response[found] = 1.
+                moving = responded == 0.
+                saccade[moving] = 1.
+                num_fixations[moving] += 1.
+            return output.ravel()
+
+        return step_when
+
+
+class _Where(nengo.Process):
+    """moves the gaze of each trial that makes a saccade to a new patch, and draws fvf size.
+
+    Input is saccade for all trials. Output is (fixation location, fvf size) for all trials.
+    Draws are made as in FVFModel.run_trials, with a generator seeded with draw_seed each time
+    the simulator is built or reset, or, if draw_seed is None, from the random state Nengo passes.
+    The random state Nengo passes depends on the order of operators in the simulator, that varies
+    between builds, so draw_seed must be set for results to be reproducible.
+    """
+    def __init__(self, num_trials, display_size, min_items, max_items, memory, draw_seed=None):
+        self.num_trials = num_trials
+        self.display_size = display_size
+        self.min_items = min_items
+        self.max_items = max_items
+        self.memory = memory
+        self.draw_seed = draw_seed
+        super().__init__(default_size_in=num_trials, default_size_out=2 * num_trials)
+
+    def make_step(self, shape_in, shape_out, dt, rng, state):
+        rng = np.random.default_rng(self.draw_seed) if self.draw_seed is not None else _generator(rng)
+        num_trials, display_size, memory = self.num_trials, self.display_size, self.memory
+        min_items, max_items = self.min_items, self.max_items
+        output = np.zeros((2, num_trials))
+        fix_loc, fvf_size = output
+        num_fixations = np.zeros((num_trials,), dtype=np.int64)
+        # ring buffer of most recent patches; -1 means "no patch yet"
+        recent = np.full((num_trials, max(memory, 1)), -1, dtype=np.int64)
+
+        def step_where(t, x):
+            moving = np.flatnonzero(x > 0.5)
+            if moving.size > 0:
+                allowed = np.ones((moving.size, display_size), dtype=bool)
+                if memory > 0:
+                    recent_moving = recent[moving]
+                    in_memory = recent_moving >= 0
+                    allowed[np.nonzero(in_memory)[0], recent_moving[in_memory]] = False
+                # draw uniformly from patches not in memory, without rejection
+                draw = (rng.random(moving.size) * allowed.sum(axis=1)).astype(np.int64)
+                new_loc = np.argmax(np.cumsum(allowed, axis=1) > draw[:, np.newaxis], axis=1)
+                if memory > 0:
+                    recent[moving, num_fixations[moving] % memory] = new_loc
+                num_fixations[moving] += 1
+                fix_loc[moving] = new_loc
+                fvf_size[moving] = min_items + (rng.random(moving.size)
+                                                * (max_items - min_items + 1)).astype(np.int64)
+            return output.ravel()
+
+        return step_where
+
+
+class _Retina(nengo.Process):
+    """takes in the items in the fvf of each trial.
+
+    Input is (saccade, fixation location, fvf size) for all trials. Output is
+    (target in fvf, rate of newly seen proportion of search array) for all trials.
+    Items that were not seen before a fixation are taken in during the first half of it,
+    so the integrated rate over a fixation is the proportion of the search array newly seen.
+    The search arrays are read each time the simulator is built or reset, so they can be
+    replaced between runs by setting the search_arrs attribute.
+    """
+    def __init__(self, search_arrs, target, steps_per_fixation):
+        self.search_arrs = search_arrs
+        self.target = target
+        self.steps_per_fixation = steps_per_fixation
+        num_trials = search_arrs.shape[0]
+        super().__init__(default_size_in=3 * num_trials, default_size_out=2 * num_trials)
+
+    def make_step(self, shape_in, shape_out, dt, rng, state):
+        num_trials, display_size = self.search_arrs.shape
+        # cumulative count of targets, so "is target in fvf" is a difference of two lookups
+        target_cumsum = np.zeros((num_trials, display_size + 1), dtype=np.int64)
+        np.cumsum(self.search_arrs == self.target, axis=1, out=target_cumsum[:, 1:])
+        cols = np.arange(display_size)
+        seen = np.zeros((num_trials, display_size), dtype=bool)
+        intake_steps = max(self.steps_per_fixation // 2, 1)
+        output = np.zeros((2, num_trials))
+        target_in_fvf, seen_rate = output
+        intake_rate = np.zeros((num_trials,))
+        steps_since_saccade = np.zeros((num_trials,), dtype=np.int64)
+
+        def step_retina(t, x):
+            moving = np.flatnonzero(x[:num_trials] > 0.5)
+            if moving.size > 0:
+                fix_loc = x[num_trials:2 * num_trials][moving].astype(np.int64)
+                fvf_stop = np.minimum(fix_loc + x[2 * num_trials:][moving].astype(np.int64), display_size)
+                fvf = (cols >= fix_loc[:, np.newaxis]) & (cols < fvf_stop[:, np.newaxis])
+                num_newly_seen = (fvf & ~seen[moving]).sum(axis=1)
+                seen[moving] |= fvf
+                target_in_fvf[moving] = target_cumsum[moving, fvf_stop] > target_cumsum[moving, fix_loc]
+                intake_rate[moving] = num_newly_seen / display_size / (intake_steps * dt)
+                steps_since_saccade[moving] = 0
+            seen_rate[:] = np.where(steps_since_saccade < intake_steps, intake_rate, 0.)
+            steps_since_saccade[:] += 1
+            return output.ravel()
+
+        return step_retina
+
+
+class FVFNetwork(ActiveVision):
+    """spiking network that runs a batch of visual search trials, tiled in one network,
+    within the fixation-based framework of Hulleman & Olivers 2017; see module docstring.
+
+    Attributes
+    ----------
+    num_trials : int
+    display_size : int
+    max_fixations : int
+        maximum number of fixations per trial; a trial that has not responded
+        after this many fixations quits search
+    duration : float
+        time in seconds that the network must be simulated to finish every trial
+    when_probe : nengo.Probe
+        of output of When node, sampled at the end of each fixation
+    where_probe : nengo.Probe
+        of output of Where node, sampled at the end of each fixation
+    """
+    def __init__(self,
+                 search_type,
+                 search_arrs,
+                 target=1,
+                 fvf_params=None,
+                 max_fixations=None,
+                 n_neurons=100,
+                 dt=0.001,
+                 label=None,
+                 seed=None,
+                 add_to_container=None):
+        """__init__ method
+
+        Parameters
+        ----------
+        search_type : str
+            One of {'easy', 'medium', 'hard'}. Used to determine
+            maximum number of items in functional visual field.
+        search_arrs : numpy.ndarray
+            2-d array with shape (number of trials, display size).
+            Each row represents the visual search stimulus for one trial,
+            e.g. made with fvf.simulator.make_search_arrs.
+        target : int
+            target that subject searches for in visual search task.
+            Default is 1.
+        fvf_params : dict
+            of parameters for fvf.model.FVFModel. Default is None, in which
+            case defaults for model are used.
+        max_fixations : int
+            maximum number of fixations per trial. Default is None, in which
+            case it is 4 times the display size.
+        n_neurons : int
+            number of neurons in each ensemble. Default is 100.
+        dt : float
+            time step of the simulator the network will be run with, in seconds.
+            fixation_duration must be a multiple of it. Default is 0.001.
+        label, add_to_container
+            passed to nengo.Network
+        seed : int
+            passed to nengo.Network, and used to seed draws of fixation locations
+            and fvf sizes; see set_seed. Default is None.
+        """
+        search_arrs = np.asarray(search_arrs)
+        if search_arrs.ndim != 2:
+            raise ValueError('search_arrs must be a 2-d array with shape (number of trials, display size)')
+        if search_type not in {'easy', 'medium', 'hard'}:
+            raise ValueError('search_type must be one of: {\'easy\', \'medium\', \'hard\'}')
+        self.fvf_model = FVFModel(**(fvf_params or {}))
+        steps_per_fixation = self.fvf_model.fixation_duration / 1000 / dt
+        if steps_per_fixation < 1 or not np.isclose(steps_per_fixation, round(steps_per_fixation)):
+            raise ValueError(f'fixation_duration must be a positive multiple of dt, {dt * 1000} ms, '
+                             f'but was: {self.fvf_model.fixation_duration}')
+        self.steps_per_fixation = int(round(steps_per_fixation))
+        self.search_type = search_type
+        self.search_arrs = search_arrs
+        self.target = target
+        self.num_trials, self.display_size = search_arrs.shape
+        self.max_fixations = max_fixations if max_fixations is not None else 4 * self.display_size
+        self.n_neurons_per_ensemble = n_neurons
+        self.dt = dt
+        # one more fixation, so every trial has made its last decision before the end
+        self.duration = (self.max_fixations + 1) * self.steps_per_fixation * dt
+        super().__init__(label=label, seed=seed, add_to_container=add_to_container)
+
+        with self:
+            sample_every = self.steps_per_fixation * dt
+            self.when_probe = nengo.Probe(self.when_net.output, sample_every=sample_every)
+            self.where_probe = nengo.Probe(self.where_net.output, sample_every=sample_every)
+
+    def WhenNet(self):
+        """fixation clock that decides whether to respond or make a saccade at the end of each fixation.
+        input is (What, How) for all trials, and output is (saccade, responded, response, number of fixations)"""
+        net = nengo.Network(label='When')
+        with net:
+            net.clock = nengo.Node(_When(self.num_trials, self.steps_per_fixation,
+                                         self.fvf_model.quit_threshold, self.max_fixations),
+                                   label='clock')
+            net.input = net.output = net.clock
+        return net
+
+    def WhereNet(self):
+        """moves the gaze on each saccade. input is saccade, and output is (fixation location, fvf size)"""
+        max_items = getattr(self.fvf_model.max_items_by_search_type, self.search_type)
+        net = nengo.Network(label='Where')
+        with net:
+            net.gaze = nengo.Node(_Where(self.num_trials, self.display_size, self.fvf_model.min_items, max_items,
+                                         min(self.fvf_model.prev_patch_memory, self.display_size - 1),
+                                         draw_seed=self.seed),
+                                  label='gaze')
+            net.input = net.output = net.gaze
+        return net
+
+    def WhatNet(self):
+        """takes in the fvf, and represents whether the target is in it with an ensemble per trial.
+        input is (saccade, fixation location, fvf size); output is decoded target in fvf,
+        and seen_rate is the rate at which the proportion of the search array seen grows"""
+        net = nengo.Network(label='What')
+        with net:
+            net.retina = nengo.Node(_Retina(self.search_arrs, self.target, self.steps_per_fixation),
+                                    label='retina')
+            net.detect = nengo.networks.EnsembleArray(self.n_neurons_per_ensemble, self.num_trials, label='detect')
+            nengo.Connection(net.retina[:self.num_trials], net.detect.input, synapse=SYNAPSE)
+            net.input = net.retina
+            net.output = net.detect.output
+            net.seen_rate = net.retina[self.num_trials:]
+        return net
+
+    def HowNet(self):
+        """integrates the proportion of the search array seen across fixations, with an ensemble per trial"""
+        net = nengo.Network(label='How')
+        with net:
+            net.coverage = nengo.networks.EnsembleArray(self.n_neurons_per_ensemble, self.num_trials,
+                                                        label='coverage')
+            nengo.Connection(net.coverage.output, net.coverage.input, synapse=INTEGRATOR_SYNAPSE)
+            net.input = net.coverage.input
+            net.output = net.coverage.output
+        return net
+
+    def wire(self):
+        """When -> Where -> What -> When, and What -> How -> When"""
+        num_trials = self.num_trials
+        nengo.Connection(self.when_net.output[:num_trials], self.where_net.input, synapse=None)
+        nengo.Connection(self.when_net.output[:num_trials], self.what_net.input[:num_trials], synapse=None)
+        nengo.Connection(self.where_net.output, self.what_net.input[num_trials:], synapse=None)
+        # transform of integrator synapse, so How integrates the rate at which the search array is seen
+        nengo.Connection(self.what_net.seen_rate, self.how_net.input, transform=INTEGRATOR_SYNAPSE,
+                         synapse=SYNAPSE)
+        nengo.Connection(self.what_net.output, self.when_net.input[:num_trials], synapse=READOUT_SYNAPSE)
+        nengo.Connection(self.how_net.output, self.when_net.input[num_trials:], synapse=READOUT_SYNAPSE)
+
+    def set_search_arrs(self, search_arrs):
+        """replace the search arrays, with ones of the same shape. Takes effect the next time
+        a simulator is built or reset, so trials can be re-run without building the network again"""
+        search_arrs = np.asarray(search_arrs)
+        if search_arrs.shape != self.search_arrs.shape:
+            raise ValueError(f'search_arrs must have shape {self.search_arrs.shape}, but had: {search_arrs.shape}')
+        self.search_arrs = search_arrs
+        self.what_net.retina.output.search_arrs = search_arrs
+
+    def set_seed(self, seed):
+        """set seed for draws of fixation locations and fvf sizes by the Where network.
+        Takes effect the next time a simulator is built or reset, so trials can be re-run
+        with new random numbers without building the network again"""
+        self.where_net.gaze.output.draw_seed = seed
+
+    def trials(self, sim, record='summary'):
+        """get trials from a simulator that has run the network for its duration
+
+        Parameters
+        ----------
+        sim : nengo.Simulator
+            that has run this network for at least self.duration
+        record : str
+            how much of each trial to record. One of {'summary', 'trace', 'full'};
+            see fvf.model.FVFModel.run_trials. Default is 'summary'.
+
+        Returns
+        -------
+        trials : fvf.model.TrialBatch
+            with one trial for each row in search_arrs
+        """
+        if record not in RECORD_LEVELS:
+            raise ValueError(f'record must be one of {RECORD_LEVELS}, but was: {record}')
+        when = sim.data[self.when_probe]
+        if when.shape[0] < self.max_fixations + 1:
+            raise ValueError(f'simulator must run network for its duration, {self.duration} s, '
+                             f'but ran for {sim.time} s')
+        num_trials = self.num_trials
+        # sample at end of last fixation has the decision made after every trial's last fixation
+        responded, response, num_fixations = when[-1].reshape(4, num_trials)[1:]
+        if not np.all(responded):
+            raise ValueError('not every trial has responded; simulator must run network for its duration')
+        num_fixations = num_fixations.astype(np.int64)
+        reaction_time = num_fixations * self.fvf_model.fixation_duration
+        if record == 'summary':
+            return TrialBatch(response.astype(bool), reaction_time, num_fixations, self.display_size)
+
+        # sample at end of fixation k has gaze of fixation k
+        where = sim.data[self.where_probe].reshape(-1, 2, num_trials)
+        made = np.arange(where.shape[0])[:, np.newaxis] < num_fixations  # (fixation, trial)
+        # transpose, so fixations are grouped by trial, in the order they were made
+        fix_locs = where[:, 0].T[made.T].astype(np.int64)
+        fvf_sizes = where[:, 1].T[made.T].astype(np.int64)
+        fix_offsets = np.zeros((num_trials + 1,), dtype=np.int64)
+        np.cumsum(num_fixations, out=fix_offsets[1:])
+        seen = search_arrs = None
+        if record == 'full':
+            cols = np.arange(self.display_size)
+            fvf_stops = np.minimum(fix_locs + fvf_sizes, self.display_size)
+            trial_inds = np.repeat(np.arange(num_trials), num_fixations)
+            seen = np.zeros((num_trials, self.display_size), dtype=bool)
+            np.logical_or.at(seen, trial_inds,
+                             (cols >= fix_locs[:, np.newaxis]) & (cols < fvf_stops[:, np.newaxis]))
+            search_arrs = self.search_arrs
+        return TrialBatch(response.astype(bool), reaction_time, num_fixations, self.display_size,
+                          fix_locs=fix_locs, fvf_sizes=fvf_sizes, fix_offsets=fix_offsets,
+                          seen=seen, search_arrs=search_arrs)
+
+
+def run_trials(search_type, search_arrs, target=1, fvf_params=None, record='summary', seed=None, **kwargs):
+    """run a batch of visual search trials with FVFNetwork, in one build and one call to Simulator.run
+
+    Parameters
+    ----------
+    search_type : str
+        One of {'easy', 'medium', 'hard'}.
+    search_arrs : numpy.ndarray
+        2-d array with shape (number of trials, display size).
+    target : int
+        Default is 1.
+    fvf_params : dict
+        of parameters for fvf.model.FVFModel. Default is None.
+    record : str
+        One of {'summary', 'trace', 'full'}. Default is 'summary'.
+    seed : int
+        seed for network and simulator. Default is None.
+    **kwargs
+        other parameters of FVFNetwork, e.g. n_neurons
+
+    Returns
+    -------
+    trials : fvf.model.TrialBatch
+        with one trial for each row in search_arrs
+    """
+    net = FVFNetwork(search_type, search_arrs, target=target, fvf_params=fvf_params, seed=seed, **kwargs)
+    with nengo.Simulator(net, dt=net.dt, seed=seed, progress_bar=False) as sim:
+        sim.run(net.duration)
+        return net.trials(sim, record=record)
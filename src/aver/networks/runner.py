@@ -0,0 +1,241 @@
+"""Build-once, reset-many execution of aver networks.
+
+Building a Nengo network, i.e. making its ensembles and solving for their
+decoders, takes much longer than simulating a short active-vision trial.
+A Runner builds a network once, and then runs it as many times as needed,
+resetting the simulator between runs with a new seed and, for networks like
+aver.networks.fvf.FVFNetwork, new search arrays. Decoders are kept in a
+Nengo decoder cache in a directory the caller controls, so that building the
+same ensembles again, in another condition, another process or another job,
+loads decoders from disk instead of solving for them. The cache is locked
+while it is written, so processes can share it.
+
+Build time and the time to simulate each run are reported separately, e.g.::
+
+    with Runner(FVFNetwork('hard', search_arrs, seed=42), cache_dir='decoders') as runner:
+        for search_arrs in batches:
+            trials = runner.run(search_arrs)
+    print(runner.timings.build_time, runner.timings.simulate_times)
+
+run_conditions runs every condition of a visual search experiment this way.
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import nengo
+from nengo.builder import Model
+from nengo.cache import DecoderCache, get_default_decoder_cache
+
+from fvf.model import TrialBatch
+from fvf.simulator import make_search_arrs
+
+from .fvf import FVFNetwork
+
+logger = logging.getLogger(__name__)
+
+
+class RunnerTimings(NamedTuple):
+    """NamedTuple with timings of a Runner
+
+    Fields
+    ------
+    build_time : float
+        time to build the network, including solving for decoders or loading them
+        from the cache, in seconds
+    simulate_times : list
+        time to reset the simulator and simulate each run, in seconds
+    """
+    build_time: float
+    simulate_times: list
+
+
+class Runner:
+    """builds a network once, and runs it many times, resetting the simulator between runs
+
+    The network must have a duration attribute, the time in seconds each run is simulated,
+    and a trials(sim, record) method that returns the results of a run; if runs are given
+    new search arrays, it must also have a set_search_arrs method. If it has a set_seed method,
+    it is called with the seed of each run before the simulator is reset. See FVFNetwork.
+
+    Attributes
+    ----------
+    network : nengo.Network
+    sim : nengo.Simulator
+    build_time : float
+        time to build the network, in seconds
+    simulate_times : list
+        time to reset the simulator and simulate each run, in seconds
+    """
+    def __init__(self, network, cache_dir=None, seed=None, dt=None):
+        """__init__ method
+
+        Parameters
+        ----------
+        network : nengo.Network
+            e.g. an aver.networks.fvf.FVFNetwork
+        cache_dir : str
+            path to directory where Nengo caches decoders, shared by any process
+            that uses the same directory. Default is None, in which case the
+            decoder cache configured in nengo.rc is used.
+        seed : int
+            seed for random number generator that makes a seed for each run, unless
+            one is passed to run. Default is None.
+        dt : float
+            time step of simulator, in seconds. Default is None, in which case
+            network.dt is used if the network has one, or else 0.001.
+        """
+        if dt is None:
+            dt = getattr(network, 'dt', 0.001)
+        decoder_cache = DecoderCache(cache_dir=cache_dir) if cache_dir is not None else get_default_decoder_cache()
+        self.network = network
+        self.cache_dir = cache_dir
+        self.rng = np.random.default_rng(seed)
+        start = time.perf_counter()
+        self.sim = nengo.Simulator(network, dt=dt, model=Model(dt=dt, decoder_cache=decoder_cache),
+                                   progress_bar=False)
+        self.build_time = time.perf_counter() - start
+        self.simulate_times = []
+
+    @property
+    def timings(self):
+        return RunnerTimings(self.build_time, list(self.simulate_times))
+
+    def run(self, search_arrs=None, seed=None, record='summary'):
+        """reset the simulator, and run the network for its duration
+
+        Parameters
+        ----------
+        search_arrs : numpy.ndarray
+            new search arrays for this run, with the same shape as those the network was
+            built with. Default is None, in which case the search arrays are not changed.
+        seed : int
+            seed for all random processes in this run. Default is None, in which case
+            a seed is drawn from the random number generator of the Runner, so every
+            run gets new random numbers.
+        record : str
+            passed to network.trials. Default is 'summary'.
+
+        Returns
+        -------
+        trials
+            returned by network.trials, e.g. a fvf.model.TrialBatch
+        """
+        if seed is None:
+            seed = int(self.rng.integers(2 ** 31))
+        start = time.perf_counter()
+        if search_arrs is not None:
+            self.network.set_search_arrs(search_arrs)
+        if hasattr(self.network, 'set_seed'):
+            self.network.set_seed(seed)
+        self.sim.reset(seed=seed)
+        self.sim.run(self.network.duration)
+        self.simulate_times.append(time.perf_counter() - start)
+        return self.network.trials(self.sim, record=record)
+
+    def close(self):
+        self.sim.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _run_condition(condition, condition_ind, num_trials, trials_per_run, target, fvf_params, record, seed,
+                   cache_dir, network_params):
+    """run all trials for one condition with one Runner. Module-level so it can run in a process pool"""
+    search_type, display_size, target_present = condition
+    num_runs = -(-num_trials // trials_per_run)
+    seed_seqs = [np.random.SeedSequence(seed, spawn_key=(condition_ind, run_ind)) for run_ind in range(num_runs)]
+    search_arrs = [make_search_arrs(trials_per_run, display_size, target_present, target,
+                                    rng=np.random.default_rng(seed_seq))
+                   for seed_seq in seed_seqs]
+    # network seed is the same for every condition, so ensembles, and their cached decoders, are too
+    network = FVFNetwork(search_type, search_arrs[0], target=target, fvf_params=fvf_params, seed=seed,
+                         **network_params)
+    batches = []
+    with Runner(network, cache_dir=cache_dir) as runner:
+        for run_ind, (seed_seq, run_search_arrs) in enumerate(zip(seed_seqs, search_arrs)):
+            batch = runner.run(run_search_arrs, seed=int(seed_seq.generate_state(1)[0] % 2 ** 31), record=record)
+            if run_ind == num_runs - 1 and num_trials % trials_per_run:
+                batch = batch.take(np.arange(num_trials % trials_per_run))
+            batches.append(batch)
+        timings = runner.timings
+    logger.info(f'condition {condition}: built network in {timings.build_time:.2f} s, '
+                f'simulated {num_runs} runs in {sum(timings.simulate_times):.2f} s')
+    return (batches[0] if len(batches) == 1 else TrialBatch.concatenate(batches)), timings
+
+
+def run_conditions(trials_per_condition=1000,
+                   display_sizes=(6, 12, 18),
+                   task_difficulties=('easy', 'medium', 'hard'),
+                   target_presence=(True, False),
+                   target=1,
+                   trials_per_run=100,
+                   fvf_params=None,
+                   record='summary',
+                   seed=42,
+                   cache_dir=None,
+                   workers=None,
+                   **network_params):
+    """run all conditions of a visual search experiment with FVFNetwork, building
+    the network for each condition once, and running it for batches of trials_per_run trials
+
+    Parameters
+    ----------
+    trials_per_condition : int
+        Default is 1000.
+    display_sizes, task_difficulties, target_presence, target
+        as for fvf.simulator.Simulator
+    trials_per_run : int
+        number of trials tiled in the network, that are simulated in each run.
+        Default is 100.
+    fvf_params : dict
+        of parameters for fvf.model.FVFModel. Default is None.
+    record : str
+        One of {'summary', 'trace', 'full'}. Default is 'summary'.
+    seed : int
+        seed for networks, and for random numbers of each run; the search arrays and seed of
+        run i of condition j come from numpy.random.SeedSequence(seed, spawn_key=(j, i)),
+        so results do not depend on workers. Default is 42.
+    cache_dir : str
+        directory of Nengo decoder cache, shared by all conditions and workers.
+        Default is None, in which case the decoder cache configured in nengo.rc is used.
+    workers : int
+        number of worker processes, each of which runs one condition at a time.
+        Default is None, in which case conditions run in this process.
+    **network_params
+        other parameters of FVFNetwork, e.g. n_neurons or max_fixations
+
+    Returns
+    -------
+    results : dict
+        that maps each (search type, display size, target present) condition to a TrialBatch
+    timings : dict
+        that maps each condition to RunnerTimings, with build time and simulate time of each run
+    """
+    if trials_per_run < 1:
+        raise ValueError(f'trials_per_run must be a positive integer, but was: {trials_per_run}')
+    conditions = [(search_type, display_size, target_present)
+                  for search_type in task_difficulties
+                  for display_size in display_sizes
+                  for target_present in target_presence]
+    args = [(condition, condition_ind, trials_per_condition, min(trials_per_run, trials_per_condition), target,
+             fvf_params, record, seed, cache_dir, network_params)
+            for condition_ind, condition in enumerate(conditions)]
+    if workers:
+        if cache_dir is not None:
+            # make cache index before workers start, so they do not race to make it
+            with DecoderCache(cache_dir=cache_dir):
+                pass
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_run_condition, *zip(*args)))
+    else:
+        outputs = [_run_condition(*condition_args) for condition_args in args]
+    results = {condition: trials for condition, (trials, _) in zip(conditions, outputs)}
+    timings = {condition: condition_timings for condition, (_, condition_timings) in zip(conditions, outputs)}
+    return results, timings
@@ -7,9 +7,35 @@ Hulleman, J., & Olivers, C. (2017).
 The impending demise of the item in visual search.
 Behavioral and Brain Sciences, 40, E132.
 doi:10.1017/S0140525X15002794
+
+Submodules, and the classes below, are imported on first access
+(PEP 562), so that e.g. worker processes that only run a Simulator,
+and the fvf command-line interface, do not load scipy or matplotlib.
 """
-from .model import FVFModel
-from .simulator import Simulator
-from . import munge
-from . import plot
+import importlib
+
+# attributes of the package, mapped to the submodule that defines them
+_LAZY_ATTRS = {
+    'FVFModel': 'model',
+    'TrialBatch': 'model',
+    'Simulator': 'simulator',
+}
+_SUBMODULES = ('accumulate', 'cache', 'checkpoint', 'exact', 'export', 'fit', 'jit', 'model', 'munge', 'plot',
+               'results', 'simulator', 'sweep', 'telemetry')
+
+__all__ = list(_LAZY_ATTRS) + list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRS[name]}', __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value  # so __getattr__ is only called on first access
+    return value
+
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
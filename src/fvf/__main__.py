@@ -1,76 +1,297 @@
+"""Command-line interface, with two subcommands:
+
+fvf run results_dir [--config config.json] [--shard i/N] [options]
+    run simulations, optionally only one shard of them, and save results in results_dir
+fvf merge results_dir shard_dir [shard_dir ...]
+    merge results from all shards of a run into results_dir
+
+The config file is JSON, with any parameters of Simulator, plus 'fvf_params'
+(parameters of FVFModel), 'record' and 'num_full_traces', e.g.::
+
+    {"display_sizes": [6, 12, 18], "trials_per_condition": 20000, "seed": 42,
+     "fvf_params": {"quit_threshold": 0.8, "max_items_by_search_type": {"easy": 30, "medium": 7, "hard": 1}},
+     "record": "summary"}
+
+Options given on the command line take precedence over the config file.
+`fvf run` writes throughput, timing and memory of each chunk of trials, each
+condition and the whole run in metrics.jsonl in results_dir; see fvf.telemetry.
+With --profile, it also runs under cProfile and saves the stats in results_dir.
+Finished chunks are checkpointed in results_dir/checkpoints so an interrupted run
+can resume; the checkpoints are removed once results are saved, unless
+--keep-checkpoints is given.
+Older versions had no subcommands; `fvf results_dir [loglevel] [seed] [options]`
+still works, and is the same as `fvf run results_dir [loglevel] [seed] [options]`.
+"""
 import argparse
+import cProfile
+import inspect
 import pickle
 import json
 import os
 import logging
+import pstats
+import shutil
+import sys
 
-import numpy as np
-
+from .accumulate import ConditionAccumulator
+from .cache import Cache
+from .model import RECORD_LEVELS, MaxItemsBySearchType
+from .results import merge_shards, save as save_results, save_shard
 from .simulator import Simulator
+from .telemetry import ConditionMetrics, MetricsWriter, RunMetrics
+
+METRICS_JSONL = 'metrics.jsonl'
+PROFILE_STATS = 'profile.pstats'
+PROFILE_TXT = 'profile.txt'
+
+SUBCOMMANDS = ('run', 'merge')
+
+# keys of config file that are not parameters of Simulator
+RUN_KEYS = ('fvf_params', 'record', 'num_full_traces')
+
+
+def _simulator_keys():
+    """names of parameters of Simulator that can be set in a config file"""
+    return [name for name in inspect.signature(Simulator.__init__).parameters if name not in ('self', 'cache')]
+
+
+def load_config(config_path):
+    """load config file for `fvf run`
+
+    Parameters
+    ----------
+    config_path : str
+        path to JSON file
+
+    Returns
+    -------
+    config : dict
+        with Simulator parameters, and RUN_KEYS, from file. Lists of conditions are
+        converted to tuples, and max_items_by_search_type to a MaxItemsBySearchType.
+    """
+    with open(config_path) as fp:
+        config = json.load(fp)
+    unknown = set(config) - set(_simulator_keys()) - set(RUN_KEYS)
+    if unknown:
+        raise ValueError(f'unknown keys in config file {config_path}: {sorted(unknown)}')
+    return _from_json(config)
+
+
+def _from_json(config):
+    """convert values of a config loaded from JSON back into the types Simulator and FVFModel expect"""
+    config = dict(config)
+    for key in ('display_sizes', 'task_difficulties', 'target_presence'):
+        if key in config:
+            config[key] = tuple(config[key])
+    if config.get('fvf_params'):
+        fvf_params = dict(config['fvf_params'])
+        if isinstance(fvf_params.get('max_items_by_search_type'), dict):
+            fvf_params['max_items_by_search_type'] = MaxItemsBySearchType(**fvf_params['max_items_by_search_type'])
+        config['fvf_params'] = fvf_params
+    return config
+
+
+def _parse_shard(shard):
+    """parse --shard option, 'i/N', into tuple (i, N)"""
+    try:
+        shard_ind, num_shards = [int(part) for part in shard.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must have form 'i/N', e.g. '0/4', but was: {shard}")
+    if not 0 <= shard_ind < num_shards:
+        raise argparse.ArgumentTypeError(f'shard index must be at least 0 and less than {num_shards}, '
+                                         f'but was: {shard_ind}')
+    return shard_ind, num_shards
 
 
 def get_parser():
     """returns instance of ArgumentParser, used for command-line interface by main function below"""
     parser = argparse.ArgumentParser(description='Run simulations of fixation-based framework.')
-    parser.add_argument('results_dir', type=str, help='name of directory where results should be saved')
-    parser.add_argument('loglevel', nargs='?', default='INFO', choices=('INFO', 'DEBUG', 'WARNING'),
-                        help="logging level (defaults to logging.INFO)")
-    parser.add_argument('seed', nargs='?', default=42, type=int,
-                        help="seed for numpy random generator, default is 42")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run simulations, or one shard of them')
+    run_parser.add_argument('results_dir', type=str, help='name of directory where results should be saved')
+    run_parser.add_argument('loglevel', nargs='?', default='INFO', choices=('INFO', 'DEBUG', 'WARNING'),
+                            help="logging level (defaults to logging.INFO)")
+    run_parser.add_argument('seed', nargs='?', default=None, type=int,
+                            help="seed for numpy random generator. Default is the seed in the config file, "
+                                 "or 42 if there is none.")
+    run_parser.add_argument('--config', type=str, default=None,
+                            help="JSON file with parameters of Simulator, and 'fvf_params', 'record' and "
+                                 "'num_full_traces'. Default is None, in which case defaults are used.")
+    run_parser.add_argument('--shard', type=_parse_shard, default=None,
+                            help="run only shard i of N, written 'i/N' with i counting from 0. "
+                                 "Merge results of all shards with `fvf merge`. Default is None, "
+                                 "in which case all trials are run.")
+    run_parser.add_argument('--record', default=None, choices=RECORD_LEVELS,
+                            help="how much of each trial to save in results_dir. "
+                                 "'summary' saves response, reaction time and number of fixations, "
+                                 "'trace' also saves locations and sizes of fixations, "
+                                 "'full' also saves seen items and fvf contents. Default is 'summary'.")
+    run_parser.add_argument('--num-full-traces', type=int, default=None,
+                            help="number of trials per condition for which to save full traces, "
+                                 "chosen by reservoir sampling, in full_traces.pickle. Default is None.")
+    run_parser.add_argument('--rt-tol', type=float, default=None,
+                            help="if specified, run each condition until half-width of 95%% confidence interval "
+                                 "on mean reaction time of correct trials is less than this, in ms. "
+                                 "Default is None.")
+    run_parser.add_argument('--error-rate-tol', type=float, default=None,
+                            help="if specified, run each condition until half-width of 95%% confidence interval "
+                                 "on error rate is less than this. Default is None.")
+    run_parser.add_argument('--max-trials', type=int, default=None,
+                            help="maximum number of trials per condition when --rt-tol or --error-rate-tol "
+                                 "is specified. Default is 100000.")
+    run_parser.add_argument('--workers', type=int, default=None,
+                            help="number of worker processes used to run trials. "
+                                 "Results are the same for any number of workers. "
+                                 "Default is None, in which case trials run in one process.")
+    run_parser.add_argument('--cache-dir', type=str, default=None,
+                            help="if specified, load chunks of trials that were already simulated from this "
+                                 "cache directory, and add new ones to it; see fvf.cache. Default is None.")
+    run_parser.add_argument('--keep-checkpoints', action='store_true',
+                            help="keep checkpoints of finished chunks in results_dir/checkpoints after "
+                                 "results are saved. By default they are removed once the run finishes.")
+    run_parser.add_argument('--profile', action='store_true',
+                            help=f"run under cProfile, and save stats in {PROFILE_STATS} in results_dir, "
+                                 f"with a summary sorted by cumulative time in {PROFILE_TXT}. "
+                                 "With --workers, only this process is profiled, not the workers.")
+
+    merge_parser = subparsers.add_parser('merge', help='merge results from all shards of a run')
+    merge_parser.add_argument('results_dir', type=str, help='name of directory where merged results are saved')
+    merge_parser.add_argument('shard_dirs', nargs='+', help='results directories of all shards')
+    merge_parser.add_argument('--loglevel', default='INFO', choices=('INFO', 'DEBUG', 'WARNING'),
+                              help="logging level (defaults to logging.INFO)")
     return parser
 
 
-def main():
-    """main function run from command line"""
-    parser = get_parser()
-    args = parser.parse_args()
+def _save_precision(precision, results_dir, logger):
+    """save number of trials and precision per condition in precision.json"""
+    precision_json = os.path.join(results_dir, 'precision.json')
+    logger.info(f'saving number of trials and precision per condition in {precision_json}')
+    with open(precision_json, 'w') as fp:
+        json.dump({', '.join([search_type, str(display_size), str(target_present)]): condition_precision._asdict()
+                   for (search_type, display_size, target_present), condition_precision in precision.items()},
+                  fp)
 
-    logging.basicConfig(level=getattr(logging, args.loglevel))
+
+def _log_metrics(metrics):
+    """callback for Simulator.runall that logs throughput of each condition and of the whole run"""
+    if isinstance(metrics, ConditionMetrics):
+        logging.getLogger(__name__).info(
+            f'finished condition {metrics.condition}: {metrics.num_trials} trials, '
+            f'{metrics.trials_per_sec:.0f} trials/sec, {metrics.fixations_per_sec:.0f} fixations/sec'
+        )
+    elif isinstance(metrics, RunMetrics):
+        logging.getLogger(__name__).info(
+            f'finished run: {metrics.num_trials} trials in {metrics.wall_time:.1f} sec, '
+            f'{metrics.trials_per_sec:.0f} trials/sec'
+        )
+
+
+def _save_profile(profiler, results_dir, logger):
+    """save stats from cProfile in results_dir, as pstats file and as text"""
+    profile_stats = os.path.join(results_dir, PROFILE_STATS)
+    logger.info(f'saving profile in {profile_stats}')
+    profiler.dump_stats(profile_stats)
+    with open(os.path.join(results_dir, PROFILE_TXT), 'w') as fp:
+        pstats.Stats(profiler, stream=fp).sort_stats('cumulative').print_stats(50)
+
+
+def run(args):
+    """run simulations, for `fvf run`"""
     logger = logging.getLogger(__name__)
+    config = load_config(args.config) if args.config else {}
+    # options given on the command line take precedence over config file
+    for key, value in (('seed', args.seed),
+                       ('rt_tol', args.rt_tol),
+                       ('error_rate_tol', args.error_rate_tol),
+                       ('max_trials_per_condition', args.max_trials),
+                       ('record', args.record),
+                       ('num_full_traces', args.num_full_traces)):
+        if value is not None:
+            config[key] = value
+    fvf_params = config.pop('fvf_params', None) or {}
+    record = config.pop('record', 'summary')
+    num_full_traces = config.pop('num_full_traces', None)
 
     if not os.path.isdir(args.results_dir):
         logger.info(f'making directory {args.results_dir}')
         os.makedirs(args.results_dir)
 
     logger.info('starting simulation')
-    logger.info(f'will set numpy RNG seed to {args.seed}')
-    sim = Simulator(seed=args.seed)
-    results = sim.runall()
-
-    results_pkl = os.path.join(args.results_dir, 'results.pickle')
-    logger.info(f'saving results in {results_pkl}')
-    with open(results_pkl, 'wb') as fp:
-        pickle.dump(results, fp)
-
-    # get reaction times, number of fixations, and responses out of results
-    # then dump into .json files
-    logger.info('getting just reaction times out of {results_pkl}')
-    reaction_times_by_condition = {}
-    num_fixations_by_condition = {}
-    responses_by_condition = {}
-    for (search_type, display_size, target_present), trials in results.items():
-        RTs = [trial.reaction_time for trial in trials]
-        responses = [trial.response for trial in trials]
-        num_fix = [trial.num_fixations for trial in trials]
-        condition = ', '.join([search_type, str(display_size), str(target_present)])
-        reaction_times_by_condition[condition] = RTs
-        num_fixations_by_condition[condition] = num_fix
-        responses_by_condition[condition] = responses
-
-    rt_json = os.path.join(args.results_dir, 'reaction_times.json')
-    logger.info(f'saving reaction times in {rt_json}')
-    with open(rt_json, 'w') as fp:
-        json.dump(reaction_times_by_condition, fp)
-
-    nf_json = os.path.join(args.results_dir, 'num_fixations.json')
-    logger.info(f'saving number of fixations in {nf_json}')
-    with open(nf_json, 'w') as fp:
-        json.dump(num_fixations_by_condition, fp)
-
-    r_json = os.path.join(args.results_dir, 'responses.json')
-    logger.info(f'saving responses in {r_json}')
-    with open(r_json, 'w') as fp:
-        json.dump(responses_by_condition, fp)
+    sim = Simulator(cache=Cache(args.cache_dir) if args.cache_dir else None, **config)
+    logger.info(f'will seed random number generators with {sim.seed}')
+    if args.shard is not None:
+        logger.info(f'running shard {args.shard[0]} of {args.shard[1]}')
+    # each chunk of trials is saved here as it finishes, so re-running the same command resumes
+    checkpoint_dir = os.path.join(args.results_dir, 'checkpoints')
+    logger.info(f'saving checkpoints in {checkpoint_dir}')
+    metrics_jsonl = os.path.join(args.results_dir, METRICS_JSONL)
+    logger.info(f'saving metrics in {metrics_jsonl}')
+    profiler = cProfile.Profile() if args.profile else None
+    with MetricsWriter(metrics_jsonl) as metrics_writer:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            results = sim.runall(fvf_params=fvf_params, record=record, num_full_traces=num_full_traces,
+                                 workers=args.workers, checkpoint_dir=checkpoint_dir, shard=args.shard,
+                                 callbacks=[metrics_writer, _log_metrics])
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _save_profile(profiler, args.results_dir, logger)
+
+    logger.info(f'saving results in {args.results_dir}')
+    if args.shard is not None:
+        # precision depends on trials from all shards, so it is saved by `fvf merge`
+        save_shard(results, args.results_dir, args.shard, sim.chunk_sizes, sim.conditions,
+                   sim._config(fvf_params, record, num_full_traces, args.shard))
+    else:
+        save_results(results, args.results_dir)
+        _save_precision(sim.precision, args.results_dir, logger)
+
+        if num_full_traces:
+            full_traces_pkl = os.path.join(args.results_dir, 'full_traces.pickle')
+            logger.info(f'saving sample of full traces in {full_traces_pkl}')
+            with open(full_traces_pkl, 'wb') as fp:
+                pickle.dump(sim.full_traces, fp)
+
+    if not args.keep_checkpoints:
+        # results are saved, so checkpoints would only be a second copy of them
+        logger.info(f'removing checkpoints in {checkpoint_dir}')
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def merge(args):
+    """merge results from shards, for `fvf merge`"""
+    logger = logging.getLogger(__name__)
+    logger.info(f'merging results from {len(args.shard_dirs)} shards into {args.results_dir}')
+    results, config = merge_shards(args.shard_dirs, args.results_dir)
+
+    sim_config = _from_json({key: value for key, value in config.items() if key in _simulator_keys()})
+    sim = Simulator(**sim_config)
+    precision = {}
+    for condition, batch in results.items():
+        accumulator = ConditionAccumulator(condition[2])
+        accumulator.add(batch)
+        precision[condition] = sim.condition_precision(accumulator)
+    _save_precision(precision, args.results_dir, logger)
+
+
+def main(argv=None):
+    """main function run from command line"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] not in SUBCOMMANDS and argv[0] not in ('-h', '--help'):
+        # older versions had no subcommands: `fvf results_dir [loglevel] [seed] [options]`
+        argv = ['run'] + list(argv)
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel))
+    if args.command == 'run':
+        run(args)
+    else:
+        merge(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,184 @@
+"""Mergeable accumulators of per-condition statistics.
+
+A ConditionAccumulator folds in batches of trials and keeps only counts,
+sums of reaction times and numbers of fixations, sums of their squares,
+and a histogram of reaction times, so memory stays constant however many
+trials are run. Reaction times and numbers of fixations are integers, so
+sums are kept as Python integers, that never overflow. Accumulators from
+separate runs or workers therefore merge exactly: merging gives the same
+accumulator, bit for bit, as folding all trials into one. Means and
+variances are computed from the sums only when they are needed; the
+numerator of each variance is computed exactly with integers before
+dividing, so there is none of the cancellation that makes the naive
+sum-of-squares formula unstable for floats.
+"""
+import numpy as np
+
+# edges of bins used for histograms of reaction times, in ms; shared with fvf.plot
+RT_BIN_EDGES = np.arange(0, 12001, 250)
+
+
+def _mean_std(count, total, sum_squares):
+    """mean and standard deviation (as computed by numpy.std) from exact integer sums"""
+    if count == 0:
+        return float('nan'), float('nan')
+    # numerator of variance is computed exactly, with Python integers, before dividing
+    return total / count, np.sqrt((count * sum_squares - total ** 2) / count ** 2)
+
+
+class ConditionAccumulator:
+    """accumulator of statistics for one condition
+
+    Attributes
+    ----------
+    target_present : bool
+        whether target is present in condition; used to determine which responses are correct
+    num_trials : int
+        number of trials folded in
+    num_correct : int
+        number of trials with correct response
+    correct_RT_sum, correct_RT_sum_squares : int
+        sum of reaction times of correct trials, and of their squares
+    error_RT_sum, error_RT_sum_squares : int
+        sum of reaction times of trials with incorrect response, and of their squares
+    num_fixations_sum, num_fixations_sum_squares : int
+        sum of number of fixations of all trials, and of their squares
+    RT_counts : numpy.ndarray
+        histogram of reaction times of all trials, with bins fvf.accumulate.RT_BIN_EDGES.
+        Reaction times outside the bins are not counted, as for numpy.histogram.
+    """
+    def __init__(self, target_present):
+        """__init__ method
+
+        Parameters
+        ----------
+        target_present : bool
+            whether target is present in condition
+        """
+        self.target_present = target_present
+        self.num_trials = 0
+        self.num_correct = 0
+        self.correct_RT_sum = 0
+        self.correct_RT_sum_squares = 0
+        self.error_RT_sum = 0
+        self.error_RT_sum_squares = 0
+        self.num_fixations_sum = 0
+        self.num_fixations_sum_squares = 0
+        self.RT_counts = np.zeros((RT_BIN_EDGES.shape[0] - 1,), dtype=np.int64)
+
+    def add(self, batch):
+        """fold a batch of trials into the accumulator
+
+        Parameters
+        ----------
+        batch : TrialBatch
+            trials from the condition, with any record level
+        """
+        reaction_time = batch.reaction_time.astype(np.int64)
+        num_fixations = batch.num_fixations.astype(np.int64)
+        correct = batch.response == self.target_present
+        self.num_trials += len(batch)
+        self.num_correct += int(np.count_nonzero(correct))
+        # sums of int64 are exact for any realistic batch, then added to Python integers
+        self.correct_RT_sum += int(reaction_time[correct].sum())
+        self.correct_RT_sum_squares += int((reaction_time[correct] ** 2).sum())
+        self.error_RT_sum += int(reaction_time[~correct].sum())
+        self.error_RT_sum_squares += int((reaction_time[~correct] ** 2).sum())
+        self.num_fixations_sum += int(num_fixations.sum())
+        self.num_fixations_sum_squares += int((num_fixations ** 2).sum())
+        self.RT_counts += np.histogram(reaction_time, bins=RT_BIN_EDGES)[0]
+
+    def merge(self, other):
+        """merge with another accumulator for the same condition
+
+        Parameters
+        ----------
+        other : ConditionAccumulator
+
+        Returns
+        -------
+        merged : ConditionAccumulator
+            new accumulator, the same as if all trials had been folded into one
+        """
+        if other.target_present != self.target_present:
+            raise ValueError("can't merge accumulators for conditions with different target_present")
+        merged = ConditionAccumulator(self.target_present)
+        for name in ('num_trials', 'num_correct', 'correct_RT_sum', 'correct_RT_sum_squares',
+                     'error_RT_sum', 'error_RT_sum_squares', 'num_fixations_sum', 'num_fixations_sum_squares'):
+            setattr(merged, name, getattr(self, name) + getattr(other, name))
+        merged.RT_counts = self.RT_counts + other.RT_counts
+        return merged
+
+    def __eq__(self, other):
+        if not isinstance(other, ConditionAccumulator):
+            return NotImplemented
+        return (self.target_present == other.target_present
+                and self.num_trials == other.num_trials
+                and self.num_correct == other.num_correct
+                and self.correct_RT_sum == other.correct_RT_sum
+                and self.correct_RT_sum_squares == other.correct_RT_sum_squares
+                and self.error_RT_sum == other.error_RT_sum
+                and self.error_RT_sum_squares == other.error_RT_sum_squares
+                and self.num_fixations_sum == other.num_fixations_sum
+                and self.num_fixations_sum_squares == other.num_fixations_sum_squares
+                and np.array_equal(self.RT_counts, other.RT_counts))
+
+    @property
+    def num_errors(self):
+        return self.num_trials - self.num_correct
+
+    @property
+    def error_rate(self):
+        """proportion of trials with incorrect response"""
+        return self.num_errors / self.num_trials if self.num_trials else float('nan')
+
+    @property
+    def mean_RT(self):
+        """mean reaction time of correct trials"""
+        return _mean_std(self.num_correct, self.correct_RT_sum, self.correct_RT_sum_squares)[0]
+
+    @property
+    def std_RT(self):
+        """standard deviation of reaction times of correct trials"""
+        return _mean_std(self.num_correct, self.correct_RT_sum, self.correct_RT_sum_squares)[1]
+
+    @property
+    def mean_error_RT(self):
+        """mean reaction time of trials with incorrect response"""
+        return _mean_std(self.num_errors, self.error_RT_sum, self.error_RT_sum_squares)[0]
+
+    @property
+    def std_error_RT(self):
+        """standard deviation of reaction times of trials with incorrect response"""
+        return _mean_std(self.num_errors, self.error_RT_sum, self.error_RT_sum_squares)[1]
+
+    @property
+    def mean_num_fixations(self):
+        """mean number of fixations of all trials"""
+        return _mean_std(self.num_trials, self.num_fixations_sum, self.num_fixations_sum_squares)[0]
+
+    @property
+    def std_num_fixations(self):
+        """standard deviation of number of fixations of all trials"""
+        return _mean_std(self.num_trials, self.num_fixations_sum, self.num_fixations_sum_squares)[1]
+
+
+def merge(accumulators_list):
+    """merge dicts of accumulators, e.g. returned by separate runs of
+    Simulator.runall(accumulate=True) or by separate workers
+
+    Parameters
+    ----------
+    accumulators_list : list
+        of dicts that map conditions to ConditionAccumulator
+
+    Returns
+    -------
+    merged : dict
+        that maps each condition in any of the dicts to the merged ConditionAccumulator
+    """
+    merged = {}
+    for accumulators in accumulators_list:
+        for condition, accumulator in accumulators.items():
+            merged[condition] = merged[condition].merge(accumulator) if condition in merged else accumulator
+    return merged
@@ -0,0 +1,217 @@
+"""Persistent, content-addressed cache of simulated trials.
+
+Each entry is a TrialBatch, saved as a .npz file named by a hash of
+everything that determines its contents: model parameters, condition,
+number of trials, identity of the random number stream, and the version
+of the code that simulates trials. Simulator.runall and fvf.sweep.run
+load entries instead of re-simulating them when given a Cache.
+
+Writes are atomic (a temporary file is renamed into place), so several
+processes can share one cache directory. The total size of the cache is
+capped; when a new entry would go over the cap, least recently used
+entries are removed.
+
+The cache can be inspected and cleared from the command line::
+
+    python -m fvf.cache info
+    python -m fvf.cache clear
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from typing import NamedTuple
+
+from .model import FVFModel, TrialBatch
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fvf')
+DEFAULT_MAX_BYTES = 2 ** 30  # 1 GiB
+
+# modules whose source determines simulated trials; changing them invalidates the cache
+_CODE_MODULES = ('model.py', 'jit.py', 'simulator.py')
+_code_version = None
+
+
+def code_version():
+    """hash of the source code that simulates trials, part of every cache key"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for module in _CODE_MODULES:
+            with open(os.path.join(package_dir, module), 'rb') as fp:
+                digest.update(fp.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def model_params(fvf_model):
+    """all parameters of an FVFModel as a dict that can be serialized to JSON,
+    so that default and explicitly passed values give the same cache key"""
+    params = {}
+    for name in inspect.signature(FVFModel.__init__).parameters:
+        if name == 'self':
+            continue
+        value = getattr(fvf_model, name)
+        params[name] = value._asdict() if hasattr(value, '_asdict') else value
+    return params
+
+
+class CacheInfo(NamedTuple):
+    """NamedTuple returned by Cache.info
+
+    Fields
+    ------
+    cache_dir : str
+        path to cache directory
+    num_entries : int
+        number of entries in cache
+    nbytes : int
+        total size of entries, in bytes
+    max_bytes : int
+        size cap of cache, in bytes
+    """
+    cache_dir: str
+    num_entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class Cache:
+    """persistent cache of TrialBatch instances, with a size cap
+    and least-recently-used eviction
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """__init__ method
+
+        Parameters
+        ----------
+        cache_dir : str
+            path to cache directory. Created if it does not exist.
+            Default is None, in which case the FVF_CACHE_DIR environment variable
+            is used if set, and otherwise ~/.cache/fvf.
+        max_bytes : int
+            maximum total size of entries, in bytes. Default is 2 ** 30 (1 GiB).
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('FVF_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(**parts):
+        """make a cache key from keyword arguments that can be serialized to JSON.
+        The code version is always included"""
+        parts['code_version'] = code_version()
+        # numpy scalars, e.g. from parameter grids, are converted to Python numbers
+        text = json.dumps(parts, sort_keys=True, default=lambda obj: obj.item())
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def _entries(self):
+        """list of (path, size, last access time) for all entries"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key):
+        """get entry from cache
+
+        Parameters
+        ----------
+        key : str
+            returned by Cache.key
+
+        Returns
+        -------
+        batch : TrialBatch
+            or None if there is no entry for key
+        """
+        path = self._path(key)
+        try:
+            batch = TrialBatch.load(path)
+            # modification time is used as time of last access, for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return batch
+
+    def put(self, key, batch):
+        """add entry to cache, then evict least recently used entries
+        until the cache is no larger than max_bytes
+
+        Parameters
+        ----------
+        key : str
+            returned by Cache.key
+        batch : TrialBatch
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                batch.save(fp)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """remove least recently used entries until cache is no larger than max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        nbytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            nbytes -= size
+
+    def info(self):
+        """get number and total size of entries
+
+        Returns
+        -------
+        cache_info : CacheInfo
+        """
+        entries = self._entries()
+        return CacheInfo(self.cache_dir, len(entries), sum(size for _, size, _ in entries), self.max_bytes)
+
+    def clear(self):
+        """remove all entries"""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    """inspect or clear cache from command line"""
+    parser = argparse.ArgumentParser(description='Inspect or clear cache of simulated trials.')
+    parser.add_argument('command', choices=('info', 'clear'))
+    parser.add_argument('--cache-dir', default=None,
+                        help='path to cache directory. Default is FVF_CACHE_DIR if set, else ~/.cache/fvf')
+    args = parser.parse_args()
+    cache = Cache(args.cache_dir)
+    if args.command == 'clear':
+        cache.clear()
+    cache_info = cache.info()
+    print(f'{cache_info.cache_dir}: {cache_info.num_entries} entries, {cache_info.nbytes} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Checkpoints for Simulator.runall, so an interrupted run can resume.
+
+Each chunk of trials is saved, as soon as it is finished, to its own .npz
+file in a checkpoint directory, and then a line describing it is appended
+to a manifest, 'manifest.jsonl'. The first line of the manifest records
+the configuration of the run. A chunk counts as completed only once its
+line is in the manifest, so a chunk file left behind by a killed process
+is simply written again.
+
+With num_full_traces, the reservoir of full traces for each condition is
+saved after each chunk to one file per condition, that is replaced
+atomically, along with the state of its random number generator. When
+resuming, it is restored once per condition, from the file; if the file
+does not match the completed chunks of its condition, because a run was
+killed after replacing it but before recording the chunk in the manifest,
+the condition is run again from its first chunk.
+
+Because every chunk gets its own random number generator (see
+Simulator.runall), re-running skips completed chunks and gives exactly
+the same results as a run that was never interrupted.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .model import TrialBatch
+
+MANIFEST = 'manifest.jsonl'
+
+
+def _to_json(obj):
+    """round-trip obj through JSON, so it compares equal to what is read back from a manifest"""
+    return json.loads(json.dumps(obj))
+
+
+class Checkpoint:
+    """checkpoint directory for one run of Simulator.runall
+
+    Attributes
+    ----------
+    checkpoint_dir : str
+        path to directory with chunk files and manifest
+    config : dict
+        configuration of run. Must be the same when resuming.
+    completed : dict
+        maps (condition index, chunk index) tuples to manifest entries
+        for chunks that have been saved
+    """
+    def __init__(self, checkpoint_dir, config):
+        """__init__ method
+
+        Parameters
+        ----------
+        checkpoint_dir : str
+            path to directory. Created if it does not exist.
+            If it already has a manifest, completed chunks are read from it.
+        config : dict
+            configuration of run, that can be serialized to JSON
+
+        Raises
+        ------
+        ValueError
+            if the manifest in checkpoint_dir was written by a run
+            with a different configuration
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.config = _to_json(config)
+        self.completed = {}
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        manifest_path = os.path.join(checkpoint_dir, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r+') as fp:
+                text = fp.read()
+                if text and not text.endswith('\n'):
+                    # last line was cut off when a run was killed; drop it
+                    text = text[:text.rfind('\n') + 1]
+                    fp.seek(0)
+                    fp.write(text)
+                    fp.truncate()
+            lines = [json.loads(line) for line in text.splitlines() if line.strip()]
+            if lines and lines[0]['config'] != self.config:
+                raise ValueError(f'checkpoints in {checkpoint_dir} are from a run with a different configuration: '
+                                 f'{lines[0]["config"]}. Use a different directory, or remove it to start over.')
+            for entry in lines[1:]:
+                self.completed[(entry['condition_ind'], entry['chunk_ind'])] = entry
+            if lines:
+                return
+        self._append({'config': self.config})
+
+    def _append(self, entry):
+        """append one line to manifest, and make sure it is on disk"""
+        with open(os.path.join(self.checkpoint_dir, MANIFEST), 'a') as fp:
+            fp.write(json.dumps(entry) + '\n')
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def _save_atomic(self, filename, save):
+        """save a file atomically, by calling save with a temporary file then renaming it"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.checkpoint_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                save(fp)
+            os.replace(tmp_path, os.path.join(self.checkpoint_dir, filename))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _reservoir_filename(condition_ind):
+        return f'reservoir-{condition_ind:04d}.npz'
+
+    def _save_reservoir(self, condition_ind, reservoir):
+        """save state of reservoir, replacing the previous state saved for its condition"""
+        trials = reservoir.trials
+        arrays = {column: getattr(trials, column) for column in trials.columns()
+                  if getattr(trials, column) is not None}
+        self._save_atomic(self._reservoir_filename(condition_ind),
+                          lambda fp: np.savez(fp, display_size=trials.display_size,
+                                              trial_inds=reservoir.trial_inds,
+                                              num_seen=reservoir.num_seen,
+                                              rng_state=json.dumps(reservoir.rng.bit_generator.state),
+                                              **arrays))
+
+    def load_reservoir(self, condition_ind, reservoir):
+        """restore reservoir for a condition to its state after the last completed chunk.
+        If the saved state does not match the completed chunks, they are no longer
+        counted as completed, so the condition is run again from its first chunk
+
+        Parameters
+        ----------
+        condition_ind : int
+        reservoir : fvf.simulator.TraceReservoir
+            new reservoir for condition
+        """
+        entries = [entry for (entry_condition_ind, _), entry in self.completed.items()
+                   if entry_condition_ind == condition_ind]
+        if not entries:
+            return
+        path = os.path.join(self.checkpoint_dir, self._reservoir_filename(condition_ind))
+        num_seen = None
+        if os.path.exists(path):
+            with np.load(path) as npz:
+                num_seen = int(npz['num_seen'])
+                trial_inds = npz['trial_inds']
+                rng_state = json.loads(str(npz['rng_state']))
+        if num_seen != sum(entry['num_trials'] for entry in entries):
+            for entry in entries:
+                del self.completed[(condition_ind, entry['chunk_ind'])]
+            return
+        reservoir.trials = TrialBatch.load(path)
+        reservoir.trial_inds = trial_inds
+        reservoir.num_seen = num_seen
+        reservoir.rng.bit_generator.state = rng_state
+
+    def has_chunk(self, condition_ind, chunk_ind):
+        """True if chunk was completed"""
+        return (condition_ind, chunk_ind) in self.completed
+
+    def save_chunk(self, condition_ind, chunk_ind, condition, chunk, reservoir=None):
+        """save a finished chunk, then record it in the manifest
+
+        Parameters
+        ----------
+        condition_ind : int
+            index of condition in the run
+        chunk_ind : int
+            index of chunk within condition
+        condition : tuple
+            (search type, display size, target present)
+        chunk : TrialBatch
+            trials in chunk, with the record level returned by Simulator.runall
+        reservoir : fvf.simulator.TraceReservoir
+            reservoir for condition, after adding chunk to it.
+            Its state is saved so it can be restored when resuming, with
+            Checkpoint.load_reservoir. Default is None.
+        """
+        filename = f'chunk-{condition_ind:04d}-{chunk_ind:06d}.npz'
+        self._save_atomic(filename, chunk.save)
+        if reservoir is not None:
+            self._save_reservoir(condition_ind, reservoir)
+        entry = {
+            'condition_ind': condition_ind,
+            'chunk_ind': chunk_ind,
+            'condition': list(condition),
+            'num_trials': len(chunk),
+            'file': filename,
+        }
+        self._append(entry)
+        self.completed[(condition_ind, chunk_ind)] = _to_json(entry)
+
+    def load_chunk(self, condition_ind, chunk_ind):
+        """load a completed chunk
+
+        Parameters
+        ----------
+        condition_ind : int
+        chunk_ind : int
+
+        Returns
+        -------
+        chunk : TrialBatch
+        """
+        entry = self.completed[(condition_ind, chunk_ind)]
+        return TrialBatch.load(os.path.join(self.checkpoint_dir, entry['file']))
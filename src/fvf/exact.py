@@ -0,0 +1,521 @@
+"""Exact distributions of reaction times, number of fixations, and responses
+for the fixation-based framework, computed by dynamic programming over the
+Markov chain that FVFModel.run_trial simulates.
+
+The state of a trial is the set of items seen so far plus the patches kept
+in memory. The search process itself does not depend on where the target is;
+the target only determines when a trial stops. So one pass over the states of
+the target-absent chain gives the distributions for both target present and
+target absent: if a set of items M has been seen, the probability that a
+uniformly-placed target has not been found yet is (display size - len(M)) /
+display size.
+
+When the functional visual field always holds exactly one item (the default
+for the 'hard' search type), all locations in the search array are
+exchangeable, and the state compresses to (number of items seen, number of
+patches in memory). This makes the solver fast for any display size.
+
+Otherwise the solver never tracks which items have been seen. By
+inclusion-exclusion, the distribution of the number of items not seen yet
+follows from, for each set of items A, the probability that no item in A has
+been seen yet. That probability only depends on the patches kept in memory,
+through how many fvf sizes let a fixation on each patch miss every item in A
+(the class of the patch). Sets of items with the same number of patches of
+each class share one Markov chain over the classes of patches in memory, so
+the states are (number of classes + 1) ** memory for each group of sets.
+Sums over all 2 ** display size sets of items cancel heavily, so they are
+computed with numpy.longdouble until their terms are small. This is tractable
+up to display sizes of about 20; if the number of sets of items or of states
+grows past max_states, a ValueError is raised, and Monte Carlo simulation with
+fvf.simulator.Simulator should be used instead.
+"""
+import math
+from collections import defaultdict
+from typing import NamedTuple
+
+import numpy as np
+
+from .model import FVFModel
+from . import munge
+
+# number of sets of items grouped at once by _item_set_groups
+ITEM_SETS_CHUNK_SIZE = 2 ** 14
+# sums of probabilities over sets of items are computed with numpy.longdouble until the sum of
+# absolute values of their terms is less than this, so that cancellation in them loses no more
+# than rounding errors of float64 do
+EXTENDED_PRECISION_MAX_TERMS = 100.
+
+
+class ExactDistribution(NamedTuple):
+    """NamedTuple that represents the exact joint distribution of
+    number of fixations and response for one condition;
+    returned by fvf.exact.distribution()
+
+    Fields
+    ------
+    num_fixations : numpy.ndarray
+        possible number of fixations, 1, 2, ..., n_max
+    p_response_present : numpy.ndarray
+        probability that trial ends after num_fixations[i] fixations
+        with response "target present"
+    p_response_absent : numpy.ndarray
+        probability that trial ends after num_fixations[i] fixations
+        with response "target absent"
+    reaction_time : numpy.ndarray
+        reaction time for each element in num_fixations, in milliseconds,
+        i.e. num_fixations * fixation_duration
+    truncated_mass : float
+        probability of trials still running after n_max fixations,
+        i.e. not included in the distribution. Less than tol.
+    """
+    num_fixations: np.ndarray
+    p_response_present: np.ndarray
+    p_response_absent: np.ndarray
+    reaction_time: np.ndarray
+    truncated_mass: float
+
+
+def _solve_exchangeable(display_size, memory, quit_count, tol, max_fixations):
+    """solve chain where functional visual field always holds exactly one item.
+    State is (number of items seen, number of patches in memory); all patches
+    in memory have been seen. Returns (found, quit_present, quit_absent),
+    lists of probabilities per fixation"""
+    # probability of each state for target-absent chain, i.e. before quitting
+    probs = np.zeros((quit_count + 1, memory + 1))
+    probs[0, 0] = 1.0
+    num_seen = np.arange(quit_count + 1)[:, np.newaxis]
+    num_recent = np.arange(memory + 1)[np.newaxis, :]
+    num_allowed = display_size - num_recent
+    p_new = (display_size - num_seen) / num_allowed  # new item seen
+    p_old = (num_seen - num_recent) / num_allowed  # item already seen, but not in memory
+    p_old = np.where(p_old > 0, p_old, 0.)
+
+    found, quit_present, quit_absent = [], [], []
+    while probs.sum() > tol and len(found) < max_fixations:
+        to_new = probs * p_new
+        to_old = probs * p_old
+        new_probs = np.zeros_like(probs)
+        for recent in range(memory + 1):
+            # after a fixation, one more patch is in memory, up to memory
+            new_recent = min(recent + 1, memory)
+            new_probs[:, new_recent] += to_old[:, recent]
+            new_probs[1:, new_recent] += to_new[:-1, recent]
+        # new item is the target with probability 1 / display size, given target not seen yet
+        found.append(to_new.sum() / display_size)
+        # quit when more than quit_count items have been seen
+        quit_absent.append(to_new[-1].sum())
+        quit_present.append(to_new[-1].sum() * (display_size - quit_count - 1) / display_size)
+        probs = new_probs
+    return found, quit_present, quit_absent, probs.sum()
+
+
+class _MemoryChain:
+    """Markov chain over the classes of the patches in memory, for a batch of
+    sets of items that all have the same number of classes of patches.
+
+    The class of a patch, given a set of items A, is the number of fvf sizes
+    for which a fixation on it does not see any item in A. A step of the chain
+    is a fixation that sees no item in A; its weight is the probability of
+    the fvf size times the number of patches of its class not in memory. So
+    the total weight of the chain after t steps, divided by the number of
+    patches that could be fixated at each step, is the probability that no
+    item in A has been seen after t fixations.
+
+    The state is a tensor with one axis per patch in memory, oldest first,
+    whose last index means "no patch" until memory fills up, and a last axis
+    for the sets of items in the batch.
+    """
+    def __init__(self, num_patches, probs_avoid, per_patch, memory, dtype):
+        """__init__ method
+
+        Parameters
+        ----------
+        num_patches : numpy.ndarray
+            number of patches of each class, with shape (number of classes, number of sets of items)
+        probs_avoid : numpy.ndarray
+            probability that the fvf of a fixation on a patch of each class does not
+            include any item in the set, with the same shape as num_patches
+        per_patch : numpy.ndarray
+            value of a patch of each class, summed over patches in memory by step,
+            with the same shape as num_patches
+        memory : int
+            number of patches in memory
+        dtype : numpy.dtype
+            of tensor of weights
+        """
+        self.num_classes, num_sets = num_patches.shape
+        self.memory = memory
+        self.num_patches = num_patches.astype(dtype)
+        self.probs_avoid = probs_avoid.astype(dtype)
+        self.per_patch = per_patch
+        self.weights = np.zeros((self.num_classes + 1,) * memory + (num_sets,), dtype=dtype)
+        self.weights[(self.num_classes,) * memory] = 1.
+        self.totals = np.ones((num_sets,), dtype=dtype)
+        self.num_steps = 0
+        self._newer = None
+
+    def astype(self, dtype):
+        self.num_patches = self.num_patches.astype(dtype)
+        self.probs_avoid = self.probs_avoid.astype(dtype)
+        self.weights = self.weights.astype(dtype)
+        self.totals = self.totals.astype(dtype)
+        self._newer = None
+
+    def _newer_patches(self):
+        """number of patches of each class in memory, for each state of all but the oldest
+        patch in memory, with shape (number of states, number of classes), and sum of
+        per_patch over them, with shape (number of states, number of sets of items)"""
+        if self._newer is None:
+            num_slots = self.weights.shape[0]
+            slots = np.indices((num_slots,) * (self.memory - 1)).reshape(self.memory - 1,
+                                                                         num_slots ** (self.memory - 1))
+            counts = (slots[:, :, np.newaxis] == np.arange(self.num_classes)).sum(axis=0)
+            self._newer = counts.astype(self.weights.dtype), counts @ self.per_patch
+        return self._newer
+
+    def step(self, num_allowed):
+        """one fixation that sees no item in set, divided by num_allowed, the number of
+        patches that could be fixated. Returns total over states before the fixation of
+        weight times sum of per_patch over patches in memory, for each set of items"""
+        num_classes, memory = self.num_classes, self.memory
+        self.num_steps += 1
+        if memory == 0:
+            self.weights = self.weights * (self.probs_avoid * self.num_patches).sum(axis=0) / num_allowed
+            self.totals = self.weights
+            return np.zeros(self.weights.shape)
+        num_slots = self.weights.shape[0]
+        if self.num_steps == memory + 1:
+            # memory is full, so drop index that means "no patch"
+            self.weights = np.ascontiguousarray(self.weights[(slice(0, num_classes),) * memory])
+            self._newer = None
+            num_slots = num_classes
+        num_sets = self.weights.shape[-1]
+        by_oldest = self.weights.reshape(num_slots, num_slots ** (memory - 1), num_sets)
+        newer = by_oldest.sum(axis=0)
+        newer_counts, newer_per_patch = self._newer_patches()
+        memory_totals = ((by_oldest.sum(axis=1)[:num_classes] * self.per_patch).sum(axis=0)
+                         + (newer * newer_per_patch).sum(axis=0))
+        new_weights = np.zeros((num_slots ** (memory - 1), num_slots, num_sets), dtype=self.weights.dtype)
+        available = np.empty(newer.shape, dtype=self.weights.dtype)
+        for class_ind in range(num_classes):
+            # patches of class not in memory: all but those among newer patches, and oldest patch if it
+            # is of class, since it is dropped from memory by this fixation
+            np.subtract(self.num_patches[class_ind], newer_counts[:, class_ind, np.newaxis], out=available)
+            available *= newer
+            available -= by_oldest[class_ind]
+            np.multiply(available, self.probs_avoid[class_ind] / num_allowed, out=new_weights[:, class_ind])
+        self.weights = new_weights.reshape(self.weights.shape)
+        self.totals = new_weights.reshape(-1, num_sets).sum(axis=0)
+        return memory_totals
+
+
+def _item_set_groups(display_size, fvf_sizes, coefs):
+    """group all sets of items by their number of patches of each class.
+    Returns dict that maps tuple of number of patches of each class to
+    (number of sets of each size, sum over sets A of coefs[len(A)] times, for
+    each class, the sum over patches l of that class of num_sizes times the
+    expected number of items in A not seen by a fixation on l)"""
+    min_size, num_sizes = fvf_sizes[0], len(fvf_sizes)
+    locs = np.arange(display_size)
+    item_locs, fix_locs = np.meshgrid(locs, locs, indexing='ij')
+    # number of fvf sizes for which a fixation on each patch (columns) does not see each item (rows)
+    num_avoid = np.where(item_locs < fix_locs,
+                         num_sizes,
+                         np.clip(item_locs - fix_locs - min_size + 1, 0, num_sizes))
+    # index of each distinct number of patches of each class, as bytes
+    key_inds = {}
+    set_counts = np.zeros((0, display_size + 1), dtype=np.int64)
+    weights = np.zeros((0, num_sizes + 1), dtype=np.int64)
+    num_item_sets = 2 ** display_size
+    for start in range(0, num_item_sets, ITEM_SETS_CHUNK_SIZE):
+        item_sets = np.arange(start, min(start + ITEM_SETS_CHUNK_SIZE, num_item_sets))
+        in_set = ((item_sets[:, np.newaxis] >> locs) & 1).astype(bool)
+        classes = np.where(in_set[:, :, np.newaxis], num_avoid, num_sizes).min(axis=1)
+        set_sizes = in_set.sum(axis=1)
+        is_class = classes[:, :, np.newaxis] == np.arange(num_sizes + 1)
+        num_patches = is_class.sum(axis=1)
+        num_unseen = in_set.astype(np.int64) @ num_avoid
+        inds = np.array([key_inds.setdefault(key, len(key_inds))
+                         for key in map(bytes, num_patches.astype(np.uint8))])
+        if len(key_inds) > set_counts.shape[0]:
+            num_new = len(key_inds) - set_counts.shape[0]
+            set_counts = np.concatenate([set_counts, np.zeros((num_new, display_size + 1), dtype=np.int64)])
+            weights = np.concatenate([weights, np.zeros((num_new, num_sizes + 1), dtype=np.int64)])
+        np.add.at(set_counts, (inds, set_sizes), 1)
+        np.add.at(weights, inds, np.einsum('il,ilc->ic', num_unseen, is_class) * coefs[set_sizes][:, np.newaxis])
+    return {tuple(np.frombuffer(key, dtype=np.uint8).tolist()): (set_counts[ind], weights[ind])
+            for key, ind in key_inds.items()}
+
+
+def _solve_item_sets(display_size, memory, quit_count, fvf_sizes, tol, max_fixations, max_states):
+    """solve chain by inclusion-exclusion over sets of items not seen yet.
+    Returns (found, quit_present, quit_absent), lists of probabilities per fixation"""
+    if 2 ** display_size > max_states:
+        raise ValueError(f'number of sets of items {2 ** display_size} is greater than max_states {max_states}; '
+                         'use Monte Carlo simulation for this condition instead')
+    num_sizes = len(fvf_sizes)
+    # trial quits once at most max_unseen items are not seen yet
+    max_unseen = display_size - quit_count - 1
+    # sum over sets A that hold item x of coefs[len(A)] is 1 if x and at most max_unseen - 1 other items
+    # are not seen yet, else 0; so sum over sets A not seen yet, of coefs[len(A)] times number of items
+    # in A not seen on the next fixation, is number of items not seen after it, if trial had quit before it
+    coefs = np.zeros((display_size + 1,), dtype=np.int64)
+    for set_size in range(1, display_size + 1):
+        coefs[set_size] = sum((-1) ** (set_size - 1 - num_others) * math.comb(set_size - 1, num_others)
+                              for num_others in range(min(set_size, max_unseen)))
+    groups = _item_set_groups(display_size, fvf_sizes, coefs)
+
+    batches = defaultdict(list)
+    for key in groups:
+        # classes of patches that are fixated without seeing any item in set
+        batches[sum(1 for num_patches in key[1:] if num_patches)].append(key)
+    chains = []
+    for num_classes, keys in batches.items():
+        if (num_classes + 1) ** memory > max_states:
+            raise ValueError(f'number of states {(num_classes + 1) ** memory} is greater than max_states '
+                             f'{max_states}; use Monte Carlo simulation for this condition instead')
+        num_patches = np.array(keys).T
+        weights = np.array([groups[key][1] for key in keys]).T
+        # weight of each patch in memory, per class, is zero if there are no patches of class
+        per_patch = np.divide(weights, num_patches, out=np.zeros(weights.shape), where=num_patches > 0)
+        classes = np.array([[class_ind for class_ind in range(1, num_sizes + 1) if key[class_ind]] for key in keys],
+                           dtype=np.int64).reshape(len(keys), num_classes).T
+        chain = _MemoryChain(np.take_along_axis(num_patches, classes, axis=0),
+                             classes / num_sizes,
+                             np.take_along_axis(per_patch, classes, axis=0),
+                             memory,
+                             np.longdouble)
+        chains.append((chain, np.array([groups[key][0] for key in keys]), weights.sum(axis=0)))
+
+    # probability that exactly num_unseen items are not seen yet, from
+    # sums over sets of items of size set_size of probability that no item in set is seen yet
+    num_unseen = np.arange(display_size + 1)
+    from_sums = np.array([[(-1) ** (set_size - unseen) * math.comb(set_size, unseen)
+                           for set_size in range(display_size + 1)]
+                          for unseen in range(display_size + 1)], dtype=np.longdouble)
+    # sums that are all computed with extended precision, until terms in them are small enough
+    # that cancellation loses no more than double precision would
+    extended = True
+
+    found, quit_present, quit_absent = [], [], []
+    alive = prev_alive = prev_unseen = 1.
+    while alive > tol and len(found) < max_fixations:
+        num_allowed = display_size - min(len(found), memory)
+        sums = np.zeros((display_size + 1,), dtype=from_sums.dtype)
+        unseen_after_quit = 0.
+        for chain, set_counts, weights in chains:
+            unseen_after_quit += np.sum(chain.totals * weights - chain.step(num_allowed))
+            sums += chain.totals @ set_counts
+        unseen_after_quit /= num_sizes * num_allowed * display_size
+        probs = from_sums @ sums
+        alive = probs[max_unseen + 1:].sum()
+        unseen = (num_unseen[max_unseen + 1:] * probs[max_unseen + 1:]).sum() / display_size
+        step_quit_present = (num_unseen[:max_unseen + 1] * probs[:max_unseen + 1]).sum() / display_size \
+            - unseen_after_quit
+        found.append(float(prev_unseen - unseen - step_quit_present))
+        quit_present.append(float(step_quit_present))
+        quit_absent.append(float(prev_alive - alive))
+        prev_alive, prev_unseen = alive, unseen
+        if extended and (np.abs(from_sums) @ sums).sum() < EXTENDED_PRECISION_MAX_TERMS:
+            extended = False
+            from_sums = from_sums.astype(np.float64)
+            for chain, *_ in chains:
+                chain.astype(np.float64)
+    return found, quit_present, quit_absent, float(alive)
+
+
+def _solve(fvf_model, search_type, display_size, tol, max_fixations, max_states):
+    """solve for both target present and target absent conditions at once.
+    Returns dict mapping target_present to ExactDistribution"""
+    if search_type not in {'easy', 'medium', 'hard'}:
+        raise ValueError('search_type must be one of: {\'easy\', \'medium\', \'hard\'}')
+    max_items = getattr(fvf_model.max_items_by_search_type, search_type)
+    fvf_sizes = list(range(fvf_model.min_items, max_items + 1))
+    memory = min(fvf_model.prev_patch_memory, display_size - 1)
+    # trial quits once more than quit_count items have been seen
+    quit_count = max(num_seen for num_seen in range(display_size + 1)
+                     if not num_seen / display_size > fvf_model.quit_threshold)
+    if quit_count >= display_size:
+        raise ValueError('quit_threshold is too high for search to ever quit; '
+                         'distribution of target absent trials is not defined')
+
+    if fvf_sizes == [1]:
+        found, quit_present, quit_absent, alive = _solve_exchangeable(display_size, memory, quit_count,
+                                                                      tol, max_fixations)
+    else:
+        found, quit_present, quit_absent, alive = _solve_item_sets(display_size, memory, quit_count, fvf_sizes,
+                                                                   tol, max_fixations, max_states)
+
+    num_fixations = np.arange(1, len(found) + 1)
+    reaction_time = num_fixations * fvf_model.fixation_duration
+    # mass still in play for target present is alive mass times probability target is not seen yet
+    truncated_present = 1. - np.sum(found) - np.sum(quit_present)
+    return {
+        True: ExactDistribution(num_fixations,
+                                np.asarray(found),
+                                np.asarray(quit_present),
+                                reaction_time,
+                                max(float(truncated_present), 0.)),
+        False: ExactDistribution(num_fixations,
+                                 np.zeros((len(found),)),
+                                 np.asarray(quit_absent),
+                                 reaction_time,
+                                 float(alive)),
+    }
+
+
+def distribution(search_type, display_size, target_present, fvf_model=None,
+                 tol=1e-10, max_fixations=10000, max_states=1000000):
+    """compute exact distribution of number of fixations, reaction time and
+    response for one condition
+
+    Parameters
+    ----------
+    search_type : str
+        One of {'easy', 'medium', 'hard'}.
+    display_size : int
+        number of elements in search array
+    target_present : bool
+        if True, one element of search array is the target, at a location
+        drawn uniformly, as in fvf.simulator.Simulator
+    fvf_model : FVFModel
+        instance of FVFModel whose parameters are used.
+        Default is None, in which case defaults for model are used.
+    tol : float
+        stop once probability of trials still running is less than tol.
+        Default is 1e-10.
+    max_fixations : int
+        maximum number of fixations to compute. Default is 10000.
+    max_states : int
+        maximum number of sets of items, and of states in Markov chain over
+        patches in memory. If more are needed, a ValueError is raised.
+        Default is 1000000.
+
+    Returns
+    -------
+    exact_distribution : ExactDistribution
+    """
+    if fvf_model is None:
+        fvf_model = FVFModel()
+    return _solve(fvf_model, search_type, display_size, tol, max_fixations, max_states)[target_present]
+
+
+def _mean_std(values, probs):
+    """mean and standard deviation of a discrete distribution"""
+    probs = probs / probs.sum()
+    mean = np.sum(values * probs)
+    return mean, np.sqrt(np.sum((values - mean) ** 2 * probs))
+
+
+def _quantile_sample(values, probs, num_points):
+    """deterministic "sample" from a discrete distribution:
+    its quantiles at (i + 0.5) / num_points, for i in range(num_points).
+    A histogram of this sample, divided by num_points, is within
+    1 / num_points of the distribution"""
+    cdf = np.cumsum(probs / probs.sum())
+    quantiles = (np.arange(num_points) + 0.5) / num_points
+    return values[np.minimum(np.searchsorted(cdf, quantiles, side='right'), values.shape[0] - 1)]
+
+
+def _distributions(fvf_model, search_types, display_sizes, target_presence, tol, max_states):
+    if fvf_model is None:
+        fvf_model = FVFModel()
+    distributions = {}
+    for search_type in search_types:
+        for display_size in display_sizes:
+            by_target_present = _solve(fvf_model, search_type, display_size, tol, 10000, max_states)
+            for target_present in target_presence:
+                distributions[(search_type, display_size, target_present)] = by_target_present[target_present]
+    return distributions
+
+
+def reaction_times(fvf_model=None,
+                   search_types=('easy', 'medium', 'hard'),
+                   display_sizes=(6, 12, 18),
+                   target_presence=(True, False),
+                   num_points=10000,
+                   tol=1e-10,
+                   max_states=1000000):
+    """compute exact reaction time results, in the same format
+    returned by fvf.munge.reaction_times, so they can be plotted
+    with fvf.plot
+
+    Parameters
+    ----------
+    fvf_model : FVFModel
+        instance of FVFModel whose parameters are used.
+        Default is None, in which case defaults for model are used.
+    search_types : tuple
+        Default is ('easy', 'medium', 'hard').
+    display_sizes : tuple
+        Default is (6, 12, 18).
+    target_presence : tuple
+        Default is (True, False).
+    num_points : int
+        number of points in the arrays in RTs_by_condition. Default is 10000.
+    tol : float
+        see fvf.exact.distribution. Default is 1e-10.
+    max_states : int
+        see fvf.exact.distribution. Default is 1000000.
+
+    Returns
+    -------
+    reaction_time_results : fvf.munge.RTResults
+        mean_RTs_by_condition and std_RTs_by_condition are exact, and computed
+        from correct trials only, as in fvf.munge.reaction_times.
+        RTs_by_condition holds the quantiles of the distribution of reaction times
+        of all trials at (i + 0.5) / num_points, so that histograms of them match
+        the exact distribution to within 1 / num_points.
+    """
+    distributions = _distributions(fvf_model, search_types, display_sizes, target_presence, tol, max_states)
+    RTs_by_condition = {}
+    mean_RTs_by_condition = {}
+    std_RTs_by_condition = {}
+    for condition, exact_distribution in distributions.items():
+        all_probs = exact_distribution.p_response_present + exact_distribution.p_response_absent
+        RTs_by_condition[condition] = _quantile_sample(exact_distribution.reaction_time, all_probs, num_points)
+        # keep only correct trials, as in Young Hulleman 2013
+        if condition[2]:
+            correct_probs = exact_distribution.p_response_present
+        else:
+            correct_probs = exact_distribution.p_response_absent
+        mean_RTs_by_condition[condition], std_RTs_by_condition[condition] = _mean_std(
+            exact_distribution.reaction_time, correct_probs
+        )
+    return munge._rt_results(RTs_by_condition, mean_RTs_by_condition, std_RTs_by_condition)
+
+
+def num_fixations(fvf_model=None,
+                  search_types=('easy', 'medium', 'hard'),
+                  display_sizes=(6, 12, 18),
+                  target_presence=(True, False),
+                  num_points=10000,
+                  tol=1e-10,
+                  max_states=1000000):
+    """compute exact number of fixations results, in the same format
+    returned by fvf.munge.num_fixations, so they can be plotted
+    with fvf.plot
+
+    Parameters are the same as for fvf.exact.reaction_times.
+
+    Returns
+    -------
+    num_fixations_results : fvf.munge.NumFixationsResults
+        means and standard deviations are exact, and computed from all trials,
+        as in fvf.munge.num_fixations. num_fixations_by_condition holds quantiles,
+        as RTs_by_condition does for fvf.exact.reaction_times.
+    """
+    distributions = _distributions(fvf_model, search_types, display_sizes, target_presence, tol, max_states)
+    num_fixations_by_condition = {}
+    mean_num_fixations_by_condition = {}
+    std_num_fixations_by_condition = {}
+    for condition, exact_distribution in distributions.items():
+        all_probs = exact_distribution.p_response_present + exact_distribution.p_response_absent
+        num_fixations_by_condition[condition] = _quantile_sample(exact_distribution.num_fixations,
+                                                                 all_probs,
+                                                                 num_points)
+        (mean_num_fixations_by_condition[condition],
+         std_num_fixations_by_condition[condition]) = _mean_std(exact_distribution.num_fixations, all_probs)
+    return munge._num_fixations_results(num_fixations_by_condition,
+                                        mean_num_fixations_by_condition,
+                                        std_num_fixations_by_condition)
@@ -0,0 +1,158 @@
+"""Batch export of every figure in fvf.plot, for one or many results directories.
+
+Each results directory is loaded and summarized once; reaction times,
+number of fixations and histograms of reaction times for all conditions
+are computed from that one summary, then every figure is rendered and
+saved in each requested format. Directories are spread across a pool of
+worker processes, that render with the non-interactive 'Agg' backend.
+
+From the command line::
+
+    fvf-export results/run1 results/run2 --formats png pdf --workers 4
+
+By default, figures for a results directory are saved in a 'figures'
+sub-directory of it.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from . import munge, plot
+
+FIGURES = ('mean_reaction_times', 'standard_devs', 'mean_num_fixations', 'reaction_times_distrib')
+FORMATS = ('png', 'svg', 'pdf')
+# order of rows in figures
+SEARCH_TYPES = ('easy', 'medium', 'hard')
+
+
+def _init_worker():
+    """use a non-interactive backend in worker processes, that never show figures"""
+    matplotlib.use('Agg')
+
+
+def _figure_makers(results_dir):
+    """load and summarize results once, and return a dict that maps
+    each figure name to a function that makes the figure"""
+    summary = munge.summarize(results_dir)
+    rt_results = munge.reaction_times(summary)
+    nf_results = munge.num_fixations(summary)
+    RT_freqs_by_condition = munge.reaction_time_distribs(summary)
+
+    layout = {
+        'search_types': tuple(sorted(rt_results.search_types,
+                                     key=lambda search_type: SEARCH_TYPES.index(search_type))),
+        'display_sizes': rt_results.display_sizes,
+        'target_present': tuple(sorted(rt_results.target_present, reverse=True)),  # present first
+    }
+    return {
+        'mean_reaction_times': lambda: plot.mean_reaction_times(rt_results.mean_RTs_all_display_sizes,
+                                                                rt_results.mean_RTs_regress_results,
+                                                                **layout),
+        'standard_devs': lambda: plot.standard_devs(rt_results.std_RTs_all_display_sizes, **layout),
+        'mean_num_fixations': lambda: plot.mean_num_fixations(nf_results.mean_num_fixations_all_display_sizes,
+                                                              **layout),
+        'reaction_times_distrib': lambda: plot.reaction_times_distrib(None,
+                                                                      RT_freqs_by_condition=RT_freqs_by_condition,
+                                                                      **layout),
+    }
+
+
+def _export_one(results_dir, figures_dir, formats, dpi):
+    """render and save all figures for one results directory. Module-level so it can run in a process pool"""
+    os.makedirs(figures_dir, exist_ok=True)
+    paths = []
+    for name, make_figure in _figure_makers(results_dir).items():
+        with plot.style():
+            fig = make_figure()
+            for fmt in formats:
+                path = os.path.join(figures_dir, f'{name}.{fmt}')
+                fig.savefig(path, format=fmt, dpi=dpi)
+                paths.append(path)
+        plt.close(fig)
+    return paths
+
+
+def export(results_dirs, formats=('png',), figures_dir=None, workers=None, dpi='figure'):
+    """render every figure in fvf.plot for each results directory, and save them
+
+    Parameters
+    ----------
+    results_dirs : str, list
+        path to a results directory in columnar format, created by running fvf.main
+        or by fvf.results.save, or a list of paths
+    formats : tuple
+        of file formats, any of {'png', 'svg', 'pdf'}. Default is ('png',).
+    figures_dir : str
+        path to directory where figures are saved. Default is None, in which case
+        figures for each results directory are saved in a 'figures' sub-directory of it.
+        If specified and there is more than one results directory, figures for each
+        are saved in a sub-directory named after the results directory.
+    workers : int
+        number of worker processes. Each renders all figures for one results directory
+        at a time, with the 'Agg' backend. Default is None, in which case figures are
+        rendered in this process, with whatever backend is in use, and closed after saving.
+    dpi : float, str
+        resolution of raster formats, passed to matplotlib.figure.Figure.savefig.
+        Default is 'figure', the resolution of the figure.
+
+    Returns
+    -------
+    paths : list
+        of paths to saved figures, in the order of results_dirs, then FIGURES, then formats
+    """
+    if isinstance(results_dirs, str):
+        results_dirs = [results_dirs]
+    formats = tuple(formats)
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f'formats must be in {FORMATS}, but got: {fmt}')
+
+    figures_dirs = []
+    for results_dir in results_dirs:
+        if figures_dir is None:
+            figures_dirs.append(os.path.join(results_dir, 'figures'))
+        elif len(results_dirs) == 1:
+            figures_dirs.append(figures_dir)
+        else:
+            figures_dirs.append(os.path.join(figures_dir, os.path.basename(os.path.normpath(results_dir))))
+
+    args = (results_dirs, figures_dirs, [formats] * len(results_dirs), [dpi] * len(results_dirs))
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            paths_by_dir = list(executor.map(_export_one, *args))
+    else:
+        paths_by_dir = list(map(_export_one, *args))
+    return [path for paths in paths_by_dir for path in paths]
+
+
+def get_parser():
+    """returns instance of ArgumentParser, used for command-line interface by main function below"""
+    parser = argparse.ArgumentParser(description='Save every figure of results from fixation-based framework.')
+    parser.add_argument('results_dirs', nargs='+', help='paths to results directories')
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=FORMATS,
+                        help="file formats of figures. Default is png.")
+    parser.add_argument('--figures-dir', default=None,
+                        help="directory where figures are saved. Default is a 'figures' sub-directory "
+                             "of each results directory.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes. Default is None, in which case "
+                             "figures are rendered in one process.")
+    parser.add_argument('--dpi', type=float, default=None,
+                        help="resolution of raster formats. Default is the resolution of the figure.")
+    return parser
+
+
+def main():
+    """main function run from command line as fvf-export"""
+    args = get_parser().parse_args()
+    matplotlib.use('Agg')
+    paths = export(args.results_dirs, formats=args.formats, figures_dir=args.figures_dir, workers=args.workers,
+                   dpi=args.dpi if args.dpi is not None else 'figure')
+    print(f'saved {len(paths)} figures')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""Fit FVFModel parameters to observed reaction time data.
+
+Uses a Nelder-Mead simplex search that tolerates simulation noise by using
+common random numbers: every candidate parameter set is simulated with the
+same seed, so the objective is a deterministic function of the parameters,
+and differences between candidates are not swamped by Monte Carlo noise.
+Each iteration evaluates the reflection, expansion, and both contractions
+at once, so they can run in parallel in a process pool ("speculative"
+parallel Nelder-Mead).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from scipy import stats
+
+from .model import FVFModel, MaxItemsBySearchType
+from .simulator import Simulator
+from . import munge
+
+# parameters that can be fit, and whether they take integer values
+FIT_PARAMS = {
+    'min_items': True,
+    'max_items_easy': True,
+    'max_items_medium': True,
+    'max_items_hard': True,
+    'prev_patch_memory': True,
+    'fixation_duration': True,
+    'quit_threshold': False,
+}
+
+
+class Observed(NamedTuple):
+    """NamedTuple that represents observed data to fit
+
+    Fields
+    ------
+    mean_RTs : dict
+        maps each condition, a (search type, display size, target present) tuple,
+        to mean reaction time of correct trials, in ms
+    std_RTs : dict
+        maps each condition to standard deviation of reaction times of correct trials, in ms.
+        Default is None, in which case standard deviations are not fit.
+    error_rates : dict
+        maps each condition to proportion of trials with incorrect responses.
+        Default is None, in which case error rates are not fit.
+    """
+    mean_RTs: dict
+    std_RTs: dict = None
+    error_rates: dict = None
+
+
+class Scales(NamedTuple):
+    """NamedTuple of scales used to weight each term of the loss;
+    each error is divided by its scale before squaring
+
+    Fields
+    ------
+    RT : float
+        for mean and standard deviation of reaction times, in ms. Default is 100.
+    error_rate : float
+        for error rates. Default is 0.01.
+    slope : float
+        for slopes of mean reaction time v. display size, in ms/item. Default is 10.
+    """
+    RT: float = 100.
+    error_rate: float = 0.01
+    slope: float = 10.
+
+
+class FitResult(NamedTuple):
+    """NamedTuple that represents result of fitting; returned by fvf.fit.fit
+
+    Fields
+    ------
+    fvf_params : dict
+        best parameters found, that can be passed to FVFModel
+        or to Simulator.runall
+    loss : float
+        value of loss for fvf_params
+    num_evaluations : int
+        number of distinct parameter sets simulated
+    history : list
+        of (fvf_params, loss) tuples, for every distinct parameter set simulated,
+        in the order they were simulated
+    """
+    fvf_params: dict
+    loss: float
+    num_evaluations: int
+    history: list
+
+
+def _to_fvf_params(params):
+    """convert dict of fit parameters into dict of FVFModel parameters"""
+    fvf_params = {}
+    max_items = FVFModel().max_items_by_search_type._asdict()
+    for name, value in params.items():
+        if name.startswith('max_items_'):
+            max_items[name[len('max_items_'):]] = value
+        else:
+            fvf_params[name] = value
+    fvf_params['max_items_by_search_type'] = MaxItemsBySearchType(**max_items)
+    return fvf_params
+
+
+def _slopes(mean_RTs):
+    """slopes of mean reaction time v. display size,
+    for each (search type, target present)"""
+    by_key = {}
+    for (search_type, display_size, target_present), mean_RT in mean_RTs.items():
+        by_key.setdefault((search_type, target_present), []).append((display_size, mean_RT))
+    slopes = {}
+    for key, points in by_key.items():
+        if len(points) > 1:
+            display_sizes, mean_RT_vals = zip(*sorted(points))
+            slopes[key] = stats.linregress(display_sizes, mean_RT_vals).slope
+    return slopes
+
+
+def loss(params, observed, num_trials=2000, seed=42, scales=Scales()):
+    """compute loss for one parameter set: sum of squared, scaled errors
+    between simulated and observed data.
+
+    Terms are mean RTs of correct trials for each condition, their slopes
+    across display sizes, as computed by fvf.munge.reaction_times, and,
+    if in observed, standard deviations of RTs and error rates.
+
+    Parameters
+    ----------
+    params : dict
+        of parameters to fit, with names from fvf.fit.FIT_PARAMS.
+        Others take default values of FVFModel.
+    observed : Observed
+    num_trials : int
+        number of trials per condition. Default is 2000.
+    seed : int
+        seed for Simulator, that runs with common_random_numbers=True.
+        Using the same seed for every parameter set means that
+        matched trials use the same random numbers. Default is 42.
+    scales : Scales
+
+    Returns
+    -------
+    loss : float
+        inf if params are not valid for FVFModel
+    """
+    conditions = list(observed.mean_RTs.keys())
+    sim = Simulator(trials_per_condition=num_trials,
+                    display_sizes=tuple(sorted(set(condition[1] for condition in conditions))),
+                    task_difficulties=tuple(sorted(set(condition[0] for condition in conditions))),
+                    target_presence=tuple(sorted(set(condition[2] for condition in conditions))),
+                    seed=seed,
+                    common_random_numbers=True)
+    fvf_params = _to_fvf_params(params)
+    if fvf_params.get('min_items', 1) > min(fvf_params['max_items_by_search_type']):
+        return np.inf
+    try:
+        results = sim.runall(fvf_params=fvf_params, record='summary')
+    except ValueError:
+        return np.inf
+
+    summary = munge.summarize(results)
+    rt_results = munge.reaction_times(summary)
+    error_rates = dict(zip(summary.conditions, summary.error_rate))
+
+    total = 0.
+    for condition in conditions:
+        total += ((rt_results.mean_RTs_by_condition[condition] - observed.mean_RTs[condition]) / scales.RT) ** 2
+        if observed.std_RTs is not None:
+            total += ((rt_results.std_RTs_by_condition[condition] - observed.std_RTs[condition]) / scales.RT) ** 2
+        if observed.error_rates is not None:
+            total += ((error_rates[condition] - observed.error_rates[condition]) / scales.error_rate) ** 2
+    for key, observed_slope in _slopes(observed.mean_RTs).items():
+        simulated_slope = rt_results.mean_RTs_regress_results[key].slope
+        total += ((simulated_slope - observed_slope) / scales.slope) ** 2
+    # NaN when a condition has no correct trials
+    return float(total) if not np.isnan(total) else np.inf
+
+
+def _loss_star(args):
+    """unpack arguments for loss; module-level so it can run in a process pool"""
+    return loss(*args)
+
+
+def fit(observed, bounds, init=None, num_trials=2000, seed=42, scales=Scales(),
+        max_evaluations=200, workers=None):
+    """fit FVFModel parameters to observed data
+
+    Parameters
+    ----------
+    observed : Observed
+        data to fit
+    bounds : dict
+        maps name of each parameter to fit, from fvf.fit.FIT_PARAMS,
+        to a (low, high) tuple. Parameters not in bounds take default values of FVFModel.
+    init : dict
+        initial values of parameters. Default is None, in which case
+        the middle of each range in bounds is used.
+    num_trials : int
+        number of trials per condition for each evaluation. Default is 2000.
+    seed : int
+        seed used for every evaluation (common random numbers). Default is 42.
+    scales : Scales
+        used to weight terms of the loss
+    max_evaluations : int
+        maximum number of distinct parameter sets to simulate. Default is 200.
+    workers : int
+        number of worker processes used to evaluate candidates in parallel.
+        Default is None, in which case candidates are evaluated in this process.
+
+    Returns
+    -------
+    fit_result : FitResult
+    """
+    for name in bounds:
+        if name not in FIT_PARAMS:
+            raise ValueError(f'not a parameter that can be fit: {name}')
+    names = list(bounds.keys())
+    low = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in names], dtype=np.float64)
+    num_params = len(names)
+
+    def to_params(point):
+        """map point in unit cube to parameters, rounding integer parameters"""
+        values = low + np.clip(point, 0., 1.) * (high - low)
+        return {name: int(round(value)) if FIT_PARAMS[name] else float(value)
+                for name, value in zip(names, values)}
+
+    cache = {}
+    history = []
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+    def evaluate(points):
+        """evaluate a list of points, simulating each distinct parameter set only once"""
+        params_list = [to_params(point) for point in points]
+        keys = [tuple(sorted(params.items())) for params in params_list]
+        to_run = []
+        for key, params in zip(keys, params_list):
+            if key not in cache and key not in [run_key for run_key, _ in to_run]:
+                to_run.append((key, params))
+        args = [(params, observed, num_trials, seed, scales) for _, params in to_run]
+        if executor is not None:
+            losses = list(executor.map(_loss_star, args))
+        else:
+            losses = [_loss_star(arg) for arg in args]
+        for (key, params), params_loss in zip(to_run, losses):
+            cache[key] = params_loss
+            history.append((_to_fvf_params(params), params_loss))
+        return np.array([cache[key] for key in keys])
+
+    try:
+        if init is None:
+            start = np.full((num_params,), 0.5)
+        else:
+            start = (np.array([init[name] for name in names], dtype=np.float64) - low) / (high - low)
+        simplex = [start]
+        for ind in range(num_params):
+            vertex = start.copy()
+            vertex[ind] = vertex[ind] + 0.25 if vertex[ind] <= 0.5 else vertex[ind] - 0.25
+            simplex.append(vertex)
+        simplex = np.array(simplex)
+        losses = evaluate(simplex)
+
+        while len(cache) < max_evaluations:
+            order = np.argsort(losses)
+            simplex, losses = simplex[order], losses[order]
+            # stop when all vertices round to the same parameters
+            if len(set(tuple(sorted(to_params(vertex).items())) for vertex in simplex)) == 1:
+                break
+            centroid = simplex[:-1].mean(axis=0)
+            worst = simplex[-1]
+            reflected = np.clip(centroid + (centroid - worst), 0., 1.)
+            expanded = np.clip(centroid + 2. * (centroid - worst), 0., 1.)
+            outside = np.clip(centroid + 0.5 * (centroid - worst), 0., 1.)
+            inside = np.clip(centroid - 0.5 * (centroid - worst), 0., 1.)
+            num_evaluations = len(cache)
+            loss_r, loss_e, loss_oc, loss_ic = evaluate([reflected, expanded, outside, inside])
+
+            if losses[0] <= loss_r < losses[-2]:
+                simplex[-1], losses[-1] = reflected, loss_r
+            elif loss_r < losses[0]:
+                if loss_e < loss_r:
+                    simplex[-1], losses[-1] = expanded, loss_e
+                else:
+                    simplex[-1], losses[-1] = reflected, loss_r
+            elif loss_r < losses[-1] and loss_oc <= loss_r:
+                simplex[-1], losses[-1] = outside, loss_oc
+            elif loss_ic < losses[-1]:
+                simplex[-1], losses[-1] = inside, loss_ic
+            else:
+                # shrink towards best vertex
+                simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+                losses[1:] = evaluate(simplex[1:])
+            if len(cache) == num_evaluations and np.allclose(simplex, simplex[0], atol=1e-3):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = int(np.argmin(losses))
+    return FitResult(_to_fvf_params(to_params(simplex[best])), float(losses[best]), len(cache), history)
@@ -0,0 +1,182 @@
+"""Optional JIT-compiled backend for running trials with FVFModel.
+
+Uses Numba (https://numba.pydata.org/) to compile a kernel that runs
+each trial's fixation loop at near-C speed. Numba is not a required
+dependency; if it is not installed, HAS_NUMBA is False, and
+fvf.simulator.Simulator falls back to FVFModel.run_trials.
+Numba, which takes a while to import, is only imported the first
+time the kernel is run.
+"""
+import importlib.util
+
+import numpy as np
+
+from .model import RECORD_LEVELS, TrialBatch, global_rng
+
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+_compiled_kernel = None
+
+
+def _get_kernel():
+    """get kernel compiled with numba.njit, or the plain Python function if numba is not installed"""
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        if HAS_NUMBA:
+            import numba
+            _compiled_kernel = numba.njit(cache=True)(_run_trials_kernel)
+        else:
+            _compiled_kernel = _run_trials_kernel
+    return _compiled_kernel
+
+
+def _run_trials_kernel(is_target, min_items, max_items, memory, quit_threshold, kernel_rng):
+    """run one trial for each row of is_target, one after another
+
+    Parameters
+    ----------
+    is_target : numpy.ndarray
+        bool, with shape (number of trials, display size).
+        True where search array is the target.
+    min_items : int
+    max_items : int
+    memory : int
+        number of previous patches kept in memory, already capped at display size - 1
+    quit_threshold : float
+    kernel_rng : numpy.random.Generator
+        random number generator used inside the kernel. Passed in rather than
+        seeded inside with numpy.random.seed, so that running the kernel
+        never changes numpy's global random state.
+
+    Returns
+    -------
+    response, num_fixations, fix_locs, fvf_sizes, fix_offsets, seen : numpy.ndarray
+        columns for a TrialBatch
+    """
+    num_trials, display_size = is_target.shape
+    response = np.zeros(num_trials, dtype=np.bool_)
+    num_fixations = np.zeros(num_trials, dtype=np.int64)
+    fix_offsets = np.zeros(num_trials + 1, dtype=np.int64)
+    seen = np.zeros((num_trials, display_size), dtype=np.bool_)
+    capacity = num_trials * 8
+    fix_locs = np.empty(capacity, dtype=np.int64)
+    fvf_sizes = np.empty(capacity, dtype=np.int64)
+    recent_patches = np.empty(max(memory, 1), dtype=np.int64)
+    total_fixations = 0
+
+    for trial in range(num_trials):
+        num_seen = 0
+        trial_fixations = 0
+        while True:
+            # draw uniformly from patches not in memory, without rejection
+            num_recent = min(trial_fixations, memory)
+            draw = kernel_rng.integers(0, display_size - num_recent)
+            # shift draw past every patch in memory at or before it; iterate to a fixed point
+            fix_loc = draw
+            while True:
+                num_before = 0
+                for recent in range(num_recent):
+                    if recent_patches[recent] <= fix_loc:
+                        num_before += 1
+                if draw + num_before == fix_loc:
+                    break
+                fix_loc = draw + num_before
+            if memory > 0:
+                recent_patches[trial_fixations % memory] = fix_loc
+            fvf_size = kernel_rng.integers(min_items, max_items + 1)
+            fvf_stop = min(fix_loc + fvf_size, display_size)
+
+            found = False
+            for item in range(fix_loc, fvf_stop):
+                if not seen[trial, item]:
+                    seen[trial, item] = True
+                    num_seen += 1
+                if is_target[trial, item]:
+                    found = True
+
+            if total_fixations == capacity:
+                capacity *= 2
+                new_fix_locs = np.empty(capacity, dtype=np.int64)
+                new_fix_locs[:total_fixations] = fix_locs
+                fix_locs = new_fix_locs
+                new_fvf_sizes = np.empty(capacity, dtype=np.int64)
+                new_fvf_sizes[:total_fixations] = fvf_sizes
+                fvf_sizes = new_fvf_sizes
+            fix_locs[total_fixations] = fix_loc
+            fvf_sizes[total_fixations] = fvf_size
+            total_fixations += 1
+            trial_fixations += 1
+
+            if found or num_seen / display_size > quit_threshold:
+                response[trial] = found
+                break
+        num_fixations[trial] = trial_fixations
+        fix_offsets[trial + 1] = total_fixations
+
+    return (response, num_fixations, fix_locs[:total_fixations], fvf_sizes[:total_fixations],
+            fix_offsets, seen)
+
+
+def run_trials(fvf_model, search_type, search_arrs, target=1, record='full', rng=None):
+    """run a batch of trials with the JIT-compiled kernel.
+    Equivalent to FVFModel.run_trials.
+
+    Parameters
+    ----------
+    fvf_model : FVFModel
+        instance of FVFModel whose parameters are used
+    search_type : str
+        One of {'easy', 'medium', 'hard'}.
+    search_arrs : numpy.ndarray
+        2-d array with shape (number of trials, display size).
+    target : int
+        target that subject searches for in visual search task.
+        Default is 1.
+    record : str
+        how much of each trial to record. One of {'summary', 'trace', 'full'};
+        see FVFModel.run_trial. Default is 'full'.
+    rng : numpy.random.Generator
+        used to draw the seed for the kernel's random number generator.
+        Default is None, in which case a generator is seeded from numpy's
+        global random state, see fvf.model.global_rng.
+
+    Returns
+    -------
+    trials : TrialBatch
+
+    Notes
+    -----
+    The kernel has its own random number generator. It is seeded with an
+    integer drawn from rng, so a seeded rng (as Simulator uses) makes results
+    reproducible, but they are not the same trials that FVFModel.run_trials
+    would produce with the same rng. The kernel's generator is passed in
+    as an argument, so numpy's global random state is never changed.
+    """
+    if search_type not in {'easy', 'medium', 'hard'}:
+        raise ValueError('search_type must be one of: {\'easy\', \'medium\', \'hard\'}')
+    if record not in RECORD_LEVELS:
+        raise ValueError(f'record must be one of {RECORD_LEVELS}, but was: {record}')
+    max_items = getattr(fvf_model.max_items_by_search_type, search_type)
+    search_arrs = np.asarray(search_arrs)
+    if search_arrs.ndim != 2:
+        raise ValueError('search_arrs must be a 2-d array with shape (number of trials, display size)')
+    memory = min(fvf_model.prev_patch_memory, search_arrs.shape[1] - 1)
+    if rng is None:
+        rng = global_rng()
+    kernel_rng = np.random.default_rng(int(rng.integers(2 ** 31 - 1)))
+    response, num_fixations, fix_locs, fvf_sizes, fix_offsets, seen = _get_kernel()(
+        search_arrs == target, fvf_model.min_items, max_items, memory, float(fvf_model.quit_threshold), kernel_rng
+    )
+    trials = TrialBatch(response,
+                        num_fixations * fvf_model.fixation_duration,
+                        num_fixations,
+                        search_arrs.shape[1],
+                        fix_locs=fix_locs,
+                        fvf_sizes=fvf_sizes,
+                        fix_offsets=fix_offsets,
+                        seen=seen,
+                        search_arrs=search_arrs)
+    if record != 'full':
+        # kernel always records everything; drop what was not asked for
+        trials = trials.take(np.arange(len(trials)), record=record)
+    return trials
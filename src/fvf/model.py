@@ -7,11 +7,16 @@ The impending demise of the item in visual search.
 Behavioral and Brain Sciences, 40, E132.
 doi:10.1017/S0140525X15002794
 """
+from bisect import bisect_left
 from typing import NamedTuple
 
 import numpy as np
 
 
+# how much of each trial is recorded, from least to most
+RECORD_LEVELS = ('summary', 'trace', 'full')
+
+
 class MaxItemsBySearchType(NamedTuple):
     easy: int
     medium: int
@@ -39,6 +44,11 @@ class Trial(NamedTuple):
         size of fvf for each fixation
     fvf_per_fix: list
         actual "contents" of fvf for each fixation
+
+    Fields that were not recorded are None; see the record parameter
+    of FVFModel.run_trial. fix_locs and fvf_sizes are recorded when
+    record is 'trace' or 'full', seen_arr and fvf_per_fix only
+    when record is 'full'.
     """
     response: bool
     reaction_time: int
@@ -49,6 +59,287 @@ class Trial(NamedTuple):
     fvf_per_fix: list
 
 
+def _compact_dtype(max_value):
+    """smallest unsigned integer dtype that can hold values from 0 to max_value"""
+    return np.min_scalar_type(max(int(max_value), 0))
+
+
+def global_rng():
+    """random number generator seeded from numpy's global random state.
+    Used when no rng is given, so that numpy.random.seed makes results
+    reproducible, as it did before functions took an rng"""
+    return np.random.default_rng(np.random.randint(2 ** 31 - 1))
+
+
+class TrialBatch:
+    """class that represents a batch of visual search task trials,
+    stored as columns ("struct of arrays") instead of a list of Trial tuples;
+    returned after calling FVFModel.run_trials()
+
+    Indexing a TrialBatch with an integer returns a Trial,
+    and iterating over it yields Trials, so it can be used
+    wherever a list of Trial tuples was used before.
+
+    Attributes
+    ----------
+    response : numpy.ndarray
+        bool, one element per trial. True if subject responds that target is present.
+    reaction_time : numpy.ndarray
+        int32, one element per trial, in units of milliseconds
+    num_fixations : numpy.ndarray
+        smallest unsigned integer dtype that holds the largest number of fixations
+    fix_locs : numpy.ndarray
+        locations of fixations for all trials, concatenated.
+        Fixations for trial i are fix_locs[fix_offsets[i]:fix_offsets[i + 1]]
+    fvf_sizes : numpy.ndarray
+        size of fvf for each fixation for all trials, concatenated like fix_locs
+    fvf_lengths : numpy.ndarray
+        number of items actually in the fvf for each fixation, i.e. fvf_sizes
+        truncated at the end of the search array. The "contents" of each fvf
+        are the (start, length) pairs (fix_locs, fvf_lengths), and are only
+        turned into arrays when a Trial is requested
+    fix_offsets : numpy.ndarray
+        int64, with number of trials + 1 elements; offsets into fix_locs and fvf_sizes
+    seen : numpy.ndarray
+        bool, with shape (number of trials, display size).
+        Elements that are True were seen during the series of fixations.
+    search_arrs : numpy.ndarray
+        with shape (number of trials, display size); search arrays for all trials
+    display_size : int
+        number of items in each search array
+
+    Columns that were not recorded are None; see FVFModel.run_trials.
+    """
+    def __init__(self,
+                 response,
+                 reaction_time,
+                 num_fixations,
+                 display_size,
+                 fix_locs=None,
+                 fvf_sizes=None,
+                 fix_offsets=None,
+                 seen=None,
+                 search_arrs=None):
+        """__init__ function
+
+        Parameters
+        ----------
+        response : numpy.ndarray
+        reaction_time : numpy.ndarray
+        num_fixations : numpy.ndarray
+        display_size : int
+            number of items in each search array
+        fix_locs : numpy.ndarray
+        fvf_sizes : numpy.ndarray
+        fix_offsets : numpy.ndarray
+        seen : numpy.ndarray
+        search_arrs : numpy.ndarray
+
+        All are converted to the compact dtypes described in the class docstring.
+        fix_locs, fvf_sizes and fix_offsets are None if traces were not recorded,
+        and seen and search_arrs are None unless full trials were recorded.
+        """
+        num_fixations = np.asarray(num_fixations)
+        self.response = np.asarray(response, dtype=bool)
+        self.reaction_time = np.asarray(reaction_time, dtype=np.int32)
+        self.num_fixations = num_fixations.astype(
+            _compact_dtype(num_fixations.max() if num_fixations.size else 0)
+        )
+
+        if fix_locs is not None:
+            fix_locs = np.asarray(fix_locs)
+            fvf_sizes = np.asarray(fvf_sizes)
+            self.fix_locs = fix_locs.astype(_compact_dtype(display_size - 1))
+            self.fvf_sizes = fvf_sizes.astype(_compact_dtype(fvf_sizes.max() if fvf_sizes.size else 0))
+            self.fvf_lengths = np.minimum(fvf_sizes, display_size - fix_locs).astype(self.fvf_sizes.dtype)
+            self.fix_offsets = np.asarray(fix_offsets, dtype=np.int64)
+        else:
+            self.fix_locs = self.fvf_sizes = self.fvf_lengths = self.fix_offsets = None
+
+        if seen is not None:
+            self.seen = np.asarray(seen, dtype=bool)
+            self.search_arrs = np.asarray(search_arrs)
+        else:
+            self.seen = self.search_arrs = None
+        self.display_size = display_size
+
+    def __len__(self):
+        return self.response.shape[0]
+
+    def __getitem__(self, ind):
+        """get one trial from the batch, as a Trial.
+
+        Note that seen_arr and the arrays in fvf_per_fix are views
+        into the batch, so the Trial keeps the batch alive.
+        """
+        num_trials = len(self)
+        if ind < 0:
+            ind += num_trials
+        if not 0 <= ind < num_trials:
+            raise IndexError(f'trial index out of range for TrialBatch with {num_trials} trials')
+        fix_locs = fvf_sizes = seen_arr = fvf_per_fix = None
+        if self.fix_locs is not None:
+            fix_slice = slice(self.fix_offsets[ind], self.fix_offsets[ind + 1])
+            fix_locs = self.fix_locs[fix_slice].tolist()
+            fvf_sizes = self.fvf_sizes[fix_slice].tolist()
+            if self.seen is not None:
+                seen_arr = self.seen[ind]
+                fvf_lengths = self.fvf_lengths[fix_slice].tolist()
+                search_arr = self.search_arrs[ind]
+                fvf_per_fix = [search_arr[fix_loc:fix_loc + fvf_length]
+                               for fix_loc, fvf_length in zip(fix_locs, fvf_lengths)]
+        return Trial(bool(self.response[ind]),
+                     int(self.reaction_time[ind]),
+                     seen_arr,
+                     int(self.num_fixations[ind]),
+                     fix_locs,
+                     fvf_sizes,
+                     fvf_per_fix)
+
+    def __iter__(self):
+        for ind in range(len(self)):
+            yield self[ind]
+
+    @property
+    def record(self):
+        """how much of each trial was recorded, one of fvf.model.RECORD_LEVELS"""
+        if self.seen is not None:
+            return 'full'
+        elif self.fix_locs is not None:
+            return 'trace'
+        else:
+            return 'summary'
+
+    @property
+    def nbytes(self):
+        """total number of bytes used by all columns"""
+        return sum(getattr(self, column).nbytes for column in self.columns()
+                   if getattr(self, column) is not None)
+
+    @staticmethod
+    def columns():
+        """names of all array columns, in the order they are passed to __init__"""
+        return ('response', 'reaction_time', 'num_fixations', 'fix_locs',
+                'fvf_sizes', 'fix_offsets', 'seen', 'search_arrs')
+
+    def take(self, inds, record=None):
+        """get a new TrialBatch with a subset of trials
+
+        Parameters
+        ----------
+        inds : numpy.ndarray
+            indices of trials to take, in order
+        record : str
+            One of fvf.model.RECORD_LEVELS. If specified, columns not
+            needed for this level are dropped. Default is None, in which
+            case the new batch records what this batch records.
+
+        Returns
+        -------
+        batch : TrialBatch
+        """
+        inds = np.asarray(inds, dtype=np.int64)
+        record = self.record if record is None else record
+        if RECORD_LEVELS.index(record) > RECORD_LEVELS.index(self.record):
+            raise ValueError(f"can't take trials with record='{record}' "
+                             f"from a TrialBatch with record='{self.record}'")
+        fix_locs = fvf_sizes = fix_offsets = seen = search_arrs = None
+        if record != 'summary':
+            starts = self.fix_offsets[inds]
+            lengths = self.fix_offsets[inds + 1] - starts
+            fix_offsets = np.zeros((inds.shape[0] + 1,), dtype=np.int64)
+            np.cumsum(lengths, out=fix_offsets[1:])
+            # index of every fixation from the trials taken
+            fix_inds = np.repeat(starts - fix_offsets[:-1], lengths) + np.arange(fix_offsets[-1])
+            fix_locs = self.fix_locs[fix_inds]
+            fvf_sizes = self.fvf_sizes[fix_inds]
+            if record == 'full':
+                seen = self.seen[inds]
+                search_arrs = self.search_arrs[inds]
+        return TrialBatch(self.response[inds],
+                          self.reaction_time[inds],
+                          self.num_fixations[inds],
+                          self.display_size,
+                          fix_locs,
+                          fvf_sizes,
+                          fix_offsets,
+                          seen,
+                          search_arrs)
+
+    def save(self, file):
+        """save batch to a .npz file, with one array for each recorded column
+
+        Parameters
+        ----------
+        file : str, file
+            filename or open file. If a filename without the '.npz' extension,
+            the extension is added, as for numpy.savez
+        """
+        arrays = {column: getattr(self, column) for column in self.columns()
+                  if getattr(self, column) is not None}
+        np.savez(file, display_size=self.display_size, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        """load batch saved with TrialBatch.save
+
+        Parameters
+        ----------
+        file : str, file
+            filename or open file
+
+        Returns
+        -------
+        batch : TrialBatch
+        """
+        with np.load(file) as npz:
+            arrays = {column: npz[column] for column in cls.columns() if column in npz.files}
+            return cls(display_size=int(npz['display_size']), **arrays)
+
+    @classmethod
+    def concatenate(cls, batches):
+        """concatenate a sequence of TrialBatch instances into one TrialBatch.
+        All batches must have the same display size; the concatenated batch
+        records only what all batches record.
+
+        Parameters
+        ----------
+        batches : list
+            of TrialBatch
+
+        Returns
+        -------
+        batch : TrialBatch
+        """
+        batches = list(batches)
+        display_size = batches[0].display_size
+        if any(batch.display_size != display_size for batch in batches):
+            raise ValueError('all batches must have the same display size')
+        record = min((batch.record for batch in batches), key=RECORD_LEVELS.index)
+        fix_locs = fvf_sizes = fix_offsets = seen = search_arrs = None
+        if record != 'summary':
+            fix_offsets = [np.zeros((1,), dtype=np.int64)]
+            total_fixations = 0
+            for batch in batches:
+                fix_offsets.append(batch.fix_offsets[1:] + total_fixations)
+                total_fixations += batch.fix_offsets[-1]
+            fix_offsets = np.concatenate(fix_offsets)
+            fix_locs = np.concatenate([batch.fix_locs for batch in batches])
+            fvf_sizes = np.concatenate([batch.fvf_sizes for batch in batches])
+            if record == 'full':
+                seen = np.concatenate([batch.seen for batch in batches])
+                search_arrs = np.concatenate([batch.search_arrs for batch in batches])
+        return cls(np.concatenate([batch.response for batch in batches]),
+                   np.concatenate([batch.reaction_time for batch in batches]),
+                   np.concatenate([batch.num_fixations for batch in batches]),
+                   display_size,
+                   fix_locs,
+                   fvf_sizes,
+                   fix_offsets,
+                   seen,
+                   search_arrs)
+
+
 class FVFModel:
     """Model of a subject performing visual search tasks
     within the fixation-based framework proposed by Hulleman & Olivers 2017.
@@ -107,61 +398,79 @@ class FVFModel:
         self.prev_patch_memory = prev_patch_memory
         self.fixation_duration = fixation_duration
         self.quit_threshold = quit_threshold
-        self.fvf_vals = None  # set by self.run_trials function
+        self.fvf_vals = None  # set by self.run_trial and self.run_trials functions
 
-    def _select_new_patch(self, search_arr, fix_locs):
+    def _select_new_patch(self, display_size, recent_patches, num_recent, rng):
         """helper function to select a new patch to fixate,
-        given a search array and a list of previous fixation locations
+        given the size of the search array and the patches kept in memory
 
         Parameters
         ----------
-        search_arr : np.ndarray
-        fix_locs : list
-            of previous fixation locations, i.e., patches. used when
-            selecting new patches. If newly drawn locations are in the
-            set of previous locations kept in memory, i.e. in
-            `fix_locs[-self.prev_patch_memory:]`, then that patch is
-            discarded and another patch is drawn randomly.
+        display_size : int
+            number of items in search array, i.e. number of possible patches
+        recent_patches : list
+            ring buffer of previous fixation locations, i.e., patches,
+            that are kept in memory. New patches are never drawn from the
+            patches in memory.
+        num_recent : int
+            number of elements in recent_patches that have been filled,
+            i.e., min(number of fixations so far, len(recent_patches))
+        rng : numpy.random.Generator
+            used to draw patch
 
         Returns
         -------
         fix_loc : int
             index of new fixation location, i.e. "patch"
+
+        Notes
+        -----
+        Draws uniformly from the patches that are not in memory, without
+        rejection: draws an index into the set of patches not in memory,
+        then shifts it past each patch in memory that comes before it.
+        Patches in memory are always distinct, because a patch in memory
+        is never drawn again.
         """
-        fix_loc = -1
-        while fix_loc == -1:
-            fix_loc_tmp = np.random.choice(np.arange(len(search_arr)))
-            if fix_loc_tmp not in fix_locs[-self.prev_patch_memory:]:
-                fix_loc = fix_loc_tmp
+        fix_loc = int(rng.integers(display_size - num_recent))
+        for recent_patch in sorted(recent_patches[:num_recent]):
+            if recent_patch <= fix_loc:
+                fix_loc += 1
         return fix_loc
 
-    def _get_fvf_size(self):
+    def _get_fvf_size(self, rng):
         """helper function to get size of functional visual field for
         a fixation.
 
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            used to draw size
+
         Returns
         -------
         fvf_size : int
             uniform draw from self.min_items to self.max_items inclusive,
-            using numpy.random.choice on self.fvf_vals
+            i.e. from the values in self.fvf_vals
         """
-        return np.random.choice(self.fvf_vals)  # uses uniform probability
+        return int(rng.integers(self.fvf_vals[0], self.fvf_vals[-1] + 1))  # uses uniform probability
 
-    def _fixate(self, search_arr, target, fix_loc, fvf_size, seen_arr):
+    def _fixate(self, search_arr, target_inds, fix_loc, fvf_size, seen_arr):
         """helper function that simulates fixation
 
         Parameters
         ----------
         search_arr : numpy.ndarray
-        target : int
+        target_inds : list
+            indices of elements in search_arr that are the target,
+            sorted in ascending order
         fix_loc : int
             index of fixation location, i.e. where it starts
         fvf_size : int
             size of functional field of view.
         seen_arr : numpy.ndarray
-            Elements in search_arr that are part of a fixation are
-            converted to True in this array. Used to determine whether
-            quit_threshold has been passed
+            boolean array. Elements in search_arr that are part of a
+            fixation are set to True in this array, in place.
+            Used to determine whether quit_threshold has been passed.
 
         Returns
         -------
@@ -170,9 +479,9 @@ class FVFModel:
         response : bool
             True if target in functional visual field that is found by
             "fixating" (indexing into search_arr). False otherwise.
-        seen_arr : numpy.ndarray
-            As in Parameters section above, but updated to reflect this
-            fixation.
+        num_newly_seen : int
+            number of elements in fvf that had not been seen before
+            this fixation.
 
         Notes
         -----
@@ -180,14 +489,17 @@ class FVFModel:
         fix_loc and ends at fix_loc + fvf_size. If this index goes beyond
         the end of the array, the fvf is simply truncated.
         """
-        fvf = search_arr[fix_loc:fix_loc + fvf_size]
-        seen_arr[fix_loc:fix_loc + fvf_size] = True
-        if target in fvf:
-            return fvf, True, seen_arr
-        else:
-            return fvf, False, seen_arr
+        fvf_stop = min(fix_loc + fvf_size, search_arr.shape[0])
+        fvf = search_arr[fix_loc:fvf_stop]
+        fvf_seen = seen_arr[fix_loc:fvf_stop]
+        num_newly_seen = (fvf_stop - fix_loc) - int(np.count_nonzero(fvf_seen))
+        fvf_seen[:] = True
+        # first target at or after fix_loc; target is in fvf if that target comes before fvf_stop
+        first_target = bisect_left(target_inds, fix_loc)
+        response = first_target < len(target_inds) and target_inds[first_target] < fvf_stop
+        return fvf, response, num_newly_seen
 
-    def run_trial(self, search_type, search_arr, target=1):
+    def run_trial(self, search_type, search_arr, target=1, record='full', rng=None):
         """run a single trial of visual search task
 
         Parameters
@@ -201,35 +513,72 @@ class FVFModel:
         target : int
             target that subject searches for in visual search task.
             Default is 1.
+        record : str
+            how much of the trial to record. One of {'summary', 'trace', 'full'}.
+            'summary' records only response, reaction_time and num_fixations,
+            'trace' also records fix_locs and fvf_sizes, and 'full' also records
+            seen_arr and fvf_per_fix. Fields not recorded are None.
+            Default is 'full'.
+        rng : numpy.random.Generator
+            random number generator used for all draws. Default is None,
+            in which case a generator is seeded from numpy's global random state,
+            so results are reproducible after numpy.random.seed.
+
+        Notes
+        -----
+        If prev_patch_memory is greater than or equal to the display size,
+        only the (display size - 1) most recent patches are kept in memory,
+        so that there is always at least one patch that can be fixated.
         """
         if search_type not in {'easy', 'medium', 'hard'}:
             raise ValueError('search_type must be one of: {\'easy\', \'medium\', \'hard\'}')
+        if record not in RECORD_LEVELS:
+            raise ValueError(f'record must be one of {RECORD_LEVELS}, but was: {record}')
+        if rng is None:
+            rng = global_rng()
         max_items = getattr(self.max_items_by_search_type, search_type)
         # set possible fvf_vals used when drawing fvf_size for each fixation
         self.fvf_vals = np.arange(self.min_items, max_items + 1)
 
+        display_size = search_arr.shape[0]
+        memory = min(self.prev_patch_memory, display_size - 1)
+        recent_patches = [-1] * memory  # ring buffer of patches in memory
+        target_inds = np.flatnonzero(search_arr == target).tolist()  # sorted, for bisect in _fixate
+
         responded = False
         reaction_time = 0
+        num_fixations = 0
         fix_locs = []  # locations of fixations
         fvf_sizes = []
         fvf_per_fix = []
-        seen_arr = np.zeros(search_arr.shape)
+        seen_arr = np.zeros(search_arr.shape, dtype=bool)
+        num_seen = 0
 
         while responded is False:
-            fix_loc = self._select_new_patch(search_arr, fix_locs)
-            fix_locs.append(fix_loc)
-            fvf_size = self._get_fvf_size()
-            fvf_sizes.append(fvf_size)
-            fvf, response, seen_arr = self._fixate(search_arr,
-                                                   target,
-                                                   fix_loc,
-                                                   fvf_size,
-                                                   seen_arr)
-            fvf_per_fix.append(fvf)
+            fix_loc = self._select_new_patch(display_size, recent_patches, min(num_fixations, memory), rng)
+            if memory > 0:
+                recent_patches[num_fixations % memory] = fix_loc
+            fvf_size = self._get_fvf_size(rng)
+            fvf, response, num_newly_seen = self._fixate(search_arr,
+                                                         target_inds,
+                                                         fix_loc,
+                                                         fvf_size,
+                                                         seen_arr)
+            if record != 'summary':
+                fix_locs.append(fix_loc)
+                fvf_sizes.append(fvf_size)
+                if record == 'full':
+                    fvf_per_fix.append(fvf)
+            num_fixations += 1
+            num_seen += num_newly_seen
             reaction_time += self.fixation_duration
-            if response or (np.sum(seen_arr) / seen_arr.shape > self.quit_threshold):
+            if response or (num_seen / display_size > self.quit_threshold):
                 responded = True
-            num_fixations = len(fix_locs)
+
+        if record == 'summary':
+            fix_locs = fvf_sizes = None
+        if record != 'full':
+            seen_arr = fvf_per_fix = None
         return Trial(response,
                      reaction_time,
                      seen_arr,
@@ -237,3 +586,143 @@ class FVFModel:
                      fix_locs,
                      fvf_sizes,
                      fvf_per_fix)
+
+    def run_trials(self, search_type, search_arrs, target=1, record='full', rng=None,
+                   common_random_numbers=False):
+        """run a batch of trials of visual search task at once
+
+        All trials are simulated in "lockstep": on each step, every
+        trial that has not yet responded makes one fixation, using
+        vectorized draws for patches and fvf sizes, until every trial
+        has responded. Statistically equivalent to calling
+        ``run_trial`` once for each row of ``search_arrs``.
+
+        Parameters
+        ----------
+        search_type : str
+            One of {'easy', 'medium', 'hard'}. Used to determine
+            maximum number of items in functional visual field.
+        search_arrs : numpy.ndarray
+            2-d array with shape (number of trials, display size).
+            Each row represents the visual search stimulus for one trial.
+        target : int
+            target that subject searches for in visual search task.
+            Default is 1.
+        record : str
+            how much of each trial to record. One of {'summary', 'trace', 'full'};
+            see run_trial. Default is 'full'.
+        rng : numpy.random.Generator
+            random number generator used for all draws. Default is None,
+            in which case a generator is seeded from numpy's global random state,
+            so results are reproducible after numpy.random.seed.
+        common_random_numbers : bool
+            if True, draw random numbers for every trial on every step, including
+            trials that have already responded, so that the i-th trial always
+            uses the same random numbers from rng, whatever happens in other trials.
+            Batches run with the same seed then share random numbers trial by trial,
+            e.g. across display sizes or parameter values. Default is False.
+
+        Returns
+        -------
+        trials : TrialBatch
+            with one trial for each row in search_arrs.
+
+        Notes
+        -----
+        If prev_patch_memory is greater than or equal to the display size,
+        only the (display size - 1) most recent patches are kept in memory,
+        so that there is always at least one patch that can be fixated.
+        """
+        if search_type not in {'easy', 'medium', 'hard'}:
+            raise ValueError('search_type must be one of: {\'easy\', \'medium\', \'hard\'}')
+        if record not in RECORD_LEVELS:
+            raise ValueError(f'record must be one of {RECORD_LEVELS}, but was: {record}')
+        if rng is None:
+            rng = global_rng()
+        max_items = getattr(self.max_items_by_search_type, search_type)
+        self.fvf_vals = np.arange(self.min_items, max_items + 1)
+
+        search_arrs = np.asarray(search_arrs)
+        if search_arrs.ndim != 2:
+            raise ValueError('search_arrs must be a 2-d array with shape (number of trials, display size)')
+        num_trials, display_size = search_arrs.shape
+        memory = min(self.prev_patch_memory, display_size - 1)
+
+        # cumulative count of targets, so "is target in fvf" is a difference of two lookups
+        target_cumsum = np.zeros((num_trials, display_size + 1), dtype=np.int64)
+        np.cumsum(search_arrs == target, axis=1, out=target_cumsum[:, 1:])
+        cols = np.arange(display_size)
+
+        seen = np.zeros((num_trials, display_size), dtype=bool)
+        response = np.zeros((num_trials,), dtype=bool)
+        num_fixations = np.zeros((num_trials,), dtype=np.int64)
+        # ring buffer of most recent patches; -1 means "no patch yet"
+        recent = np.full((num_trials, max(memory, 1)), -1, dtype=np.int64)
+
+        trial_inds_per_step = []
+        fix_locs_per_step = []
+        fvf_sizes_per_step = []
+
+        active = np.arange(num_trials)
+        step = 0
+        while active.size > 0:
+            n_active = active.size
+
+            allowed = np.ones((n_active, display_size), dtype=bool)
+            if memory > 0:
+                recent_active = recent[active]
+                in_memory = recent_active >= 0
+                allowed[np.nonzero(in_memory)[0], recent_active[in_memory]] = False
+            num_allowed = allowed.sum(axis=1)
+            if common_random_numbers:
+                patch_rand = rng.random(num_trials)[active]
+                size_rand = rng.random(num_trials)[active]
+            else:
+                patch_rand = rng.random(n_active)
+                size_rand = rng.random(n_active)
+            # draw uniformly from patches not in memory, without rejection
+            draw = (patch_rand * num_allowed).astype(np.int64)
+            fix_loc = np.argmax(np.cumsum(allowed, axis=1) > draw[:, np.newaxis], axis=1)
+            if memory > 0:
+                recent[active, step % memory] = fix_loc
+
+            fvf_size = self.min_items + (size_rand * (max_items - self.min_items + 1)).astype(np.int64)
+            fvf_stop = np.minimum(fix_loc + fvf_size, display_size)
+
+            seen[active] |= (cols >= fix_loc[:, np.newaxis]) & (cols < fvf_stop[:, np.newaxis])
+            found = target_cumsum[active, fvf_stop] > target_cumsum[active, fix_loc]
+
+            if record != 'summary':
+                trial_inds_per_step.append(active)
+                fix_locs_per_step.append(fix_loc)
+                fvf_sizes_per_step.append(fvf_size)
+            num_fixations[active] += 1
+
+            quit_search = seen[active].sum(axis=1) / display_size > self.quit_threshold
+            done = found | quit_search
+            response[active[done]] = found[done]
+            active = active[~done]
+            step += 1
+
+        reaction_time = num_fixations * self.fixation_duration
+
+        if record == 'summary':
+            return TrialBatch(response, reaction_time, num_fixations, display_size)
+
+        # group fixations by trial, keeping them in the order they were made
+        trial_inds = np.concatenate(trial_inds_per_step)
+        order = np.argsort(trial_inds, kind='stable')
+        fix_offsets = np.zeros((num_trials + 1,), dtype=np.int64)
+        np.cumsum(num_fixations, out=fix_offsets[1:])
+        if record == 'trace':
+            seen = search_arrs = None
+
+        return TrialBatch(response,
+                          reaction_time,
+                          num_fixations,
+                          display_size,
+                          fix_locs=np.concatenate(fix_locs_per_step)[order],
+                          fvf_sizes=np.concatenate(fvf_sizes_per_step)[order],
+                          fix_offsets=fix_offsets,
+                          seen=seen,
+                          search_arrs=search_arrs)
@@ -1,25 +1,151 @@
-import json
-from distutils.util import strtobool
+from concurrent.futures import ProcessPoolExecutor
 from typing import NamedTuple
 
 import numpy as np
 from scipy import stats
 
+from .accumulate import ConditionAccumulator, RT_BIN_EDGES
+from .results import Results, load as load_results
 
-def fixations(results_pkl):
-    """munge fixation data from a results.pickle file
+
+class FixationResults(NamedTuple):
+    """NamedTuple that represents results of analyzing fixation traces
+    from running simulation with FVF framework; returned by fvf.munge.fixations.
+
+    Fields
+    ------
+    conditions: list
+        Each condition, a (search type, display size, target present) tuple. List of tuples.
+    fix_loc_counts: dict
+        Histogram of fixation locations by condition. Dict where key is one condition, and
+        the corresponding value is a numpy array with display size elements, where
+        element i is the number of fixations at location i.
+    fvf_size_counts: dict
+        Distribution of functional visual field sizes by condition. Dict where key is one
+        condition, and value is a numpy array where element i is the number of fixations
+        with an fvf of size i.
+    revisit_rates: dict
+        Proportion of fixations that revisit a location already fixated
+        in the same trial, by condition.
+    revisit_lag_counts: dict
+        Histogram of lags of revisits by condition. Dict where key is one condition, and
+        value is a numpy array where element i is the number of revisits to a location
+        last fixated i fixations earlier. Since the model does not revisit patches in memory,
+        counts for lags up to prev_patch_memory are 0.
+    mean_coverage_by_fixation: dict
+        Coverage v. fixation number by condition. Dict where key is one condition, and value
+        is a numpy array where element k is the mean proportion of the search array seen
+        after fixation k + 1, over trials that made at least k + 1 fixations.
+    num_trials_by_fixation: dict
+        Number of trials that made at least k + 1 fixations, by condition;
+        the number of trials averaged for each element of mean_coverage_by_fixation.
+    """
+    conditions: list
+    fix_loc_counts: dict
+    fvf_size_counts: dict
+    revisit_rates: dict
+    revisit_lag_counts: dict
+    mean_coverage_by_fixation: dict
+    num_trials_by_fixation: dict
+
+
+def _add_counts(total, counts):
+    """add counts to total, extending whichever is shorter with zeros"""
+    if counts.shape[0] > total.shape[0]:
+        total, counts = counts, total
+    total = total.copy()
+    total[:counts.shape[0]] += counts
+    return total
+
+
+def fixations(results, chunk_size=10000):
+    """munge fixation traces into histograms of fixation locations and fvf sizes,
+    revisit rates, and coverage v. fixation number, for each condition
+
+    Streams over results one chunk of trials at a time, so memory used
+    depends on chunk_size, not on the size of results.
 
     Parameters
     ----------
-    results_pkl : str
-        path to a results.pickle file
+    results : str, fvf.results.Results
+        path to a directory of results in columnar format, created by running fvf.main
+        with --record trace or --record full, or results loaded with fvf.results.load
+    chunk_size : int
+        number of trials analyzed at once. Default is 10000.
 
     Returns
     -------
-    FixationResults : NamedTuple
-
+    fixation_results : FixationResults
     """
-    return fixation_results
+    if isinstance(results, str):
+        results = load_results(results)
+    if results.record == 'summary':
+        raise ValueError("fixations requires traces, but results only have summaries; "
+                         "run simulation with record='trace' or record='full'")
+
+    fix_loc_counts = {}
+    fvf_size_counts = {}
+    revisit_rates = {}
+    revisit_lag_counts = {}
+    mean_coverage_by_fixation = {}
+    num_trials_by_fixation = {}
+    for code, condition in enumerate(results.conditions):
+        display_size = condition[1]
+        cols = np.arange(display_size)
+        loc_counts = np.zeros((display_size,), dtype=np.int64)
+        size_counts = np.zeros((0,), dtype=np.int64)
+        lag_counts = np.zeros((0,), dtype=np.int64)
+        coverage_sums = np.zeros((0,), dtype=np.float64)
+        trial_counts = np.zeros((0,), dtype=np.int64)
+        num_fixations = 0
+
+        condition_start, condition_stop = results.condition_offsets[code], results.condition_offsets[code + 1]
+        for start in range(condition_start, condition_stop, chunk_size):
+            stop = min(start + chunk_size, condition_stop)
+            offsets = np.asarray(results.fix_offsets[start:stop + 1])
+            fix_locs = np.asarray(results.fix_locs[offsets[0]:offsets[-1]], dtype=np.intp)
+            fvf_sizes = np.asarray(results.fvf_sizes[offsets[0]:offsets[-1]], dtype=np.intp)
+            trial_starts = offsets[:-1] - offsets[0]
+            trial_num_fixations = np.diff(offsets)
+            num_fixations += fix_locs.shape[0]
+            loc_counts += np.bincount(fix_locs, minlength=display_size)
+            size_counts = _add_counts(size_counts, np.bincount(fvf_sizes))
+
+            # replay fixations of all trials in chunk in lockstep, as in FVFModel.run_trials
+            num_trials = stop - start
+            max_fixations = int(trial_num_fixations.max()) if num_trials else 0
+            seen = np.zeros((num_trials, display_size), dtype=bool)
+            last_fixated = np.full((num_trials, display_size), -1, dtype=np.int64)
+            chunk_coverage_sums = np.zeros((max_fixations,), dtype=np.float64)
+            chunk_trial_counts = np.zeros((max_fixations,), dtype=np.int64)
+            for step in range(max_fixations):
+                active = np.flatnonzero(trial_num_fixations > step)
+                fix_loc = fix_locs[trial_starts[active] + step]
+                fvf_stop = np.minimum(fix_loc + fvf_sizes[trial_starts[active] + step], display_size)
+                previous = last_fixated[active, fix_loc]
+                is_revisit = previous >= 0
+                lag_counts = _add_counts(lag_counts, np.bincount(step - previous[is_revisit]))
+                last_fixated[active, fix_loc] = step
+                seen[active] |= (cols >= fix_loc[:, np.newaxis]) & (cols < fvf_stop[:, np.newaxis])
+                chunk_coverage_sums[step] = seen[active].sum() / display_size
+                chunk_trial_counts[step] = active.shape[0]
+            coverage_sums = _add_counts(coverage_sums, chunk_coverage_sums)
+            trial_counts = _add_counts(trial_counts, chunk_trial_counts)
+
+        fix_loc_counts[condition] = loc_counts
+        fvf_size_counts[condition] = size_counts
+        revisit_lag_counts[condition] = lag_counts
+        revisit_rates[condition] = lag_counts.sum() / num_fixations if num_fixations else np.nan
+        mean_coverage_by_fixation[condition] = coverage_sums / trial_counts
+        num_trials_by_fixation[condition] = trial_counts
+
+    return FixationResults(list(results.conditions),
+                           fix_loc_counts,
+                           fvf_size_counts,
+                           revisit_rates,
+                           revisit_lag_counts,
+                           mean_coverage_by_fixation,
+                           num_trials_by_fixation)
 
 
 class RTResults(NamedTuple):
@@ -61,6 +187,17 @@ class RTResults(NamedTuple):
     std_RTs_all_display_sizes: dict
         Standard deviation of reaction times for each search type, target present or absent,
         for all display sizes.
+    RT_counts_by_condition: dict
+        Histogram of reaction times by condition, with bins fvf.accumulate.RT_BIN_EDGES.
+        Only set when made from accumulators, otherwise None.
+    mean_RTs_CI_by_condition: dict
+        Bootstrap confidence interval on mean reaction time by condition. Dict where key
+        is one condition, and the corresponding value is a ConfidenceInterval.
+        Only set if num_bootstrap was passed to fvf.munge.reaction_times, otherwise None.
+    mean_RTs_regress_CIs: dict
+        Bootstrap confidence intervals on slope and intercept of each regression in
+        mean_RTs_regress_results. Dict with the same keys, where each value is a RegressCIs.
+        Only set if num_bootstrap was passed to fvf.munge.reaction_times, otherwise None.
     """
     search_types: tuple
     display_sizes: tuple
@@ -72,6 +209,9 @@ class RTResults(NamedTuple):
     mean_RTs_all_display_sizes: dict
     mean_RTs_regress_results: dict
     std_RTs_all_display_sizes: dict
+    RT_counts_by_condition: dict = None
+    mean_RTs_CI_by_condition: dict = None
+    mean_RTs_regress_CIs: dict = None
 
 
 class LinRegressResults(NamedTuple):
@@ -98,15 +238,182 @@ class LinRegressResults(NamedTuple):
     std_err: float
 
 
-def reaction_times(rt_json, responses_json):
-    """munge results from a reaction_times.json file into format for plotting
+class ConfidenceInterval(NamedTuple):
+    """NamedTuple that represents a bootstrap (percentile) confidence interval
+
+    Fields
+    ------
+    low : float
+        lower bound of interval
+    high : float
+        upper bound of interval
+    """
+    low: float
+    high: float
+
+
+class RegressCIs(NamedTuple):
+    """NamedTuple that represents bootstrap confidence intervals
+    on the parameters of a linear regression
+
+    Fields
+    ------
+    slope : ConfidenceInterval
+        interval on slope of the regression line, e.g. in ms/item
+    intercept : ConfidenceInterval
+        interval on intercept of the regression line
+    """
+    slope: ConfidenceInterval
+    intercept: ConfidenceInterval
+
+
+class ConditionSummary(NamedTuple):
+    """NamedTuple that represents summaries of each condition in results,
+    computed once by fvf.munge.summarize, and used to make
+    RTResults and NumFixationsResults.
+
+    Fields
+    ------
+    conditions: list
+        Each condition, a (search type, display size, target present) tuple,
+        in order of condition codes. List of tuples.
+    condition: numpy.ndarray
+        condition code of each trial, i.e. index into conditions
+    response: numpy.ndarray
+        response of each trial
+    reaction_time: numpy.ndarray
+        reaction time of each trial
+    num_fixations: numpy.ndarray
+        number of fixations of each trial
+    num_trials: numpy.ndarray
+        number of trials in each condition
+    mean_RT: numpy.ndarray
+        mean reaction time of correct trials in each condition
+    std_RT: numpy.ndarray
+        standard deviation of reaction times of correct trials in each condition
+    error_rate: numpy.ndarray
+        proportion of trials with incorrect response in each condition
+    mean_num_fixations: numpy.ndarray
+        mean number of fixations of all trials in each condition
+    std_num_fixations: numpy.ndarray
+        standard deviation of number of fixations of all trials in each condition
+    """
+    conditions: list
+    condition: np.ndarray
+    response: np.ndarray
+    reaction_time: np.ndarray
+    num_fixations: np.ndarray
+    num_trials: np.ndarray
+    mean_RT: np.ndarray
+    std_RT: np.ndarray
+    error_rate: np.ndarray
+    mean_num_fixations: np.ndarray
+    std_num_fixations: np.ndarray
+
+    def by_condition(self, column):
+        """split a per-trial column into a dict that maps each condition to its trials"""
+        values = getattr(self, column)
+        if np.any(np.diff(self.condition) < 0):
+            values = values[np.argsort(self.condition, kind='stable')]
+        # else trials are already grouped by condition, as they are in results directories,
+        # and every condition's trials are a view
+        split_inds = np.cumsum(self.num_trials)[:-1]
+        return dict(zip(self.conditions, np.split(values, split_inds)))
+
+
+def _group_mean_std(values, codes, num_groups):
+    """mean and standard deviation (as computed by numpy.std) of values in each group,
+    with one pass of numpy.bincount for means and one for squared deviations.
+    Groups with no values have mean and standard deviation of NaN"""
+    counts = np.bincount(codes, minlength=num_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(codes, weights=values, minlength=num_groups) / counts
+        squared_deviations = (values - means[codes]) ** 2
+        stds = np.sqrt(np.bincount(codes, weights=squared_deviations, minlength=num_groups) / counts)
+    return means, stds
+
+
+def summarize(results):
+    """load results once, and summarize every condition with vectorized group-by reductions
+
+    Parameters
+    ----------
+    results : str, fvf.results.Results, dict
+        path to a directory of results in columnar format, created by running fvf.main
+        or by fvf.results.save; results loaded with fvf.results.load; or a dict that
+        maps conditions to TrialBatch, as returned by Simulator.runall
+
+    Returns
+    -------
+    condition_summary : ConditionSummary
+    """
+    if isinstance(results, str):
+        results = load_results(results)
+    if isinstance(results, Results):
+        conditions = list(results.conditions)
+        codes = np.asarray(results.condition, dtype=np.intp)
+        response = np.asarray(results.response)
+        reaction_time = np.asarray(results.reaction_time)
+        num_fixations = np.asarray(results.num_fixations)
+    else:
+        conditions = list(results.keys())
+        batches = list(results.values())
+        codes = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+        response = np.concatenate([batch.response for batch in batches])
+        reaction_time = np.concatenate([batch.reaction_time for batch in batches])
+        num_fixations = np.concatenate([batch.num_fixations for batch in batches])
+
+    num_conditions = len(conditions)
+    target_present = np.array([condition[2] for condition in conditions], dtype=bool)
+    num_trials = np.bincount(codes, minlength=num_conditions)
+    # keep only correct trials for reaction times, as in Young Hulleman 2013
+    correct = response == target_present[codes]
+    mean_RT, std_RT = _group_mean_std(reaction_time[correct].astype(np.float64), codes[correct], num_conditions)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        error_rate = 1 - np.bincount(codes[correct], minlength=num_conditions) / num_trials
+    mean_num_fixations, std_num_fixations = _group_mean_std(num_fixations.astype(np.float64), codes,
+                                                            num_conditions)
+    return ConditionSummary(conditions, codes, response, reaction_time, num_fixations, num_trials,
+                            mean_RT, std_RT, error_rate, mean_num_fixations, std_num_fixations)
+
+
+def _is_accumulators(results):
+    """True if results is a dict that maps conditions to ConditionAccumulator,
+    as returned by Simulator.runall(accumulate=True)"""
+    return (isinstance(results, dict) and len(results) > 0
+            and all(isinstance(value, ConditionAccumulator) for value in results.values()))
+
+
+def reaction_times(results, num_bootstrap=None, confidence=0.95, rng=None, workers=None):
+    """munge reaction times from results into format for plotting
 
     Parameters
     ----------
-    rt_json : str
-        path to a reaction_times.json file created by running fvf.main
-    responses_json : str
-        path to a responses.json file saved created running fvf.main
+    results : str, fvf.results.Results, dict, ConditionSummary
+        path to a directory of results in columnar format, created by running fvf.main
+        or by fvf.results.save, or anything else accepted by fvf.munge.summarize.
+        Results saved by older versions can be converted with fvf.results.convert.
+        To make both RTResults and NumFixationsResults from the same results
+        without loading them twice, pass the ConditionSummary returned by summarize.
+        Can also be a dict that maps conditions to fvf.accumulate.ConditionAccumulator,
+        as returned by Simulator.runall(accumulate=True); then RTs_by_condition
+        is None, since reaction times of single trials were not kept, and
+        RT_counts_by_condition has histograms of reaction times instead.
+    num_bootstrap : int
+        if specified, compute bootstrap confidence intervals on the mean reaction time
+        of each condition, and on the slopes and intercepts in mean_RTs_regress_results,
+        from this many resamples of the correct trials in each condition. Default is None,
+        in which case mean_RTs_CI_by_condition and mean_RTs_regress_CIs are None.
+        Not possible when results are accumulators.
+    confidence : float
+        confidence level of bootstrap intervals. Default is 0.95.
+    rng : numpy.random.Generator
+        used to draw resamples. Default is None, in which case a new generator
+        is created with numpy.random.default_rng.
+    workers : int
+        number of worker processes that resample conditions. Default is None,
+        in which case all resampling is done in this process.
+        Intervals do not depend on the number of workers.
 
     Returns
     -------
@@ -145,73 +452,239 @@ def reaction_times(rt_json, responses_json):
             std_RTs_all_display_sizes: dict
                 Standard deviation of reaction times for each search type, target present or absent,
                 for all display sizes.
+            RT_counts_by_condition: dict
+                Histogram of reaction times by condition, with bins fvf.accumulate.RT_BIN_EDGES.
+                Only set when made from accumulators, otherwise None.
+            mean_RTs_CI_by_condition: dict
+                Bootstrap ConfidenceInterval on mean reaction time by condition.
+                Only set if num_bootstrap is specified, otherwise None.
+            mean_RTs_regress_CIs: dict
+                Bootstrap RegressCIs on slope and intercept of each regression in
+                mean_RTs_regress_results. Only set if num_bootstrap is specified, otherwise None.
+    """
+    if _is_accumulators(results):
+        if num_bootstrap:
+            raise ValueError('bootstrap intervals need reaction times of single trials, '
+                             'which accumulators do not keep')
+        return _rt_results(None,
+                           {condition: acc.mean_RT for condition, acc in results.items()},
+                           {condition: acc.std_RT for condition, acc in results.items()},
+                           {condition: acc.RT_counts for condition, acc in results.items()})
+    if not isinstance(results, ConditionSummary):
+        results = summarize(results)
+    RTs_by_condition = results.by_condition('reaction_time')
+    rt_results = _rt_results(RTs_by_condition,
+                             dict(zip(results.conditions, results.mean_RT)),
+                             dict(zip(results.conditions, results.std_RT)))
+    if num_bootstrap:
+        responses_by_condition = results.by_condition('response')
+        correct_RTs_by_condition = {
+            condition: RTs[responses_by_condition[condition] == condition[2]]
+            for condition, RTs in RTs_by_condition.items()
+        }
+        rt_results = rt_results._replace(
+            **_bootstrap_cis(correct_RTs_by_condition, rt_results.search_types, rt_results.display_sizes,
+                             rt_results.target_present, num_bootstrap, confidence, rng, workers)
+        )
+    return rt_results
+
+
+def reaction_time_distribs(results):
+    """histograms of reaction times for every condition, normalized by number of trials,
+    with bins fvf.accumulate.RT_BIN_EDGES, as plotted by fvf.plot.reaction_times_distrib
+
+    Parameters
+    ----------
+    results : str, fvf.results.Results, dict, ConditionSummary
+        anything accepted by fvf.munge.reaction_times, including accumulators
+
+    Returns
+    -------
+    RT_freqs_by_condition : dict
+        that maps each condition to a numpy array with one element per bin,
+        the proportion of all trials with a reaction time in that bin.
+        Reaction times outside the bins are not counted, as for numpy.histogram.
     """
-    with open(rt_json) as fp:
-        RTs = json.load(fp)
-
-    with open(responses_json) as fp:
-        responses = json.load(fp)
-
-    search_types = []
-    display_sizes = []
-    target_present = []
-    conditions = []
-    RTs_by_condition = {}
-    mean_RTs_by_condition = {}
-    std_RTs_by_condition = {}
-    for key, val in RTs.items():
-        # convert text key back into Python types
-        split_key = key.split(',')
-        search_type = split_key[0]
-        display_size = int(split_key[1])
-        is_target_present = bool(strtobool(split_key[2].strip()))
-
-        # add to conditions that will be returned
-        search_types.append(search_type)
-        display_sizes.append(display_size)
-        target_present.append(is_target_present)
-
-        tup_key = tuple([search_type, display_size, is_target_present])
-        conditions.append(tup_key)
-        rt_arr = np.asarray(val)
-        RTs_by_condition[tup_key] = rt_arr
-
-        # keep only correct trials, as in Young Hulleman 2013
-        response_arr = np.asarray(responses[key])
-        RTs_to_use = np.equal(response_arr, is_target_present)
-        mean_RTs_by_condition[tup_key] = np.mean(rt_arr[RTs_to_use])
-        std_RTs_by_condition[tup_key] = np.std(rt_arr[RTs_to_use])
-
-    search_types = tuple((set(search_types)))
+    if _is_accumulators(results):
+        return {condition: acc.RT_counts / acc.num_trials for condition, acc in results.items()}
+    if not isinstance(results, ConditionSummary):
+        results = summarize(results)
+    num_conditions = len(results.conditions)
+    num_bins = RT_BIN_EDGES.shape[0] - 1
+    # histograms of all conditions with one pass of numpy.bincount. As for numpy.histogram,
+    # bins are half-open except the last, which includes its right edge
+    bin_inds = np.searchsorted(RT_BIN_EDGES, results.reaction_time, side='right') - 1
+    bin_inds[results.reaction_time == RT_BIN_EDGES[-1]] = num_bins - 1
+    in_bins = (bin_inds >= 0) & (bin_inds < num_bins)
+    counts = np.bincount(np.asarray(results.condition, dtype=np.intp)[in_bins] * num_bins + bin_inds[in_bins],
+                         minlength=num_conditions * num_bins).reshape(num_conditions, num_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        freqs = counts / results.num_trials[:, np.newaxis]
+    return dict(zip(results.conditions, freqs))
+
+
+def _bootstrap_means(values, num_bootstrap, seed_seq, max_elements=2 ** 23):
+    """means of num_bootstrap resamples of values, with replacement.
+    Each batch of resamples is one (bootstrap x values) matrix of indices, drawn at once;
+    batches keep the matrix under max_elements. Module-level so it can run in a process pool"""
+    values = np.asarray(values, dtype=np.float64)
+    num_values = values.shape[0]
+    if num_values == 0:
+        return np.full((num_bootstrap,), np.nan)
+    rng = np.random.default_rng(seed_seq)
+    means = np.empty((num_bootstrap,))
+    batch_size = max(1, max_elements // num_values)
+    for start in range(0, num_bootstrap, batch_size):
+        stop = min(start + batch_size, num_bootstrap)
+        inds = rng.integers(0, num_values, size=(stop - start, num_values))
+        means[start:stop] = values[inds].mean(axis=1)
+    return means
+
+
+def _percentile_ci(samples, confidence):
+    """percentile confidence interval from bootstrap samples along the last axis"""
+    alpha = 1 - confidence
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2], axis=-1)
+    return low, high
+
+
+def _bootstrap_cis(values_by_condition, search_types, display_sizes, target_present,
+                   num_bootstrap, confidence=0.95, rng=None, workers=None):
+    """bootstrap confidence intervals on the mean of each condition, and on slopes and
+    intercepts of means v. display size. Each condition is resampled independently,
+    so a bootstrap sample of a regression is the regression of bootstrap means.
+
+    Returns
+    -------
+    cis : dict
+        with keys mean_RTs_CI_by_condition and mean_RTs_regress_CIs,
+        to replace fields of RTResults
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    conditions = list(values_by_condition.keys())
+    # one stream per condition, so intervals do not depend on the number of workers
+    seed_seqs = np.random.SeedSequence(int(rng.integers(2 ** 63))).spawn(len(conditions))
+    args = ([values_by_condition[condition] for condition in conditions],
+            [num_bootstrap] * len(conditions),
+            seed_seqs)
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            boot_means = list(executor.map(_bootstrap_means, *args))
+    else:
+        boot_means = list(map(_bootstrap_means, *args))
+
+    mean_low, mean_high = _percentile_ci(np.stack(boot_means), confidence)
+    mean_RTs_CI_by_condition = {
+        condition: ConfidenceInterval(float(low), float(high))
+        for condition, low, high in zip(conditions, mean_low, mean_high)
+    }
+
+    # bootstrap means arranged with shape (search types, target present, bootstraps, display sizes)
+    grid = np.full((len(search_types), len(target_present), num_bootstrap, len(display_sizes)), np.nan)
+    for condition, means in zip(conditions, boot_means):
+        grid[search_types.index(condition[0]),
+             target_present.index(condition[2]),
+             :,
+             display_sizes.index(condition[1])] = means
+    slope, intercept, _, _, _ = _linregress(display_sizes, grid)
+    slope_low, slope_high = _percentile_ci(slope, confidence)
+    intercept_low, intercept_high = _percentile_ci(intercept, confidence)
+    mean_RTs_regress_CIs = {}
+    for search_type_ind, search_type in enumerate(search_types):
+        for target_present_ind, is_target_present in enumerate(target_present):
+            ind = (search_type_ind, target_present_ind)
+            mean_RTs_regress_CIs[(search_type, is_target_present)] = RegressCIs(
+                ConfidenceInterval(float(slope_low[ind]), float(slope_high[ind])),
+                ConfidenceInterval(float(intercept_low[ind]), float(intercept_high[ind])),
+            )
+    return {'mean_RTs_CI_by_condition': mean_RTs_CI_by_condition,
+            'mean_RTs_regress_CIs': mean_RTs_regress_CIs}
+
+
+def _unique_conditions(by_condition):
+    """get unique search types, display sizes, and target present conditions,
+    plus list of all conditions, from the keys of a dict
+    where each key is a condition tuple"""
+    conditions = list(by_condition.keys())
+    search_types = tuple(set([condition[0] for condition in conditions]))
     display_sizes = tuple(
         sorted(  # sorted, so display_sizes is in ascending numerical order
-            set(display_sizes)
+            set([condition[1] for condition in conditions])
         ))
-    target_present = tuple(set(target_present))
+    target_present = tuple(set([condition[2] for condition in conditions]))
+    return search_types, display_sizes, target_present, conditions
+
+
+def _condition_grid(by_condition, search_types, display_sizes, target_present):
+    """arrange values from a dict that maps conditions to values into an array
+    with shape (search types, target present, display sizes); missing conditions are NaN"""
+    grid = np.full((len(search_types), len(target_present), len(display_sizes)), np.nan)
+    conditions = list(by_condition.keys())
+    search_type_inds = [search_types.index(condition[0]) for condition in conditions]
+    target_present_inds = [target_present.index(condition[2]) for condition in conditions]
+    display_size_inds = np.searchsorted(display_sizes, [condition[1] for condition in conditions])
+    grid[search_type_inds, target_present_inds, display_size_inds] = list(by_condition.values())
+    return grid
+
+
+def _linregress(x, y):
+    """linear regression of each row of y on x, vectorized over rows.
+    Gives the same values as scipy.stats.linregress on each row.
+
+    Returns
+    -------
+    slope, intercept, r_value, p_value, std_err : numpy.ndarray
+        each with shape y.shape[:-1]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[0]
+    x_mean = x.mean()
+    y_mean = y.mean(axis=-1)
+    x_dev = x - x_mean
+    y_dev = y - y_mean[..., np.newaxis]
+    ssxm = np.mean(x_dev ** 2)
+    ssym = np.mean(y_dev ** 2, axis=-1)
+    ssxym = np.mean(x_dev * y_dev, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r_value = np.clip(ssxym / np.sqrt(ssxm * ssym), -1.0, 1.0)
+        r_value = np.where(ssym == 0.0, np.where(ssxym == 0.0, np.nan, 0.0), r_value)
+        slope = ssxym / ssxm
+        intercept = y_mean - slope * x_mean
+        if n == 2:
+            p_value = np.where(y[..., 0] == y[..., 1], 1.0, 0.0)
+            std_err = np.zeros_like(slope)
+        else:
+            df = n - 2
+            tiny = 1.0e-20
+            t = r_value * np.sqrt(df / ((1.0 - r_value + tiny) * (1.0 + r_value + tiny)))
+            p_value = 2 * stats.t.sf(np.abs(t), df)
+            std_err = np.sqrt((1 - r_value ** 2) * ssym / ssxm / df)
+    return slope, intercept, r_value, p_value, std_err
+
+
+def _rt_results(RTs_by_condition, mean_RTs_by_condition, std_RTs_by_condition, RT_counts_by_condition=None):
+    """helper function that makes an instance of RTResults from
+    reaction times, mean reaction times, and standard deviations by condition,
+    by computing results across display sizes"""
+    search_types, display_sizes, target_present, conditions = _unique_conditions(mean_RTs_by_condition)
+
+    mean_grid = _condition_grid(mean_RTs_by_condition, search_types, display_sizes, target_present)
+    std_grid = _condition_grid(std_RTs_by_condition, search_types, display_sizes, target_present)
+    # regressions of mean RT v. display size, for all (search type, target present) at once
+    regress_grids = _linregress(display_sizes, mean_grid)
 
     mean_RTs_all_display_sizes = {}
     mean_RTs_regress_results = {}
     std_RTs_all_display_sizes = {}
-    # even more munging
-    for search_type in search_types:
-        for is_target_present in target_present:
-            mean_RT_vals = []
-            std_RT_vals = []
-            for display_size in display_sizes:
-                condition_tup = tuple([search_type, display_size, is_target_present])
-                mean_val = mean_RTs_by_condition[condition_tup]
-                mean_RT_vals.append(mean_val)
-                std_val = std_RTs_by_condition[condition_tup]
-                std_RT_vals.append(std_val)
+    for search_type_ind, search_type in enumerate(search_types):
+        for target_present_ind, is_target_present in enumerate(target_present):
             key = tuple([search_type, is_target_present])
-            mean_RT_vals = np.asarray(mean_RT_vals)
-            mean_RTs_all_display_sizes[key] = mean_RT_vals
-            slope, intercept, r_value, p_value, std_err = stats.linregress(display_sizes,
-                                                                           mean_RT_vals)
-            regress_result = LinRegressResults(slope, intercept, r_value, p_value, std_err)
-            mean_RTs_regress_results[key] = regress_result
-            std_RT_vals = np.asarray(std_RT_vals)
-            std_RTs_all_display_sizes[key] = std_RT_vals
+            mean_RTs_all_display_sizes[key] = mean_grid[search_type_ind, target_present_ind]
+            std_RTs_all_display_sizes[key] = std_grid[search_type_ind, target_present_ind]
+            mean_RTs_regress_results[key] = LinRegressResults(
+                *(float(regress_grid[search_type_ind, target_present_ind]) for regress_grid in regress_grids)
+            )
 
     return RTResults(search_types,
                      display_sizes,
@@ -222,7 +695,8 @@ def reaction_times(rt_json, responses_json):
                      std_RTs_by_condition,
                      mean_RTs_all_display_sizes,
                      mean_RTs_regress_results,
-                     std_RTs_all_display_sizes)
+                     std_RTs_all_display_sizes,
+                     RT_counts_by_condition)
 
 
 class NumFixationsResults(NamedTuple):
@@ -269,13 +743,19 @@ class NumFixationsResults(NamedTuple):
     mean_num_fixations_all_display_sizes: dict
 
 
-def num_fixations(nf_json):
-    """munge results from a num_fixations.json file into format for plotting
+def num_fixations(results):
+    """munge number of fixations from results into format for plotting
 
     Parameters
     ----------
-    nf_json : str
-
+    results : str, fvf.results.Results, dict, ConditionSummary
+        path to a directory of results in columnar format, created by running fvf.main
+        or by fvf.results.save, or anything else accepted by fvf.munge.summarize.
+        To make both RTResults and NumFixationsResults from the same results
+        without loading them twice, pass the ConditionSummary returned by summarize.
+        Can also be a dict that maps conditions to fvf.accumulate.ConditionAccumulator,
+        as returned by Simulator.runall(accumulate=True); then num_fixations_by_condition
+        is None, since numbers of fixations of single trials were not kept.
 
     Returns
     -------
@@ -309,55 +789,31 @@ def num_fixations(nf_json):
                 and the corresponding value is a numpy array of mean number of fixations, with each
                 element corresponding to one display size from display_sizes.
     """
-    with open(nf_json) as fp:
-        num_fix = json.load(fp)
-
-    search_types = []
-    display_sizes = []
-    target_present = []
-    conditions = []
-    num_fixations_by_condition = {}
-    mean_num_fixations_by_condition = {}
-    std_num_fixations_by_condition = {}
-    for key, val in num_fix.items():
-        # convert text key back into Python types
-        split_key = key.split(',')
-        search_type = split_key[0]
-        display_size = int(split_key[1])
-        is_target_present = bool(strtobool(split_key[2].strip()))
-
-        # add to conditions that will be returned
-        search_types.append(search_type)
-        display_sizes.append(display_size)
-        target_present.append(is_target_present)
-
-        tup_key = tuple([search_type, display_size, is_target_present])
-        conditions.append(tup_key)
-        nf_arr = np.asarray(val)
-        num_fixations_by_condition[tup_key] = nf_arr
-
-        mean_num_fixations_by_condition[tup_key] = np.mean(nf_arr)
-        std_num_fixations_by_condition[tup_key] = np.std(nf_arr)
-
-    search_types = tuple((set(search_types)))
-    display_sizes = tuple(
-        sorted(  # sorted, so display_sizes is in ascending numerical order
-            set(display_sizes)
-        ))
-    target_present = tuple(set(target_present))
-
+    if _is_accumulators(results):
+        return _num_fixations_results(None,
+                                      {condition: acc.mean_num_fixations for condition, acc in results.items()},
+                                      {condition: acc.std_num_fixations for condition, acc in results.items()})
+    if not isinstance(results, ConditionSummary):
+        results = summarize(results)
+    return _num_fixations_results(results.by_condition('num_fixations'),
+                                  dict(zip(results.conditions, results.mean_num_fixations)),
+                                  dict(zip(results.conditions, results.std_num_fixations)))
+
+
+def _num_fixations_results(num_fixations_by_condition,
+                           mean_num_fixations_by_condition,
+                           std_num_fixations_by_condition):
+    """helper function that makes an instance of NumFixationsResults from
+    number of fixations, means, and standard deviations by condition,
+    by computing results across display sizes"""
+    search_types, display_sizes, target_present, conditions = _unique_conditions(mean_num_fixations_by_condition)
+
+    mean_grid = _condition_grid(mean_num_fixations_by_condition, search_types, display_sizes, target_present)
     mean_num_fixations_all_display_sizes = {}
-    # even more munging
-    for search_type in search_types:
-        for is_target_present in target_present:
-            mean_num_fixations_vals = []
-            for display_size in display_sizes:
-                condition_tup = tuple([search_type, display_size, is_target_present])
-                mean_val = mean_num_fixations_by_condition[condition_tup]
-                mean_num_fixations_vals.append(mean_val)
+    for search_type_ind, search_type in enumerate(search_types):
+        for target_present_ind, is_target_present in enumerate(target_present):
             key = tuple([search_type, is_target_present])
-            mean_num_fixations_vals = np.asarray(mean_num_fixations_vals)
-            mean_num_fixations_all_display_sizes[key] = mean_num_fixations_vals
+            mean_num_fixations_all_display_sizes[key] = mean_grid[search_type_ind, target_present_ind]
 
     return NumFixationsResults(search_types,
                                display_sizes,
@@ -1,7 +1,12 @@
+import functools
+from contextlib import contextmanager
+
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 
+from .accumulate import RT_BIN_EDGES
+
 SEARCH_TYPE_MARKERS = {
     'easy': 's',
     'medium': "^",
@@ -31,19 +36,42 @@ NUM_FIX_SEARCH_TYPE_YLIMS = {
     'hard': (0, 35),
 }
 
+STYLE = 'bmh'
+
+RC_PARAMS = {
+    'font.size': 18,
+    'axes.labelsize': 18,
+    'axes.labelweight': 'regular',
+    'axes.titlesize': 20,
+    'xtick.labelsize': 16,
+    'ytick.labelsize': 16,
+    'legend.fontsize': 14,
+    'figure.titlesize': 20,
+}
+
+
+@contextmanager
+def style():
+    """context manager that applies the style of figures in this module,
+    without changing global rcParams, e.g.::
+
+        with fvf.plot.style():
+            fig, ax = plt.subplots()
+    """
+    with mpl.style.context(STYLE), mpl.rc_context(RC_PARAMS):
+        yield
 
-mpl.style.use('bmh')
 
-plt.rcParams['font.size'] = 18
-plt.rcParams['axes.labelsize'] = 18
-plt.rcParams['axes.labelweight'] = 'regular'
-plt.rcParams['axes.titlesize'] = 20
-plt.rcParams['xtick.labelsize'] = 16
-plt.rcParams['ytick.labelsize'] = 16
-plt.rcParams['legend.fontsize'] = 14
-plt.rcParams['figure.titlesize'] = 20
+def _styled(plot_func):
+    """decorator that makes a plotting function draw inside the style context manager"""
+    @functools.wraps(plot_func)
+    def wrapper(*args, **kwargs):
+        with style():
+            return plot_func(*args, **kwargs)
+    return wrapper
 
 
+@_styled
 def mean_reaction_times(mean_RTs_all_display_sizes,
                         mean_RTs_regress_results,
                         search_types=('easy', 'medium', 'hard'),
@@ -60,9 +88,14 @@ def mean_reaction_times(mean_RTs_all_display_sizes,
     display_sizes : tuple
     target_present : tuple
     figsize_inches : tuple
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
     """
     rows = len(search_types)
-    fig, ax = plt.subplots(rows, 1)
+    fig, ax = plt.subplots(rows, 1, squeeze=False)
+    ax = ax[:, 0]  # so ax[row_ind] works when there is only one row
     for row_ind, search_type in enumerate(search_types):
         for is_target_present in target_present:
             key = (search_type, is_target_present)
@@ -87,8 +120,10 @@ def mean_reaction_times(mean_RTs_all_display_sizes,
     ax[-1].set_xlabel('display size (number of items)')
     fig.set_size_inches(figsize_inches)
     fig.tight_layout()
+    return fig
 
 
+@_styled
 def standard_devs(std_RTs_all_display_sizes,
                   search_types=('easy', 'medium', 'hard'),
                   display_sizes=(6, 12, 18),
@@ -103,9 +138,14 @@ def standard_devs(std_RTs_all_display_sizes,
     display_sizes : tuple
     target_present : tuple
     figsize_inches : tuple
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
     """
     rows = len(search_types)
-    fig, ax = plt.subplots(rows, 1)
+    fig, ax = plt.subplots(rows, 1, squeeze=False)
+    ax = ax[:, 0]  # so ax[row_ind] works when there is only one row
     for row_ind, search_type in enumerate(search_types):
         for is_target_present in target_present:
             key = (search_type, is_target_present)
@@ -128,8 +168,10 @@ def standard_devs(std_RTs_all_display_sizes,
     ax[-1].set_xlabel('display size (number of items)')
     fig.set_size_inches(figsize_inches)
     fig.tight_layout()
+    return fig
 
 
+@_styled
 def mean_num_fixations(mean_num_fixations_all_display_sizes,
                        search_types=('easy', 'medium', 'hard'),
                        display_sizes=(6, 12, 18),
@@ -144,9 +186,14 @@ def mean_num_fixations(mean_num_fixations_all_display_sizes,
     display_sizes : tuple
     target_present : tuple
     figsize_inches : tuple
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
     """
     rows = len(search_types)
-    fig, ax = plt.subplots(rows, 1)
+    fig, ax = plt.subplots(rows, 1, squeeze=False)
+    ax = ax[:, 0]  # so ax[row_ind] works when there is only one row
     for row_ind, search_type in enumerate(search_types):
         for is_target_present in target_present:
             key = (search_type, is_target_present)
@@ -168,6 +215,7 @@ def mean_num_fixations(mean_num_fixations_all_display_sizes,
     ax[-1].set_xlabel('display size (number of items)')
     fig.set_size_inches(figsize_inches)
     fig.tight_layout()
+    return fig
 
 RT_DISTRIB_XLIMS = {
     'easy': (0, 2000),
@@ -176,54 +224,62 @@ RT_DISTRIB_XLIMS = {
 }
 
 
+@_styled
 def reaction_times_distrib(RTs_by_condition,
                            search_types=('easy', 'medium', 'hard'),
                            display_sizes=(6, 12, 18),
                            target_present=(True, False),
-                           figsize_inches=(6, 10)):
+                           figsize_inches=(6, 10),
+                           RT_freqs_by_condition=None):
     """plot distribution of reaction times
 
     Parameters
     ----------
     RTs_by_condition : dict
+        that maps conditions to arrays of reaction times.
+        Not used if RT_freqs_by_condition is specified, and can be None.
     search_types : tuple
     display_sizes : tuple
     target_present : tuple
     figsize_inches : tuple
+    RT_freqs_by_condition : dict
+        that maps conditions to histograms of reaction times that were already computed,
+        as returned by fvf.munge.reaction_time_distribs. Default is None,
+        in which case histograms are computed from RTs_by_condition.
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
     """
-    RTs_all_display_sizes = {}
-    # do yet more munging before plot
-    for search_type in search_types:
-        for is_target_present in target_present:
-            RT_arrs = []
-            for display_size in display_sizes:
-                condition_tup = tuple([search_type, display_size, is_target_present])
-                RT_arr = RTs_by_condition[condition_tup]
-                RT_arrs.append(RT_arr)
-            key = tuple([search_type, is_target_present])
-            RTs_all_display_sizes[key] = RT_arrs
+    if RT_freqs_by_condition is None:
+        # do yet more munging before plot
+        RT_freqs_by_condition = {}
+        for search_type in search_types:
+            for is_target_present in target_present:
+                for display_size in display_sizes:
+                    condition_tup = tuple([search_type, display_size, is_target_present])
+                    RT_arr = RTs_by_condition[condition_tup]
+                    counts = np.histogram(RT_arr, bins=RT_BIN_EDGES)[0]
+                    # Normalize using total number of observations, which is what I
+                    # think both Hulleman Olivers + Wolfe do.
+                    # Note that we would need to use density=True if we wanted to
+                    # normalize such that we model a probability density function.
+                    RT_freqs_by_condition[condition_tup] = counts / RT_arr.shape[0]
 
     rows = len(search_types)
-    fig, ax = plt.subplots(rows, 1)
+    fig, ax = plt.subplots(rows, 1, squeeze=False)
+    ax = ax[:, 0]  # so ax[row_ind] works when there is only one row
     for row_ind, search_type in enumerate(search_types):
         for is_target_present in target_present:
-            key = (search_type, is_target_present)
-            RT_arrs = RTs_all_display_sizes[key]
-            for display_size, RT_arr in zip(display_sizes, RT_arrs):
+            for display_size in display_sizes:
                 if is_target_present:
                     label = f'{search_type}, {display_size} items, target present'
                     linestyle = '-'
                 else:
                     label = f'{search_type}, {display_size} items, target absent'
                     linestyle = '--'
-                binedges = np.arange(0, 12001, 250)
-                counts = np.histogram(RT_arr, bins=binedges)[0]
-                # Normalize using total number of observations, which is what I
-                # think both Hulleman Olivers + Wolfe do.
-                # Note that we would need to use density=True if we wanted to
-                # normalize such that we model a probability density function.
-                counts = counts / RT_arr.shape[0]
-                ax[row_ind].plot(binedges[:-1], counts,
+                counts = RT_freqs_by_condition[(search_type, display_size, is_target_present)]
+                ax[row_ind].plot(RT_BIN_EDGES[:-1], counts,
                                  linestyle=linestyle,
                                  label=label)
             ax[row_ind].spines["top"].set_visible(False)
@@ -235,3 +291,4 @@ def reaction_times_distrib(RTs_by_condition,
     ax[-1].set_xlabel('reaction times (250 ms bins)')
     fig.set_size_inches(figsize_inches)
     fig.tight_layout()
+    return fig
@@ -0,0 +1,391 @@
+"""Columnar on-disk format for results of Simulator.runall.
+
+A results directory holds one .npy file per column, with the trials from
+all conditions concatenated, plus 'conditions.json', the index that maps
+integer condition codes to (search type, display size, target present)
+tuples. Arrays are memory-mapped when loaded, so nothing is parsed, and
+only the parts that are used are read from disk.
+
+Files
+-----
+conditions.json
+    {"conditions": [[search type, display size, target present], ...], "record": record level}
+condition.npy
+    condition code of each trial, an index into conditions
+condition_offsets.npy
+    trials for condition i are trials condition_offsets[i]:condition_offsets[i + 1]
+response.npy, reaction_time.npy, num_fixations.npy
+    one element per trial
+fix_locs.npy, fvf_sizes.npy, fix_offsets.npy
+    only if traces were recorded. Flat arrays of fixations for all trials;
+    fixations for trial i are fix_offsets[i]:fix_offsets[i + 1]
+seen.npy, search_arrs.npy, item_offsets.npy
+    only if full trials were recorded. Flat arrays of items for all trials,
+    since display sizes differ between conditions; items for trial i are
+    item_offsets[i]:item_offsets[i + 1]
+shard.json
+    only for results of one shard of a run split across machines, see
+    Simulator.runall. {"shard": [shard index, number of shards], "config": configuration of run,
+    "conditions": [all conditions of run], "chunk_sizes": [[[chunk index, number of trials], ...], ...]},
+    where chunk_sizes has one list per condition in conditions.json. Shards are combined
+    into one results directory with fvf.results.merge_shards.
+"""
+import json
+import os
+import pickle
+
+import numpy as np
+
+from .model import RECORD_LEVELS, TrialBatch, _compact_dtype
+
+CONDITIONS_JSON = 'conditions.json'
+SHARD_JSON = 'shard.json'
+
+SUMMARY_COLUMNS = ('condition', 'condition_offsets', 'response', 'reaction_time', 'num_fixations')
+TRACE_COLUMNS = ('fix_locs', 'fvf_sizes', 'fix_offsets')
+FULL_COLUMNS = ('seen', 'search_arrs', 'item_offsets')
+
+
+class Results:
+    """results loaded from a results directory, with columns memory-mapped
+
+    Attributes
+    ----------
+    conditions : list
+        of (search type, display size, target present) tuples;
+        the condition code of a trial is its index in this list
+    record : str
+        how much of each trial was saved, one of fvf.model.RECORD_LEVELS
+    condition, condition_offsets, response, reaction_time, num_fixations,
+    fix_locs, fvf_sizes, fix_offsets, seen, search_arrs, item_offsets : numpy.ndarray
+        columns described in the docstring of fvf.results.
+        Columns that were not saved are None.
+    """
+    def __init__(self, conditions, record, columns):
+        """__init__ method
+
+        Parameters
+        ----------
+        conditions : list
+            of (search type, display size, target present) tuples
+        record : str
+            one of fvf.model.RECORD_LEVELS
+        columns : dict
+            that maps column names to arrays
+        """
+        self.conditions = conditions
+        self.record = record
+        for column in SUMMARY_COLUMNS + TRACE_COLUMNS + FULL_COLUMNS:
+            setattr(self, column, columns.get(column))
+
+    def __len__(self):
+        """number of conditions"""
+        return len(self.conditions)
+
+    def batch(self, condition):
+        """get trials for one condition
+
+        Parameters
+        ----------
+        condition : tuple, int
+            (search type, display size, target present), or a condition code
+
+        Returns
+        -------
+        trials : TrialBatch
+            whose columns are read from the memory-mapped arrays
+        """
+        code = condition if isinstance(condition, (int, np.integer)) else self.conditions.index(tuple(condition))
+        display_size = self.conditions[code][1]
+        start, stop = self.condition_offsets[code], self.condition_offsets[code + 1]
+        fix_locs = fvf_sizes = fix_offsets = seen = search_arrs = None
+        if self.record != 'summary':
+            fix_start, fix_stop = self.fix_offsets[start], self.fix_offsets[stop]
+            fix_locs = self.fix_locs[fix_start:fix_stop]
+            fvf_sizes = self.fvf_sizes[fix_start:fix_stop]
+            fix_offsets = self.fix_offsets[start:stop + 1] - fix_start
+            if self.record == 'full':
+                item_start, item_stop = self.item_offsets[start], self.item_offsets[stop]
+                seen = self.seen[item_start:item_stop].reshape(stop - start, display_size)
+                search_arrs = self.search_arrs[item_start:item_stop].reshape(stop - start, display_size)
+        return TrialBatch(self.response[start:stop],
+                          self.reaction_time[start:stop],
+                          self.num_fixations[start:stop],
+                          display_size,
+                          fix_locs=fix_locs,
+                          fvf_sizes=fvf_sizes,
+                          fix_offsets=fix_offsets,
+                          seen=seen,
+                          search_arrs=search_arrs)
+
+    def items(self):
+        """iterate over (condition, TrialBatch) pairs, one condition at a time"""
+        for code, condition in enumerate(self.conditions):
+            yield condition, self.batch(code)
+
+
+def save(results, results_dir):
+    """save results in columnar format
+
+    Parameters
+    ----------
+    results : dict
+        that maps (search type, display size, target present) tuples to TrialBatch,
+        as returned by Simulator.runall
+    results_dir : str
+        path to directory where .npy files and conditions.json are saved.
+        Created if it does not exist.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    conditions = [tuple(condition) for condition in results.keys()]
+    batches = list(results.values())
+    if not batches:
+        # e.g. from Simulator(trials_per_condition=0); save an index with no conditions
+        _save_columns(results_dir, {
+            'condition': np.zeros((0,), dtype=np.uint8),
+            'condition_offsets': np.zeros((1,), dtype=np.int64),
+            'response': np.zeros((0,), dtype=bool),
+            'reaction_time': np.zeros((0,), dtype=np.int64),
+            'num_fixations': np.zeros((0,), dtype=np.int64),
+        }, conditions, 'summary')
+        return
+    record = min((batch.record for batch in batches), key=RECORD_LEVELS.index)
+
+    num_trials = np.array([len(batch) for batch in batches], dtype=np.int64)
+    condition_offsets = np.zeros((len(batches) + 1,), dtype=np.int64)
+    np.cumsum(num_trials, out=condition_offsets[1:])
+    columns = {
+        'condition': np.repeat(np.arange(len(batches)), num_trials).astype(_compact_dtype(len(batches) - 1)),
+        'condition_offsets': condition_offsets,
+        'response': np.concatenate([batch.response for batch in batches]),
+        'reaction_time': np.concatenate([batch.reaction_time for batch in batches]),
+        'num_fixations': np.concatenate([batch.num_fixations for batch in batches]),
+    }
+    if record != 'summary':
+        # offsets into flat arrays of fixations for all conditions
+        fix_offsets = np.zeros((condition_offsets[-1] + 1,), dtype=np.int64)
+        np.cumsum(columns['num_fixations'], out=fix_offsets[1:])
+        columns['fix_locs'] = np.concatenate([batch.fix_locs for batch in batches])
+        columns['fvf_sizes'] = np.concatenate([batch.fvf_sizes for batch in batches])
+        columns['fix_offsets'] = fix_offsets
+    if record == 'full':
+        display_sizes = np.repeat([batch.display_size for batch in batches], num_trials)
+        item_offsets = np.zeros((display_sizes.shape[0] + 1,), dtype=np.int64)
+        np.cumsum(display_sizes, out=item_offsets[1:])
+        columns['seen'] = np.concatenate([batch.seen.ravel() for batch in batches])
+        columns['search_arrs'] = np.concatenate([batch.search_arrs.ravel() for batch in batches])
+        columns['item_offsets'] = item_offsets
+    _save_columns(results_dir, columns, conditions, record)
+
+
+def _save_columns(results_dir, columns, conditions, record):
+    """save one .npy file per column, then conditions.json"""
+    for column, arr in columns.items():
+        np.save(os.path.join(results_dir, f'{column}.npy'), arr)
+    with open(os.path.join(results_dir, CONDITIONS_JSON), 'w') as fp:
+        json.dump({'conditions': [list(condition) for condition in conditions], 'record': record}, fp)
+
+
+def load(results_dir, mmap_mode='r'):
+    """load results saved with fvf.results.save
+
+    Parameters
+    ----------
+    results_dir : str
+        path to results directory
+    mmap_mode : str
+        passed to numpy.load. Default is 'r', i.e., arrays are memory-mapped
+        read-only. None loads all arrays into memory.
+
+    Returns
+    -------
+    results : Results
+    """
+    with open(os.path.join(results_dir, CONDITIONS_JSON)) as fp:
+        index = json.load(fp)
+    conditions = [tuple(condition) for condition in index['conditions']]
+    record = index['record']
+    column_names = SUMMARY_COLUMNS
+    if record != 'summary':
+        column_names += TRACE_COLUMNS
+    if record == 'full':
+        column_names += FULL_COLUMNS
+    columns = {column: np.load(os.path.join(results_dir, f'{column}.npy'), mmap_mode=mmap_mode)
+               for column in column_names}
+    return Results(conditions, record, columns)
+
+
+def save_shard(results, results_dir, shard, chunk_sizes, conditions, config):
+    """save results of one shard of a run, with the index that fvf.results.merge_shards
+    needs to put chunks from all shards back in order
+
+    Parameters
+    ----------
+    results : dict
+        returned by Simulator.runall(shard=shard). Can be empty,
+        if there were more shards than chunks.
+    results_dir : str
+        path to directory where results are saved
+    shard : tuple
+        (shard index, number of shards)
+    chunk_sizes : dict
+        that maps each condition in results to a list of (chunk index, number of trials),
+        the chunk_sizes attribute of Simulator after runall
+    conditions : list
+        all conditions of the run, in order, the conditions attribute of Simulator
+    config : dict
+        configuration of the run, that can be serialized to JSON.
+        Must be the same for all shards, apart from the 'shard' key.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    if results:
+        save(results, results_dir)
+    index = {
+        'shard': list(shard),
+        'config': config,
+        'conditions': [list(condition) for condition in conditions],
+        'chunk_sizes': [[list(chunk_size) for chunk_size in chunk_sizes[condition]] for condition in results],
+    }
+    with open(os.path.join(results_dir, SHARD_JSON), 'w') as fp:
+        json.dump(index, fp)
+
+
+def merge_shards(shard_dirs, results_dir):
+    """merge results from all shards of a run into one results directory.
+    Chunks of each condition are concatenated in order, so results are
+    the same, bit for bit, as those from one run without shards
+
+    Parameters
+    ----------
+    shard_dirs : list
+        of paths to directories saved by fvf.results.save_shard, one for each shard
+    results_dir : str
+        path to directory where merged results are saved
+
+    Returns
+    -------
+    results : Results
+        loaded from results_dir
+    config : dict
+        configuration of run, without 'shard'
+
+    Raises
+    ------
+    ValueError
+        if shards are from runs with different configurations, or if any shard
+        is missing or appears more than once
+    """
+    indexes = []
+    for shard_dir in shard_dirs:
+        with open(os.path.join(shard_dir, SHARD_JSON)) as fp:
+            indexes.append(json.load(fp))
+    config = {key: value for key, value in indexes[0]['config'].items() if key != 'shard'}
+    num_shards = indexes[0]['shard'][1]
+    for shard_dir, index in zip(shard_dirs, indexes):
+        shard_config = {key: value for key, value in index['config'].items() if key != 'shard'}
+        if (shard_config != config or index['shard'][1] != num_shards
+                or index['conditions'] != indexes[0]['conditions']):
+            raise ValueError(f'shard in {shard_dir} is from a run with a different configuration')
+    shard_inds = sorted(index['shard'][0] for index in indexes)
+    if shard_inds != list(range(num_shards)):
+        raise ValueError(f'need each of {num_shards} shards exactly once, but got shards: {shard_inds}')
+
+    pieces = {}
+    for shard_dir, index in zip(shard_dirs, indexes):
+        if not index['chunk_sizes']:
+            continue
+        shard_results = load(shard_dir)
+        for code, condition in enumerate(shard_results.conditions):
+            batch = shard_results.batch(code)
+            start = 0
+            for chunk_ind, num_trials in index['chunk_sizes'][code]:
+                piece = batch.take(np.arange(start, start + num_trials))
+                pieces.setdefault(condition, []).append((chunk_ind, piece))
+                start += num_trials
+
+    results = {}
+    for condition in indexes[0]['conditions']:
+        condition = tuple(condition)
+        if condition not in pieces:
+            continue
+        condition_pieces = sorted(pieces[condition], key=lambda piece: piece[0])
+        chunk_inds = [chunk_ind for chunk_ind, _ in condition_pieces]
+        if chunk_inds != list(range(len(chunk_inds))):
+            raise ValueError(f'chunks of condition {condition} from shards are not consecutive: {chunk_inds}')
+        # concatenating makes a TrialBatch with the same dtypes as one made from all chunks in one run
+        results[condition] = TrialBatch.concatenate([piece for _, piece in condition_pieces])
+    save(results, results_dir)
+    return load(results_dir), config
+
+
+def _parse_condition(key):
+    """convert a comma-joined condition key from the old JSON files back into a tuple"""
+    search_type, display_size, target_present = [part.strip() for part in key.split(',')]
+    if target_present not in ('True', 'False'):
+        raise ValueError(f'could not parse condition: {key}')
+    return search_type, int(display_size), target_present == 'True'
+
+
+def _from_trial_list(trials, display_size):
+    """make a TrialBatch from a list of Trial tuples, as saved in results.pickle by older versions.
+    These do not include search arrays, so the batch records traces but not full trials"""
+    num_fixations = np.array([trial.num_fixations for trial in trials], dtype=np.int64)
+    fix_offsets = np.zeros((len(trials) + 1,), dtype=np.int64)
+    np.cumsum(num_fixations, out=fix_offsets[1:])
+    return TrialBatch([trial.response for trial in trials],
+                      [trial.reaction_time for trial in trials],
+                      num_fixations,
+                      display_size,
+                      fix_locs=np.array([loc for trial in trials for loc in trial.fix_locs], dtype=np.int64),
+                      fvf_sizes=np.array([size for trial in trials for size in trial.fvf_sizes], dtype=np.int64),
+                      fix_offsets=fix_offsets)
+
+
+def convert(old_results_dir, results_dir=None):
+    """convert a results directory saved by an older version of the command-line interface,
+    with results.pickle and/or reaction_times.json, num_fixations.json and responses.json,
+    into columnar format
+
+    If results.pickle exists, it is used, since it has traces.
+    Older versions saved a list of Trial tuples for each condition; these are
+    converted with record='trace', since they do not include search arrays.
+    Otherwise the .json files are used, and results have record='summary'.
+
+    Parameters
+    ----------
+    old_results_dir : str
+        path to directory with results in old format
+    results_dir : str
+        path to directory where columnar results are saved.
+        Default is None, in which case they are saved in old_results_dir.
+
+    Returns
+    -------
+    results : Results
+        loaded from results_dir
+    """
+    if results_dir is None:
+        results_dir = old_results_dir
+    results_pkl = os.path.join(old_results_dir, 'results.pickle')
+    if os.path.exists(results_pkl):
+        with open(results_pkl, 'rb') as fp:
+            old_results = pickle.load(fp)
+        results = {}
+        for condition, trials in old_results.items():
+            if not isinstance(trials, TrialBatch):
+                trials = _from_trial_list(trials, condition[1])
+            results[tuple(condition)] = trials
+    else:
+        by_name = {}
+        for name in ('reaction_times', 'num_fixations', 'responses'):
+            with open(os.path.join(old_results_dir, f'{name}.json')) as fp:
+                by_name[name] = json.load(fp)
+        results = {}
+        for key, RTs in by_name['reaction_times'].items():
+            condition = _parse_condition(key)
+            results[condition] = TrialBatch(by_name['responses'][key],
+                                            RTs,
+                                            by_name['num_fixations'][key],
+                                            condition[1])
+    save(results, results_dir)
+    return load(results_dir)
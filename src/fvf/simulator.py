@@ -9,10 +9,268 @@ doi:10.1017/S0140525X15002794
 
 Display size defaults from Young and Hulleman 2013.
 """
+import hashlib
+import json
+import logging
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from statistics import NormalDist
+from typing import NamedTuple
+
 import numpy as np
-from tqdm import tqdm
 
-from .model import FVFModel
+from .accumulate import ConditionAccumulator
+from .cache import Cache, model_params
+from .checkpoint import Checkpoint
+from .model import FVFModel, RECORD_LEVELS, TrialBatch, global_rng
+from . import jit, telemetry
+
+BACKENDS = ('numpy', 'numba')
+
+# first element of spawn keys of random streams used by Simulator.runall, so that streams
+# for chunks of trials and for choosing which trials reservoirs keep never coincide
+CHUNK_STREAM_TAG = 0
+RESERVOIR_STREAM_TAG = 1
+
+# chunks that Simulator.runall keeps submitted to a process pool at once, per worker;
+# enough to keep workers busy, while bounding how many finished chunks wait to be collected
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+logger = logging.getLogger(__name__)
+
+
+def stream_id(*labels):
+    """stable integer identifier of a random stream, from a hash of labels that can be
+    serialized to JSON, e.g. a condition tuple. Used in spawn keys instead of positions,
+    so a condition or simulation gets the same stream whatever else is run with it
+
+    Parameters
+    ----------
+    *labels
+        that identify the stream. Numpy scalars are converted to Python numbers.
+
+    Returns
+    -------
+    stream_id : int
+        128-bit non-negative integer
+    """
+    text = json.dumps(labels, sort_keys=True, default=lambda obj: obj.item())
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:16], 'little')
+
+
+def make_search_arrs(num_trials, display_size, target_present, target=1, rng=None):
+    """make search arrays for all trials in one condition
+
+    Parameters
+    ----------
+    num_trials : int
+        number of trials, i.e. number of search arrays
+    display_size : int
+        number of elements in each search array
+    target_present : bool
+        if True, place target at a random location in each search array
+    target : int
+        value that represents target. Default is 1.
+    rng : numpy.random.Generator
+        used to draw target locations. Default is None, in which case
+        a generator is seeded from numpy's global random state, see fvf.model.global_rng.
+
+    Returns
+    -------
+    search_arrs : numpy.ndarray
+        with shape (num_trials, display_size)
+    """
+    if rng is None:
+        rng = global_rng()
+    search_arrs = np.zeros((num_trials, display_size))
+    # draw even if target is absent, so the rest of the random numbers from rng line up
+    # between conditions; scale uniform draws so target locations are matched across display sizes
+    target_inds = (rng.random(num_trials) * display_size).astype(np.int64)
+    if target_present:
+        search_arrs[np.arange(num_trials), target_inds] = target
+    return search_arrs
+
+
+class TraceSample(NamedTuple):
+    """NamedTuple that represents full traces kept for
+    a random sample of trials from one condition
+
+    Fields
+    ------
+    trial_inds : numpy.ndarray
+        indices of sampled trials among all trials in the condition, in ascending order
+    trials : TrialBatch
+        sampled trials, with record='full', in the same order as trial_inds
+    """
+    trial_inds: np.ndarray
+    trials: TrialBatch
+
+
+class TraceReservoir:
+    """reservoir sample of a fixed number of trials, with full traces,
+    from a stream of TrialBatch instances.
+
+    Uses "Algorithm R", so every trial added so far has the same
+    probability of being in the sample.
+    """
+    def __init__(self, size, rng=None):
+        """__init__ method
+
+        Parameters
+        ----------
+        size : int
+            number of trials to keep in sample
+        rng : numpy.random.Generator
+            used to choose which trials are kept. Default is None, in which case
+            a generator is seeded from numpy's global random state, see fvf.model.global_rng.
+        """
+        if rng is None:
+            rng = global_rng()
+        self.size = size
+        self.rng = rng
+        self.num_seen = 0
+        self.trial_inds = np.zeros((0,), dtype=np.int64)
+        self.trials = None
+
+    def add(self, batch):
+        """add all trials from a batch to the stream
+
+        Parameters
+        ----------
+        batch : TrialBatch
+            with record='full'
+        """
+        num_trials = len(batch)
+        trial_inds = self.num_seen + np.arange(num_trials)
+        # until reservoir is full, each trial goes in next empty slot.
+        # after that, trial i replaces a random slot with probability size / (i + 1)
+        slots = (self.rng.random(num_trials) * (trial_inds + 1)).astype(np.int64)
+        is_filling = trial_inds < self.size
+        slots[is_filling] = trial_inds[is_filling]
+        kept = np.flatnonzero(slots < self.size)
+        # when more than one trial goes into the same slot, the last one wins
+        kept_reversed = kept[::-1]
+        _, last_in_slot = np.unique(slots[kept_reversed], return_index=True)
+        winners = np.sort(kept_reversed[last_in_slot])
+
+        num_old = 0 if self.trials is None else len(self.trials)
+        source = np.arange(min(self.size, self.num_seen + num_trials))
+        source[slots[winners]] = num_old + np.arange(winners.shape[0])
+        new_trials = batch.take(winners, record='full')
+        if self.trials is None:
+            combined = new_trials
+        else:
+            combined = TrialBatch.concatenate([self.trials, new_trials])
+        self.trials = combined.take(source)
+        self.trial_inds = np.concatenate([self.trial_inds, trial_inds[winners]])[source]
+        self.num_seen += num_trials
+
+    def sample(self):
+        """get the sample, sorted by trial index
+
+        Returns
+        -------
+        trace_sample : TraceSample
+        """
+        order = np.argsort(self.trial_inds)
+        return TraceSample(self.trial_inds[order], self.trials.take(order))
+
+
+class Precision(NamedTuple):
+    """NamedTuple that represents the precision achieved for one condition;
+    computed by Simulator after running each condition
+
+    Fields
+    ------
+    num_trials : int
+        number of trials that were run
+    mean_RT : float
+        mean reaction time of correct trials, as computed by fvf.munge.reaction_times
+    mean_RT_halfwidth : float
+        half-width of confidence interval on mean_RT, in milliseconds
+    error_rate : float
+        proportion of trials with incorrect response
+    error_rate_halfwidth : float
+        half-width of (Wilson score) confidence interval on error_rate
+    converged : bool
+        True if both half-widths are within the tolerances given to Simulator.
+        Always True if Simulator is not in sequential-sampling mode.
+    """
+    num_trials: int
+    mean_RT: float
+    mean_RT_halfwidth: float
+    error_rate: float
+    error_rate_halfwidth: float
+    converged: bool
+
+
+def compute_precision(response, reaction_time, target_present, confidence=0.95, rt_tol=None, error_rate_tol=None):
+    """compute precision of estimates of mean correct reaction time
+    and of error rate for one condition
+
+    Parameters
+    ----------
+    response : numpy.ndarray
+        responses from all trials run for the condition so far
+    reaction_time : numpy.ndarray
+        reaction times from all trials run for the condition so far
+    target_present : bool
+        whether target was present in the condition, used to determine
+        which responses are correct
+    confidence : float
+        confidence level of intervals. Default is 0.95.
+    rt_tol : float
+        tolerance for half-width of interval on mean RT, in ms. Default is None.
+    error_rate_tol : float
+        tolerance for half-width of interval on error rate. Default is None.
+
+    Returns
+    -------
+    precision : Precision
+    """
+    correct = response == target_present
+    num_correct = int(np.count_nonzero(correct))
+    mean_RT = std_RT = float('nan')
+    if num_correct > 1:
+        correct_RTs = reaction_time[correct]
+        mean_RT = float(np.mean(correct_RTs))
+        # np.std, as in fvf.munge.reaction_times
+        std_RT = float(np.std(correct_RTs))
+    return _precision(response.shape[0], num_correct, mean_RT, std_RT, confidence, rt_tol, error_rate_tol)
+
+
+def _precision(num_trials, num_correct, mean_RT, std_RT, confidence, rt_tol, error_rate_tol):
+    """compute Precision from counts and moments, as kept by a ConditionAccumulator"""
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    if num_correct > 1:
+        mean_RT_halfwidth = float(z * std_RT / np.sqrt(num_correct))
+    else:
+        mean_RT = float('nan')
+        mean_RT_halfwidth = float('inf')
+    error_rate = 1 - num_correct / num_trials
+    # Wilson score interval, which does not collapse to zero width when error rate is 0
+    error_rate_halfwidth = float(
+        z / (1 + z ** 2 / num_trials)
+        * np.sqrt(error_rate * (1 - error_rate) / num_trials + z ** 2 / (4 * num_trials ** 2))
+    )
+    converged = ((rt_tol is None or mean_RT_halfwidth <= rt_tol)
+                 and (error_rate_tol is None or error_rate_halfwidth <= error_rate_tol))
+    return Precision(num_trials, mean_RT, mean_RT_halfwidth, error_rate, error_rate_halfwidth, converged)
+
+
+def _run_chunk(fvf_params, condition, target, num_trials, backend, record, seed_seq, common_random_numbers):
+    """run one chunk of trials for one condition, with its own random number generator.
+    Module-level so it can run in a process pool.
+    Returns chunk, wall time in seconds, and peak RSS of the process that ran it, in MiB"""
+    start = time.perf_counter()
+    search_type, display_size, target_present = condition
+    fvf_model = FVFModel(**fvf_params)
+    chunk = Simulator._run_one_condition(fvf_model, search_type, display_size, target_present, target,
+                                         num_trials, backend, record, np.random.default_rng(seed_seq),
+                                         common_random_numbers)
+    return chunk, time.perf_counter() - start, telemetry.peak_rss_mb()
 
 
 class Simulator:
@@ -22,7 +280,15 @@ class Simulator:
                  task_difficulties=('easy', 'medium', 'hard'),
                  target_presence=(True, False),
                  target=1,
-                 seed=42):
+                 seed=42,
+                 backend='numpy',
+                 rt_tol=None,
+                 error_rate_tol=None,
+                 chunk_size=2000,
+                 max_trials_per_condition=100000,
+                 confidence=0.95,
+                 common_random_numbers=False,
+                 cache=None):
         """__init__ method
 
         Parameters
@@ -32,17 +298,84 @@ class Simulator:
         task_difficulties
         target_presence
         target
-        seed
+        seed : int
+            seed for random number generators. Each chunk of trials gets its own
+            stream, spawned from this seed with numpy.random.SeedSequence, with a spawn key
+            made from a hash of its condition (see stream_id) and its index, so results
+            are the same whatever the number of workers passed to runall, and a condition
+            has the same trials whatever other conditions are run.
+        backend : str
+            used to run trials. One of {'numpy', 'numba'}.
+            'numpy' uses FVFModel.run_trials. 'numba' uses the JIT-compiled
+            kernel in fvf.jit, and falls back to 'numpy' with a warning
+            if numba is not installed. Default is 'numpy'.
+        rt_tol : float
+            tolerance, in milliseconds, for half-width of confidence interval on
+            mean reaction time of correct trials. If either rt_tol or error_rate_tol
+            is specified, Simulator runs in sequential-sampling mode: each condition
+            runs in chunks of chunk_size trials until intervals are within tolerance,
+            or until max_trials_per_condition trials have been run, and
+            trials_per_condition is ignored. Default is None.
+        error_rate_tol : float
+            tolerance for half-width of confidence interval on error rate,
+            e.g. 0.01. Default is None.
+        chunk_size : int
+            number of trials per chunk. Chunks are the unit of work that runall
+            spreads across worker processes; in sequential-sampling mode, precision
+            is checked after each chunk. Default is 2000.
+        max_trials_per_condition : int
+            maximum number of trials per condition in sequential-sampling mode.
+            Default is 100000.
+        confidence : float
+            confidence level for intervals. Default is 0.95.
+        common_random_numbers : bool
+            if True, the i-th trial in every condition uses the same random numbers:
+            the same relative target location, and the same draws for patches and
+            fvf sizes on each fixation. Runs with the same seed and different fvf_params
+            also share random numbers. This reduces the variance of differences between
+            conditions and parameter sets, e.g. slopes of RT v. display size,
+            at the cost of a few more random draws per trial. Only supported by the
+            'numpy' backend. Default is False.
+        cache : fvf.cache.Cache
+            if specified, runall loads chunks of trials that were already simulated from
+            this cache, instead of running them again, and adds new chunks to it.
+            Chunks are only cached when seed is not None. Default is None.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f'backend must be one of {BACKENDS}, but was: {backend}')
+        if backend == 'numba' and not jit.HAS_NUMBA:
+            warnings.warn("numba is not installed, falling back to backend 'numpy'")
+            backend = 'numpy'
+        if common_random_numbers and backend != 'numpy':
+            raise ValueError("common_random_numbers is only supported by backend 'numpy'")
+        for name, tol in (('rt_tol', rt_tol), ('error_rate_tol', error_rate_tol)):
+            if tol is not None and not tol > 0:
+                raise ValueError(f'{name} must be positive, but was: {tol}')
+        for name, value in (('chunk_size', chunk_size), ('max_trials_per_condition', max_trials_per_condition)):
+            if value < 1:
+                raise ValueError(f'{name} must be at least 1, but was: {value}')
+
         self.trials_per_condition = trials_per_condition
         self.display_sizes = display_sizes
         self.task_difficulties = task_difficulties
         self.target_presence = target_presence
         self.target = target
         self.seed = seed
+        self.backend = backend
+        self.rt_tol = rt_tol
+        self.error_rate_tol = error_rate_tol
+        self.chunk_size = chunk_size
+        self.max_trials_per_condition = max_trials_per_condition
+        self.confidence = confidence
+        self.common_random_numbers = common_random_numbers
+        self.cache = cache
+        self.full_traces = {}  # set by runall when num_full_traces is specified
+        self.precision = {}  # set by runall
+        self.chunk_sizes = {}  # set by runall
 
     @staticmethod
-    def _run_one_condition(fvf_model, search_type, display_size, target_present, target=1, num_trials=10000):
+    def _run_one_condition(fvf_model, search_type, display_size, target_present, target=1, num_trials=10000,
+                           backend='numpy', record='full', rng=None, common_random_numbers=False):
         """runs all trials for one condition
 
         Parameters
@@ -57,24 +390,104 @@ class Simulator:
             value that represents target. Default is 1.
         num_trials : int
             number of trials to run
+        backend : str
+            One of {'numpy', 'numba'}. Default is 'numpy'.
+        record : str
+            how much of each trial to record. One of {'summary', 'trace', 'full'};
+            see FVFModel.run_trial. Default is 'full'.
+        rng : numpy.random.Generator
+            used for all random draws. Default is None, in which case
+            a generator is seeded from numpy's global random state, see fvf.model.global_rng.
+        common_random_numbers : bool
+            see FVFModel.run_trials. Only supported by backend 'numpy'. Default is False.
+
+        Returns
+        -------
+        trials : TrialBatch
+            returned by FVFModel.run_trials()
+        """
+        if rng is None:
+            rng = global_rng()
+        search_arrs = make_search_arrs(num_trials, display_size, target_present, target, rng)
+        if backend == 'numba':
+            if common_random_numbers:
+                raise ValueError("common_random_numbers is only supported by backend 'numpy'")
+            return jit.run_trials(fvf_model, search_type, search_arrs, target, record, rng)
+        return fvf_model.run_trials(search_type, search_arrs, target, record, rng, common_random_numbers)
+
+    @property
+    def conditions(self):
+        """list of all (search type, display size, target present) conditions, in the order they are run"""
+        conditions = []
+        for search_type in self.task_difficulties:
+            for display_size in self.display_sizes:
+                for target_present in self.target_presence:
+                    conditions.append((search_type, display_size, target_present))
+        return conditions
+
+    def condition_precision(self, accumulator):
+        """precision achieved for one condition, given all its trials so far
+
+        Parameters
+        ----------
+        accumulator : fvf.accumulate.ConditionAccumulator
+            with all trials run for the condition
 
         Returns
         -------
-        trials : list
-            of Trial tuples returned by FVFModel()
+        precision : Precision
+            computed with the confidence level and tolerances of this Simulator
         """
-        trials = []
+        condition_precision = _precision(accumulator.num_trials, accumulator.num_correct,
+                                         accumulator.mean_RT, accumulator.std_RT,
+                                         self.confidence, self.rt_tol, self.error_rate_tol)
+        if not self.is_sequential:
+            condition_precision = condition_precision._replace(converged=True)
+        return condition_precision
+
+    @property
+    def is_sequential(self):
+        """True if Simulator is in sequential-sampling mode"""
+        return self.rt_tol is not None or self.error_rate_tol is not None
 
-        for trial_num in tqdm(range(num_trials)):
-            search_arr = np.zeros((display_size,))
-            if target_present:
-                target_ind = np.random.choice(np.arange(display_size))
-                search_arr[target_ind] = target
-            trials.append(fvf_model.run_trial(search_type, search_arr, target))
+    def _next_chunk_sizes(self, num_trials):
+        """sizes of chunks to run next for a condition, given number of trials already run.
+        Without sequential sampling, all of trials_per_condition is split into chunks at once;
+        with sequential sampling, one chunk is run at a time"""
+        if self.is_sequential:
+            return [min(self.chunk_size, self.max_trials_per_condition - num_trials)]
+        if num_trials > 0:
+            return []
+        num_full, remainder = divmod(self.trials_per_condition, self.chunk_size)
+        return [self.chunk_size] * num_full + ([remainder] if remainder else [])
 
-        return trials
+    def _config(self, fvf_params, record, num_full_traces, shard=None):
+        """configuration of a call to runall, used to check that checkpoints are from the same run"""
+        config = {
+            'fvf_params': {name: value._asdict() if hasattr(value, '_asdict') else value
+                           for name, value in sorted(fvf_params.items())},
+            'record': record,
+            'num_full_traces': num_full_traces,
+            'trials_per_condition': self.trials_per_condition,
+            'display_sizes': list(self.display_sizes),
+            'task_difficulties': list(self.task_difficulties),
+            'target_presence': list(self.target_presence),
+            'target': self.target,
+            'seed': self.seed,
+            'backend': self.backend,
+            'rt_tol': self.rt_tol,
+            'error_rate_tol': self.error_rate_tol,
+            'chunk_size': self.chunk_size,
+            'max_trials_per_condition': self.max_trials_per_condition,
+            'confidence': self.confidence,
+            'common_random_numbers': self.common_random_numbers,
+        }
+        if shard is not None:
+            config['shard'] = list(shard)
+        return config
 
-    def runall(self, fvf_params=None):
+    def runall(self, fvf_params=None, record='full', num_full_traces=None, workers=None, checkpoint_dir=None,
+               accumulate=False, shard=None, callbacks=None):
         """run trials for all possible permutations of
         conditions
 
@@ -84,28 +497,253 @@ class Simulator:
             of parameters for FVFModel, where key is parameter name, and
             value is the value to pass to FVFModel when creating an instance
             of the model. Default is None, in which case defaults for model are used.
+        record : str
+            how much of each trial to record. One of {'summary', 'trace', 'full'};
+            see FVFModel.run_trial. Default is 'full'.
+        num_full_traces : int
+            if specified, keep full traces for a random sample of this many trials
+            per condition, chosen by reservoir sampling, whatever the value of record.
+            After runall returns, the samples are in the full_traces attribute,
+            a dict that maps each condition to a TraceSample. Chunks are run with
+            record='full' and reduced to record as soon as they are added to the sample,
+            so full traces are only held for the chunks in flight, not for every trial.
+            Default is None, in which case no samples are kept.
+        workers : int
+            number of worker processes. Conditions, and chunks of chunk_size trials
+            within each condition, are spread across a process pool.
+            Default is None, in which case all trials are run in this process.
+            Results do not depend on the number of workers. At most
+            CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker are submitted at once, and each
+            is collected as soon as it is finished, so memory does not grow with the
+            number of chunks waiting to be collected.
+        checkpoint_dir : str
+            path to directory where each chunk of trials is saved as soon as it is
+            finished, along with a manifest; see fvf.checkpoint. If the directory
+            already has checkpoints from a run with the same configuration,
+            completed chunks are loaded instead of being run again, and results are
+            the same as if the run had never been interrupted. Default is None,
+            in which case no checkpoints are saved.
+        accumulate : bool
+            if True, fold each chunk of trials into a ConditionAccumulator for its condition
+            as soon as it is finished, then discard the chunk, so memory stays constant
+            however many trials are run; record is ignored, and checkpoints only save
+            summaries of trials. Default is False.
+        shard : tuple
+            (shard index, number of shards). If specified, run only this shard's part of the
+            work, so that a run can be split across machines: chunk i of all chunks of all
+            conditions, in order, is in shard i % number of shards. In sequential-sampling
+            mode, precision is checked after every chunk, so the unit of work is a condition
+            instead. Every chunk has the same random numbers as in a run without shards,
+            so results from all shards, merged in chunk order (see fvf.results.merge_shards),
+            are the same as those of one run. Not supported with num_full_traces.
+            Default is None, in which case all chunks are run.
+        callbacks : list
+            of callables, each called with a fvf.telemetry.ChunkMetrics as each chunk of
+            trials is collected, with a fvf.telemetry.ConditionMetrics when a condition is
+            finished, and with a fvf.telemetry.RunMetrics at the end of the run, that record
+            wall time, trials/sec, fixations/sec, mean number of fixations per trial,
+            peak memory and random streams. E.g., fvf.telemetry.MetricsWriter writes them
+            to a JSON-lines file. Default is None.
 
         Returns
         -------
         results : dict
             where each key is tuple representing conditions, and the
-            value for each key is a list of all trials
+            value for each key is a TrialBatch with all trials,
+            or a fvf.accumulate.ConditionAccumulator if accumulate is True.
+            With shard, only conditions with at least one chunk in the shard are included.
+            After runall returns, the precision attribute is a dict that maps each
+            condition to a Precision, with the number of trials run and the
+            precision achieved, and the chunk_sizes attribute is a dict that maps each
+            condition to a list of (chunk index, number of trials) tuples for the chunks
+            in its results, in order.
         """
-        np.random.seed(self.seed)
-        results = {}
-        for search_type in self.task_difficulties:
-            print(f'Running trials for task_difficulty {search_type}')
-            for display_size in self.display_sizes:
-                print(f'\tRunning trials for display size {display_size}')
-                for target_present in self.target_presence:
-                    print(f'\t\tRunning trials with target_present = {target_present}')
-                    if fvf_params:
-                        fvf = FVFModel(**fvf_params)
-                    else:
-                        fvf = FVFModel()
+        if record not in RECORD_LEVELS:
+            raise ValueError(f'record must be one of {RECORD_LEVELS}, but was: {record}')
+        if shard is not None:
+            shard_ind, num_shards = shard
+            if not 0 <= shard_ind < num_shards:
+                raise ValueError(f'shard must be (shard index, number of shards) with 0 <= index < number, '
+                                 f'but was: {shard}')
+            if num_full_traces:
+                raise ValueError('num_full_traces is not supported with shard, since reservoir sampling '
+                                 'needs every chunk of a condition')
+        if accumulate:
+            record = 'summary'
+        callbacks = list(callbacks) if callbacks else []
+        start = time.perf_counter()
+        fvf_params = dict(fvf_params) if fvf_params else {}
+        FVFModel(**fvf_params)  # raise here for invalid parameters, instead of in a worker
+        run_record = 'full' if num_full_traces else record
+        if checkpoint_dir is not None:
+            checkpoint = Checkpoint(checkpoint_dir, self._config(fvf_params, record, num_full_traces, shard))
+        self.full_traces = {}
+        self.precision = {}
+        self.chunk_sizes = {}
 
-                    trials = self._run_one_condition(fvf, search_type, display_size, target_present,
-                                                     self.target, self.trials_per_condition)
-                    results[(search_type, display_size, target_present)] = trials
+        conditions = self.conditions
+        # streams are identified by condition, not by its position in conditions, so a condition
+        # gets the same random numbers, and the same cache keys, in runs with different conditions
+        condition_ids = [stream_id(*condition) for condition in conditions]
+        chunks = [[] for _ in conditions]
+        chunk_sizes = [[] for _ in conditions]
+        num_chunks = [0 for _ in conditions]
+        accumulators = [ConditionAccumulator(condition[2]) for condition in conditions]
+        if num_full_traces:
+            reservoirs = [TraceReservoir(num_full_traces,
+                                         np.random.default_rng(np.random.SeedSequence(
+                                             self.seed, spawn_key=(RESERVOIR_STREAM_TAG, condition_id))))
+                          for condition_id in condition_ids]
+            if checkpoint_dir is not None:
+                for condition_ind, reservoir in enumerate(reservoirs):
+                    checkpoint.load_reservoir(condition_ind, reservoir)
 
+        chunks_metrics = [[] for _ in conditions]
+        conditions_metrics = []
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+        def make_seed_seq(condition_ind, chunk_ind):
+            if self.common_random_numbers:
+                # same stream for a chunk in every condition, and for every fvf_params
+                return np.random.SeedSequence(self.seed, spawn_key=(CHUNK_STREAM_TAG, chunk_ind))
+            return np.random.SeedSequence(self.seed,
+                                          spawn_key=(CHUNK_STREAM_TAG, condition_ids[condition_ind], chunk_ind))
+
+        def submit(condition_ind, chunk_ind, num_trials):
+            """run chunk in pool, or right away if there is no pool.
+            Returns future, cache key, or None for key if chunk should not be added to cache,
+            and source of chunk; the future's result is (chunk, wall time, peak RSS)"""
+            seed_seq = make_seed_seq(condition_ind, chunk_ind)
+            args = (fvf_params, conditions[condition_ind], self.target, num_trials, self.backend, run_record,
+                    seed_seq, self.common_random_numbers)
+            key = None
+            if self.cache is not None and self.seed is not None:
+                key = Cache.key(kind='chunk',
+                                fvf_params=model_params(FVFModel(**fvf_params)),
+                                condition=list(conditions[condition_ind]),
+                                num_trials=num_trials,
+                                target=self.target,
+                                backend=self.backend,
+                                record=run_record,
+                                seed=self.seed,
+                                spawn_key=list(seed_seq.spawn_key),
+                                common_random_numbers=self.common_random_numbers)
+                load_start = time.perf_counter()
+                chunk = self.cache.get(key)
+                if chunk is not None:
+                    future = Future()
+                    future.set_result((chunk, time.perf_counter() - load_start, telemetry.peak_rss_mb()))
+                    return future, None, 'cache'
+            if executor is not None:
+                return executor.submit(_run_chunk, *args), key, 'run'
+            future = Future()
+            future.set_result(_run_chunk(*args))
+            return future, key, 'run'
+
+        def start_chunk(condition_ind, chunk_ind, num_trials):
+            """start work on a chunk; returns (condition index, chunk index, future, cache key, source),
+            with future None if chunk will be loaded from checkpoint when collected"""
+            if checkpoint_dir is not None and checkpoint.has_chunk(condition_ind, chunk_ind):
+                return condition_ind, chunk_ind, None, None, 'checkpoint'
+            return (condition_ind, chunk_ind) + submit(condition_ind, chunk_ind, num_trials)
+
+        def collect_chunk(condition_ind, chunk_ind, future, key, source):
+            """fold a finished chunk into results; the chunk is only kept if accumulate is False"""
+            reservoir = reservoirs[condition_ind] if num_full_traces else None
+            if future is None:
+                load_start = time.perf_counter()
+                chunk = checkpoint.load_chunk(condition_ind, chunk_ind)
+                wall_time, peak_rss = time.perf_counter() - load_start, telemetry.peak_rss_mb()
+            else:
+                chunk, wall_time, peak_rss = future.result()
+                if key is not None:
+                    self.cache.put(key, chunk)
+                if num_full_traces:
+                    reservoir.add(chunk)
+                    if record != 'full':
+                        chunk = chunk.take(np.arange(len(chunk)), record=record)
+                if checkpoint_dir is not None:
+                    checkpoint.save_chunk(condition_ind, chunk_ind, conditions[condition_ind],
+                                          chunk, reservoir)
+            accumulators[condition_ind].add(chunk)
+            num_chunks[condition_ind] += 1
+            chunk_sizes[condition_ind].append((chunk_ind, len(chunk)))
+            if not accumulate:
+                chunks[condition_ind].append(chunk)
+            if callbacks:
+                metrics = telemetry.chunk_metrics(conditions[condition_ind], chunk_ind, source, chunk,
+                                                  wall_time, peak_rss, self.seed,
+                                                  make_seed_seq(condition_ind, chunk_ind).spawn_key)
+                chunks_metrics[condition_ind].append(metrics)
+                for callback in callbacks:
+                    callback(metrics)
+
+        # without a pool, each chunk is run only when it is about to be collected
+        max_in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER if executor is not None else 1
+        running = list(range(len(conditions)))
+        num_chunks_per_condition = len(self._next_chunk_sizes(0))
+        if shard is not None and self.is_sequential:
+            running = [condition_ind for condition_ind in running if condition_ind % num_shards == shard_ind]
+        try:
+            while running:
+                # find the next round of chunks for every condition still running
+                work = deque()
+                for condition_ind in running:
+                    num_trials = accumulators[condition_ind].num_trials
+                    if num_trials == 0:
+                        logger.info(f'running trials for condition {conditions[condition_ind]}')
+                    for chunk_offset, chunk_size in enumerate(self._next_chunk_sizes(num_trials)):
+                        chunk_ind = num_chunks[condition_ind] + chunk_offset
+                        work_ind = condition_ind * num_chunks_per_condition + chunk_ind
+                        if shard is not None and not self.is_sequential and work_ind % num_shards != shard_ind:
+                            continue
+                        work.append((condition_ind, chunk_ind, chunk_size))
+                # keep at most max_in_flight chunks started but not collected, and collect them
+                # in the order they were started, so results do not depend on workers.
+                # Each chunk is dropped, or folded into an accumulator, as soon as it is collected
+                in_flight = deque()
+                while work or in_flight:
+                    while work and len(in_flight) < max_in_flight:
+                        in_flight.append(start_chunk(*work.popleft()))
+                    collect_chunk(*in_flight.popleft())
+
+                still_running = []
+                for condition_ind in running:
+                    if accumulators[condition_ind].num_trials == 0:  # no chunks in this shard
+                        continue
+                    condition = conditions[condition_ind]
+                    condition_precision = self.condition_precision(accumulators[condition_ind])
+                    self.precision[condition] = condition_precision
+                    if (self.is_sequential
+                            and not condition_precision.converged
+                            and condition_precision.num_trials < self.max_trials_per_condition):
+                        still_running.append(condition_ind)
+                    elif callbacks:
+                        metrics = telemetry.condition_metrics(condition, chunks_metrics[condition_ind])
+                        conditions_metrics.append(metrics)
+                        for callback in callbacks:
+                            callback(metrics)
+                running = still_running
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        results = {}
+        for condition_ind, condition in enumerate(conditions):
+            if not chunk_sizes[condition_ind]:
+                continue
+            self.chunk_sizes[condition] = chunk_sizes[condition_ind]
+            condition_chunks = chunks[condition_ind]
+            if accumulate:
+                results[condition] = accumulators[condition_ind]
+            else:
+                results[condition] = (condition_chunks[0] if len(condition_chunks) == 1
+                                      else TrialBatch.concatenate(condition_chunks))
+            if num_full_traces:
+                self.full_traces[condition] = reservoirs[condition_ind].sample()
+        if callbacks:
+            metrics = telemetry.run_metrics(conditions_metrics, time.perf_counter() - start, workers, shard)
+            for callback in callbacks:
+                callback(metrics)
         return results
@@ -0,0 +1,266 @@
+"""Parameter sweeps over FVFModel hyperparameters.
+
+Runs every (parameter set x condition) cell and returns summary statistics
+in a labelled multidimensional array. Simulations are shared between cells
+wherever the model allows it:
+- fixation_duration only rescales reaction times, so it never causes new
+  simulations; trials are simulated once and reaction times computed as
+  number of fixations * fixation_duration.
+- a condition only depends on the maximum number of items for its own
+  search type, so e.g. changing max_items_by_search_type.easy does not
+  re-run 'medium' or 'hard' conditions.
+- prev_patch_memory is capped at (display size - 1) by the model, so values
+  at or above that cap share simulations.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import Cache
+from .model import FVFModel, MaxItemsBySearchType, TrialBatch
+from .simulator import Simulator, stream_id
+
+PARAM_NAMES = ('min_items', 'max_items_by_search_type', 'prev_patch_memory',
+               'fixation_duration', 'quit_threshold')
+
+STATISTICS = ('mean_RT', 'std_RT', 'error_rate', 'mean_num_fixations', 'std_num_fixations', 'num_trials')
+
+DEFAULT_CONDITIONS = tuple(
+    (search_type, display_size, target_present)
+    for search_type in ('easy', 'medium', 'hard')
+    for display_size in (6, 12, 18)
+    for target_present in (True, False)
+)
+
+
+class SweepResults:
+    """labelled multidimensional array of summary statistics
+    returned by fvf.sweep.run
+
+    Attributes
+    ----------
+    dims : tuple
+        names of dimensions of values. Either the names of parameters in the grid,
+        followed by 'condition' and 'statistic', or ('param_set', 'condition', 'statistic')
+        when sweep was run on a list of parameter sets.
+    coords : dict
+        maps each dimension name to a list of labels for that dimension.
+        For 'param_set', labels are dicts of parameters.
+    values : numpy.ndarray
+        summary statistics, with one axis for each dimension in dims.
+        Statistics are those in fvf.sweep.STATISTICS; mean_RT and std_RT are
+        computed from correct trials only, as in fvf.munge.reaction_times.
+    """
+    def __init__(self, dims, coords, values):
+        self.dims = dims
+        self.coords = coords
+        self.values = values
+
+    def sel(self, **labels):
+        """select from values by label
+
+        Parameters
+        ----------
+        **labels
+            where each keyword is a dimension name, and the value is
+            the label to select along that dimension
+
+        Returns
+        -------
+        selected : SweepResults or numpy.ndarray
+            SweepResults with the selected dimensions removed,
+            or the selected value if all dimensions were selected
+
+        Examples
+        --------
+        >>> results.sel(prev_patch_memory=4, condition=('hard', 18, False), statistic='mean_RT')
+        """
+        index = []
+        dims = []
+        for dim in self.dims:
+            if dim in labels:
+                index.append(self.coords[dim].index(labels[dim]))
+            else:
+                index.append(slice(None))
+                dims.append(dim)
+        unknown = set(labels) - set(self.dims)
+        if unknown:
+            raise ValueError(f'not dimensions of SweepResults: {unknown}')
+        values = self.values[tuple(index)]
+        if not dims:
+            return values
+        return SweepResults(tuple(dims), {dim: self.coords[dim] for dim in dims}, values)
+
+
+def _param_sets(grid):
+    """convert grid into list of parameter dicts, plus dims and coords for parameters"""
+    if isinstance(grid, dict):
+        for name in grid:
+            if name not in PARAM_NAMES:
+                raise ValueError(f'not a parameter of FVFModel: {name}')
+        names = tuple(grid.keys())
+        coords = {name: list(grid[name]) for name in names}
+        param_sets = [dict(zip(names, values)) for values in itertools.product(*coords.values())]
+        return param_sets, names, coords
+    else:
+        param_sets = [dict(param_set) for param_set in grid]
+        for param_set in param_sets:
+            for name in param_set:
+                if name not in PARAM_NAMES:
+                    raise ValueError(f'not a parameter of FVFModel: {name}')
+        return param_sets, ('param_set',), {'param_set': param_sets}
+
+
+def _simulation_key(fvf_model, condition):
+    """parameters that determine the simulated fixations for a condition.
+    Cells with the same key share one simulation"""
+    search_type, display_size, target_present = condition
+    return (fvf_model.min_items,
+            getattr(fvf_model.max_items_by_search_type, search_type),
+            min(fvf_model.prev_patch_memory, display_size - 1),
+            fvf_model.quit_threshold,
+            condition)
+
+
+def _simulate(key, num_trials, target, seed, common_random_numbers):
+    """run one simulation, with fixation_duration of 1,
+    so reaction times are numbers of fixations.
+    Module-level so it can run in a process pool"""
+    min_items, max_items, prev_patch_memory, quit_threshold, condition = key
+    search_type, display_size, target_present = condition
+    max_items_by_search_type = MaxItemsBySearchType(**{search_type: max_items,
+                                                       **{other: max_items
+                                                          for other in MaxItemsBySearchType._fields
+                                                          if other != search_type}})
+    fvf_model = FVFModel(min_items=min_items,
+                         max_items_by_search_type=max_items_by_search_type,
+                         prev_patch_memory=prev_patch_memory,
+                         fixation_duration=1,
+                         quit_threshold=quit_threshold)
+    trials = Simulator._run_one_condition(fvf_model, search_type, display_size, target_present,
+                                          target, num_trials, record='summary',
+                                          rng=np.random.default_rng(seed),
+                                          common_random_numbers=common_random_numbers)
+    return trials.response, trials.num_fixations
+
+
+def _statistics(response, num_fixations, target_present, fixation_duration):
+    """summary statistics for one cell, in the order of STATISTICS"""
+    correct = response == target_present
+    correct_RTs = num_fixations[correct].astype(np.float64) * fixation_duration
+    if correct_RTs.size > 0:
+        mean_RT, std_RT = np.mean(correct_RTs), np.std(correct_RTs)
+    else:
+        mean_RT = std_RT = np.nan
+    num_fixations = num_fixations.astype(np.float64)
+    return (mean_RT,
+            std_RT,
+            1 - np.mean(correct),
+            np.mean(num_fixations),
+            np.std(num_fixations),
+            response.shape[0])
+
+
+def run(grid, conditions=DEFAULT_CONDITIONS, num_trials=10000, target=1, seed=42, workers=None,
+        common_random_numbers=False, cache=None):
+    """run a parameter sweep
+
+    Parameters
+    ----------
+    grid : dict, list
+        If a dict, maps names of FVFModel parameters to lists of values,
+        and every combination of values is run. If a list, each element is
+        a dict of parameters, e.g. sampled at random, and each is run.
+        Parameters not specified take the default values of FVFModel.
+        Names of parameters are those in fvf.sweep.PARAM_NAMES.
+    conditions : list
+        of (search type, display size, target present) tuples.
+        Default is all 18 conditions that Simulator runs by default.
+    num_trials : int
+        number of trials to run for each cell. Default is 10000.
+    target : int
+        value that represents target. Default is 1.
+    seed : int
+        seed for random number generator. Each distinct simulation is seeded
+        from this seed and a hash of its parameters and condition (see
+        fvf.simulator.stream_id), so results do not depend on the number of workers,
+        and a simulation has the same trials, and the same cache key, in every sweep
+        that includes it. Default is 42.
+    workers : int
+        number of worker processes. Default is None, in which case
+        all simulations are run in this process.
+    common_random_numbers : bool
+        if True, every simulation is seeded with the same seed, and the i-th trial
+        of every cell uses the same random numbers, as for Simulator. Reduces the
+        variance of differences between cells. Default is False.
+    cache : fvf.cache.Cache
+        if specified, simulations that are already in this cache are loaded
+        instead of being run again, and new simulations are added to it.
+        Default is None.
+
+    Returns
+    -------
+    sweep_results : SweepResults
+
+    Examples
+    --------
+    >>> results = fvf.sweep.run({'prev_patch_memory': [0, 2, 4], 'fixation_duration': [200, 250, 300]},
+    ...                         conditions=[('hard', 18, True), ('hard', 18, False)])
+    >>> results.sel(statistic='mean_RT').values.shape
+    (3, 3, 2)
+    """
+    param_sets, param_dims, param_coords = _param_sets(grid)
+    conditions = [tuple(condition) for condition in conditions]
+    fvf_models = [FVFModel(**param_set) for param_set in param_sets]
+
+    # find distinct simulations
+    keys = []
+    key_inds = {}
+    for fvf_model in fvf_models:
+        for condition in conditions:
+            key = _simulation_key(fvf_model, condition)
+            if key not in key_inds:
+                key_inds[key] = len(keys)
+                keys.append(key)
+    if common_random_numbers:
+        seeds = [seed] * len(keys)
+    else:
+        seeds = [np.random.SeedSequence(seed, spawn_key=(stream_id(*key),)) for key in keys]
+    simulated = [None] * len(keys)
+    if cache is not None:
+        # a simulation's random stream is determined by seed and key, so both are in its cache key
+        cache_keys = [Cache.key(kind='sweep', simulation=key, num_trials=num_trials, target=target,
+                                seed=seed, common_random_numbers=common_random_numbers)
+                      for key in keys]
+        for ind, cache_key in enumerate(cache_keys):
+            batch = cache.get(cache_key)
+            if batch is not None:
+                simulated[ind] = batch.response, batch.num_fixations
+    to_run = [ind for ind, result in enumerate(simulated) if result is None]
+    args = ([keys[ind] for ind in to_run], [num_trials] * len(to_run), [target] * len(to_run),
+            [seeds[ind] for ind in to_run], [common_random_numbers] * len(to_run))
+    if workers is None:
+        ran = list(map(_simulate, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ran = list(executor.map(_simulate, *args))
+    for ind, (response, num_fixations) in zip(to_run, ran):
+        simulated[ind] = response, num_fixations
+        if cache is not None:
+            display_size = keys[ind][-1][1]
+            cache.put(cache_keys[ind], TrialBatch(response, num_fixations, num_fixations, display_size))
+
+    values = np.zeros((len(param_sets), len(conditions), len(STATISTICS)))
+    for param_ind, fvf_model in enumerate(fvf_models):
+        for condition_ind, condition in enumerate(conditions):
+            response, num_fixations = simulated[key_inds[_simulation_key(fvf_model, condition)]]
+            values[param_ind, condition_ind] = _statistics(response, num_fixations, condition[2],
+                                                           fvf_model.fixation_duration)
+
+    dims = param_dims + ('condition', 'statistic')
+    coords = dict(param_coords)
+    coords['condition'] = conditions
+    coords['statistic'] = list(STATISTICS)
+    shape = tuple(len(coords[dim]) for dim in dims)
+    return SweepResults(dims, coords, values.reshape(shape))
@@ -0,0 +1,271 @@
+"""Telemetry for Simulator.runall: timing, throughput and memory of each
+chunk of trials, each condition, and the whole run.
+
+Simulator.runall takes a list of callbacks. Each is called with a
+ChunkMetrics as soon as a chunk of trials is collected, a ConditionMetrics
+when a condition is finished, and a RunMetrics when the run is finished.
+Metrics of chunks are measured in the process that ran them, so they are
+the same whether or not trials run in a process pool.
+
+MetricsWriter is a callback that writes every record as one line of JSON,
+so that the throughput of many jobs can be monitored by reading their
+metrics files, e.g.::
+
+    with MetricsWriter('results/metrics.jsonl') as writer:
+        sim.runall(callbacks=[writer])
+
+The command-line interface always writes `metrics.jsonl` in the results directory.
+"""
+import json
+import sys
+import time
+from typing import NamedTuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# where a chunk of trials came from
+SOURCES = ('run', 'cache', 'checkpoint')
+
+
+def peak_rss_mb():
+    """peak resident set size of this process so far, in MiB,
+    or None if it can't be measured on this platform"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+
+def _per_sec(count, wall_time):
+    return count / wall_time if wall_time > 0 else float('nan')
+
+
+class ChunkMetrics(NamedTuple):
+    """NamedTuple passed to callbacks of Simulator.runall for each chunk of trials
+
+    Fields
+    ------
+    condition : tuple
+        (search type, display size, target present)
+    chunk_ind : int
+        index of chunk within condition
+    source : str
+        one of {'run', 'cache', 'checkpoint'}: whether the chunk was simulated,
+        or loaded from a cache or a checkpoint
+    num_trials : int
+        number of trials in chunk
+    num_fixations : int
+        total number of fixations in all trials in chunk
+    wall_time : float
+        time to simulate the chunk, or to load it, in seconds
+    trials_per_sec : float
+    fixations_per_sec : float
+    mean_num_fixations : float
+        mean number of fixations per trial
+    peak_rss_mb : float
+        peak resident set size, in MiB, of the process that ran the chunk,
+        measured after it was run. None if it can't be measured on this platform
+    seed : int
+        seed of Simulator
+    spawn_key : tuple
+        spawn key of the numpy.random.SeedSequence of the chunk; together with
+        seed, it identifies the random stream used by the chunk
+    """
+    condition: tuple
+    chunk_ind: int
+    source: str
+    num_trials: int
+    num_fixations: int
+    wall_time: float
+    trials_per_sec: float
+    fixations_per_sec: float
+    mean_num_fixations: float
+    peak_rss_mb: float
+    seed: int
+    spawn_key: tuple
+
+
+class ConditionMetrics(NamedTuple):
+    """NamedTuple passed to callbacks of Simulator.runall when a condition is finished
+
+    Fields
+    ------
+    condition : tuple
+        (search type, display size, target present)
+    num_chunks : int
+        number of chunks of trials
+    num_trials : int
+    num_fixations : int
+    wall_time : float
+        sum of wall times of chunks, in seconds. With a process pool, chunks run at
+        the same time, so this is more than the time that passed
+    trials_per_sec : float
+    fixations_per_sec : float
+    mean_num_fixations : float
+    peak_rss_mb : float
+        largest peak resident set size of any chunk, in MiB
+    seed : int
+    spawn_keys : list
+        spawn keys of chunks, in order
+    """
+    condition: tuple
+    num_chunks: int
+    num_trials: int
+    num_fixations: int
+    wall_time: float
+    trials_per_sec: float
+    fixations_per_sec: float
+    mean_num_fixations: float
+    peak_rss_mb: float
+    seed: int
+    spawn_keys: list
+
+
+class RunMetrics(NamedTuple):
+    """NamedTuple passed to callbacks of Simulator.runall when the run is finished
+
+    Fields
+    ------
+    num_conditions : int
+        number of conditions run
+    num_trials : int
+    num_fixations : int
+    wall_time : float
+        time from start to end of run, in seconds
+    trials_per_sec : float
+    fixations_per_sec : float
+    peak_rss_mb : float
+        peak resident set size, in MiB, of this process and of any chunk
+    workers : int
+        number of worker processes, or None
+    shard : tuple
+        (shard index, number of shards), or None
+    """
+    num_conditions: int
+    num_trials: int
+    num_fixations: int
+    wall_time: float
+    trials_per_sec: float
+    fixations_per_sec: float
+    peak_rss_mb: float
+    workers: int
+    shard: tuple
+
+
+def _max_or_none(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def chunk_metrics(condition, chunk_ind, source, chunk, wall_time, peak_rss, seed, spawn_key):
+    """make ChunkMetrics for a chunk of trials"""
+    num_trials = len(chunk)
+    num_fixations = int(chunk.num_fixations.sum())
+    return ChunkMetrics(condition=condition,
+                        chunk_ind=chunk_ind,
+                        source=source,
+                        num_trials=num_trials,
+                        num_fixations=num_fixations,
+                        wall_time=wall_time,
+                        trials_per_sec=_per_sec(num_trials, wall_time),
+                        fixations_per_sec=_per_sec(num_fixations, wall_time),
+                        mean_num_fixations=num_fixations / num_trials if num_trials else float('nan'),
+                        peak_rss_mb=peak_rss,
+                        seed=seed,
+                        spawn_key=tuple(spawn_key))
+
+
+def condition_metrics(condition, chunks_metrics):
+    """make ConditionMetrics from the ChunkMetrics of all chunks of a condition"""
+    num_trials = sum(metrics.num_trials for metrics in chunks_metrics)
+    num_fixations = sum(metrics.num_fixations for metrics in chunks_metrics)
+    wall_time = sum(metrics.wall_time for metrics in chunks_metrics)
+    return ConditionMetrics(condition=condition,
+                            num_chunks=len(chunks_metrics),
+                            num_trials=num_trials,
+                            num_fixations=num_fixations,
+                            wall_time=wall_time,
+                            trials_per_sec=_per_sec(num_trials, wall_time),
+                            fixations_per_sec=_per_sec(num_fixations, wall_time),
+                            mean_num_fixations=num_fixations / num_trials if num_trials else float('nan'),
+                            peak_rss_mb=_max_or_none(metrics.peak_rss_mb for metrics in chunks_metrics),
+                            seed=chunks_metrics[0].seed if chunks_metrics else None,
+                            spawn_keys=[metrics.spawn_key for metrics in chunks_metrics])
+
+
+def run_metrics(conditions_metrics, wall_time, workers, shard):
+    """make RunMetrics from the ConditionMetrics of all conditions"""
+    num_trials = sum(metrics.num_trials for metrics in conditions_metrics)
+    num_fixations = sum(metrics.num_fixations for metrics in conditions_metrics)
+    return RunMetrics(num_conditions=len(conditions_metrics),
+                      num_trials=num_trials,
+                      num_fixations=num_fixations,
+                      wall_time=wall_time,
+                      trials_per_sec=_per_sec(num_trials, wall_time),
+                      fixations_per_sec=_per_sec(num_fixations, wall_time),
+                      peak_rss_mb=_max_or_none([peak_rss_mb()]
+                                               + [metrics.peak_rss_mb for metrics in conditions_metrics]),
+                      workers=workers,
+                      shard=shard)
+
+
+# value of 'event' key in each line written by MetricsWriter
+EVENTS = {ChunkMetrics: 'chunk', ConditionMetrics: 'condition', RunMetrics: 'run'}
+
+
+class MetricsWriter:
+    """callback for Simulator.runall that writes each ChunkMetrics, ConditionMetrics
+    and RunMetrics as one line of JSON, with an 'event' key that is one of
+    {'chunk', 'condition', 'run'} and a 'timestamp' key, in seconds since the epoch.
+    Lines are flushed as they are written, so a metrics file can be read while a run is going.
+    """
+    def __init__(self, path, mode='w'):
+        """__init__ method
+
+        Parameters
+        ----------
+        path : str
+            path to JSON-lines file
+        mode : str
+            mode used to open file, 'w' or 'a'. Default is 'w'.
+        """
+        if mode not in ('w', 'a'):
+            raise ValueError(f"mode must be 'w' or 'a', but was: {mode}")
+        self.path = path
+        self._fp = open(path, mode)
+
+    def __call__(self, metrics):
+        record = {'event': EVENTS[type(metrics)], 'timestamp': time.time()}
+        record.update(metrics._asdict())
+        self._fp.write(json.dumps(record) + '\n')
+        self._fp.flush()
+
+    def close(self):
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_metrics(path):
+    """read metrics file written by MetricsWriter
+
+    Parameters
+    ----------
+    path : str
+        path to JSON-lines file
+
+    Returns
+    -------
+    records : list
+        of dicts, one per line, in order
+    """
+    with open(path) as fp:
+        return [json.loads(line) for line in fp if line.strip()]
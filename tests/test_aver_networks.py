@@ -0,0 +1,87 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from fvf.model import Trial, TrialBatch
+from fvf.simulator import make_search_arrs
+
+HAS_NENGO = importlib.util.find_spec('nengo') is not None
+if HAS_NENGO:
+    import nengo
+
+    from aver.networks.abstract import ActiveVision
+    from aver.networks.fvf import FVFNetwork, run_trials
+
+NUM_TRIALS = 8
+DISPLAY_SIZE = 6
+NETWORK_PARAMS = {'n_neurons': 30, 'max_fixations': 12}
+
+
+@unittest.skipUnless(HAS_NENGO, 'nengo not installed')
+class TestFVFNetwork(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.present_arrs = make_search_arrs(NUM_TRIALS, DISPLAY_SIZE, True, rng=rng)
+        self.absent_arrs = make_search_arrs(NUM_TRIALS, DISPLAY_SIZE, False, rng=rng)
+
+    def tearDown(self):
+        pass
+
+    def test_abstract(self):
+        class NoNets(ActiveVision):
+            pass
+
+        with self.assertRaises(NotImplementedError):
+            NoNets()
+
+    def test_run_trials(self):
+        trials = run_trials('medium', self.present_arrs, record='full', seed=42, **NETWORK_PARAMS)
+        self.assertIsInstance(trials, TrialBatch)
+        self.assertEqual(len(trials), NUM_TRIALS)
+        np.testing.assert_array_equal(trials.reaction_time, trials.num_fixations.astype(int) * 250)
+        self.assertTrue(np.all(trials.num_fixations >= 1))
+        self.assertTrue(np.all(trials.num_fixations <= NETWORK_PARAMS['max_fixations']))
+        for trial, search_arr in zip(trials, self.present_arrs):
+            self.assertIsInstance(trial, Trial)
+            self.assertEqual(len(trial.fix_locs), trial.num_fixations)
+            # no patch is revisited while it is in memory of 4 patches
+            for step, fix_loc in enumerate(trial.fix_locs):
+                self.assertNotIn(fix_loc, trial.fix_locs[max(step - 4, 0):step])
+            self.assertTrue(all(1 <= fvf_size <= 7 for fvf_size in trial.fvf_sizes))
+            target_in_last_fvf = 1 in trial.fvf_per_fix[-1]
+            if trial.response:
+                self.assertTrue(target_in_last_fvf)
+            for fvf in trial.fvf_per_fix[:-1]:
+                # target was not found on any earlier fixation
+                self.assertNotIn(1, fvf)
+        # with a fvf of up to 7 items in a display of 6, the target is nearly always found
+        self.assertGreater(np.mean(trials.response), 0.5)
+
+    def test_target_absent(self):
+        trials = run_trials('hard', self.absent_arrs, record='summary', seed=42, **NETWORK_PARAMS)
+        self.assertFalse(np.any(trials.response))
+        # quit search after seeing more than 85% of display, at least 6 fixations of 1 item
+        self.assertTrue(np.all(trials.num_fixations >= 5))
+
+    def test_reset_with_new_search_arrs(self):
+        net = FVFNetwork('hard', self.absent_arrs, seed=42, **NETWORK_PARAMS)
+        with nengo.Simulator(net, progress_bar=False) as sim:
+            sim.run(net.duration)
+            absent_trials = net.trials(sim, record='trace')
+            net.set_search_arrs(self.present_arrs)
+            sim.reset(seed=1)
+            sim.run(net.duration)
+            present_trials = net.trials(sim, record='trace')
+        self.assertFalse(np.any(absent_trials.response))
+        self.assertTrue(np.any(present_trials.response))
+        with self.assertRaises(ValueError):
+            net.set_search_arrs(self.present_arrs[:2])
+
+    def test_bad_fixation_duration(self):
+        with self.assertRaises(ValueError):
+            FVFNetwork('easy', self.present_arrs, dt=0.003)
+
+
+if __name__ == '__main__':
+    unittest.main()
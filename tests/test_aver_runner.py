@@ -0,0 +1,86 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fvf.simulator import make_search_arrs
+
+HAS_NENGO = importlib.util.find_spec('nengo') is not None
+if HAS_NENGO:
+    import nengo
+
+    from aver.networks.fvf import FVFNetwork
+    from aver.networks.runner import Runner, RunnerTimings, run_conditions
+
+NUM_TRIALS = 6
+DISPLAY_SIZE = 6
+NETWORK_PARAMS = {'n_neurons': 30, 'max_fixations': 10}
+
+
+def _cache_files(cache_dir):
+    return sorted(name for _, _, names in os.walk(cache_dir) for name in names if name.endswith('.nco'))
+
+
+@unittest.skipUnless(HAS_NENGO, 'nengo not installed')
+class TestRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'decoders')
+        rng = np.random.default_rng(42)
+        self.search_arrs = [make_search_arrs(NUM_TRIALS, DISPLAY_SIZE, True, rng=rng) for _ in range(3)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _network(self):
+        return FVFNetwork('medium', self.search_arrs[0], seed=42, **NETWORK_PARAMS)
+
+    def test_reset_same_as_new_build(self):
+        with Runner(self._network(), cache_dir=self.cache_dir, seed=0) as runner:
+            runner.run(self.search_arrs[0], record='trace')
+            trials = runner.run(self.search_arrs[1], seed=7, record='trace')
+            timings = runner.timings
+        self.assertIsInstance(timings, RunnerTimings)
+        self.assertGreater(timings.build_time, 0)
+        self.assertEqual(len(timings.simulate_times), 2)
+
+        network = FVFNetwork('medium', self.search_arrs[1], seed=42, **NETWORK_PARAMS)
+        network.set_seed(7)
+        with nengo.Simulator(network, seed=7, progress_bar=False) as sim:
+            sim.run(network.duration)
+            expected = network.trials(sim, record='trace')
+        for column in ('response', 'reaction_time', 'num_fixations', 'fix_locs', 'fvf_sizes'):
+            np.testing.assert_array_equal(getattr(trials, column), getattr(expected, column))
+
+    def test_decoder_cache(self):
+        with Runner(self._network(), cache_dir=self.cache_dir):
+            pass
+        cache_files = _cache_files(self.cache_dir)
+        self.assertGreater(len(cache_files), 0)
+        # same ensembles in a new build load decoders from cache, instead of adding new ones
+        with Runner(self._network(), cache_dir=self.cache_dir):
+            pass
+        self.assertEqual(_cache_files(self.cache_dir), cache_files)
+
+    def test_run_conditions(self):
+        kwargs = dict(trials_per_condition=10, display_sizes=(6,), task_difficulties=('medium',),
+                      trials_per_run=4, seed=42, cache_dir=self.cache_dir, **NETWORK_PARAMS)
+        results, timings = run_conditions(**kwargs)
+        self.assertEqual(list(results.keys()), [('medium', 6, True), ('medium', 6, False)])
+        for condition, trials in results.items():
+            self.assertEqual(len(trials), 10)
+            # 3 runs of 4 trials, last one cut to 2
+            self.assertEqual(len(timings[condition].simulate_times), 3)
+        self.assertFalse(np.any(results[('medium', 6, False)].response))
+        results_parallel, _ = run_conditions(workers=2, **kwargs)
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.response, results_parallel[condition].response)
+            np.testing.assert_array_equal(trials.num_fixations, results_parallel[condition].num_fixations)
+        with self.assertRaises(ValueError):
+            run_conditions(trials_per_run=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
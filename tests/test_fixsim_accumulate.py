@@ -0,0 +1,78 @@
+import pickle
+import unittest
+
+import numpy as np
+
+import fvf
+from fvf import accumulate
+from fvf.accumulate import ConditionAccumulator, RT_BIN_EDGES
+from fvf.simulator import Simulator
+
+
+class TestAccumulate(unittest.TestCase):
+    def setUp(self):
+        an_fvf_model = fvf.FVFModel()
+        self.trials = Simulator._run_one_condition(an_fvf_model, 'hard', 12, True, num_trials=500,
+                                                   record='summary', rng=np.random.default_rng(42))
+
+    def tearDown(self):
+        pass
+
+    def test_add(self):
+        acc = ConditionAccumulator(True)
+        acc.add(self.trials)
+        correct = self.trials.response
+        self.assertEqual(acc.num_trials, 500)
+        self.assertEqual(acc.num_correct, np.count_nonzero(correct))
+        self.assertAlmostEqual(acc.mean_RT, np.mean(self.trials.reaction_time[correct]))
+        self.assertAlmostEqual(acc.std_RT, np.std(self.trials.reaction_time[correct]))
+        self.assertAlmostEqual(acc.mean_error_RT, np.mean(self.trials.reaction_time[~correct]))
+        self.assertAlmostEqual(acc.std_error_RT, np.std(self.trials.reaction_time[~correct]))
+        self.assertAlmostEqual(acc.error_rate, 1 - np.mean(correct))
+        self.assertAlmostEqual(acc.mean_num_fixations, np.mean(self.trials.num_fixations))
+        self.assertAlmostEqual(acc.std_num_fixations, np.std(self.trials.num_fixations))
+        np.testing.assert_array_equal(acc.RT_counts, np.histogram(self.trials.reaction_time, bins=RT_BIN_EDGES)[0])
+
+    def test_merge_exact(self):
+        acc_all = ConditionAccumulator(True)
+        acc_all.add(self.trials)
+        accs = []
+        for start in range(0, 500, 150):
+            acc = ConditionAccumulator(True)
+            acc.add(self.trials.take(np.arange(start, min(start + 150, 500))))
+            accs.append(acc)
+        merged = accs[0]
+        for acc in accs[1:]:
+            merged = merged.merge(acc)
+        self.assertEqual(merged, acc_all)
+        self.assertEqual(merged.mean_RT, acc_all.mean_RT)
+        # merging in a different order gives the same accumulator
+        merged_reversed = accs[-1]
+        for acc in accs[-2::-1]:
+            merged_reversed = merged_reversed.merge(acc)
+        self.assertEqual(merged_reversed, acc_all)
+        # accumulators can be sent between processes
+        self.assertEqual(pickle.loads(pickle.dumps(merged)), acc_all)
+
+    def test_merge_different_conditions_raises(self):
+        with self.assertRaises(ValueError):
+            ConditionAccumulator(True).merge(ConditionAccumulator(False))
+
+    def test_merge_dicts(self):
+        sim = Simulator(trials_per_condition=100, display_sizes=(6,), task_difficulties=('easy',))
+        first = sim.runall(accumulate=True)
+        sim.seed = 43
+        second = sim.runall(accumulate=True)
+        merged = accumulate.merge([first, second])
+        for condition, acc in merged.items():
+            self.assertEqual(acc.num_trials, 200)
+            self.assertEqual(acc, first[condition].merge(second[condition]))
+
+    def test_empty(self):
+        acc = ConditionAccumulator(False)
+        self.assertTrue(np.isnan(acc.mean_RT))
+        self.assertTrue(np.isnan(acc.error_rate))
+
+
+if __name__ == '__main__':
+    unittest.main()
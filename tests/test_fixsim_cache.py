@@ -0,0 +1,116 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import fvf
+from fvf import sweep
+from fvf.cache import Cache, model_params
+from fvf.simulator import Simulator
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = Cache(self.tmp_dir.name)
+        self.rng = np.random.default_rng(42)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _batch(self, num_trials=100):
+        return Simulator._run_one_condition(fvf.FVFModel(), 'hard', 12, True, num_trials=num_trials,
+                                            record='trace', rng=self.rng)
+
+    def test_key(self):
+        key = Cache.key(fvf_params=model_params(fvf.FVFModel()), condition=['hard', 12, True], seed=42)
+        self.assertEqual(key, Cache.key(fvf_params=model_params(fvf.FVFModel(prev_patch_memory=4)),
+                                        condition=['hard', 12, True], seed=np.int64(42)))
+        self.assertNotEqual(key, Cache.key(fvf_params=model_params(fvf.FVFModel()),
+                                           condition=['hard', 12, True], seed=43))
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('missing'))
+        batch = self._batch()
+        self.cache.put('a_key', batch)
+        cached = self.cache.get('a_key')
+        np.testing.assert_array_equal(cached.num_fixations, batch.num_fixations)
+        np.testing.assert_array_equal(cached.fix_locs, batch.fix_locs)
+        self.assertEqual(self.cache.info().num_entries, 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.info().num_entries, 0)
+        self.assertIsNone(self.cache.get('a_key'))
+
+    def test_lru_eviction(self):
+        batch = self._batch()
+        self.cache.put('first', batch)
+        entry_size = self.cache.info().nbytes
+        cache = Cache(self.tmp_dir.name, max_bytes=int(2.5 * entry_size))
+        old = time.time() - 100
+        cache.put('second', batch)
+        os.utime(os.path.join(self.tmp_dir.name, 'second.npz'), (old, old))
+        os.utime(os.path.join(self.tmp_dir.name, 'first.npz'), (old - 10, old - 10))
+        # reading 'first' makes it the most recently used
+        self.assertIsNotNone(cache.get('first'))
+        cache.put('third', batch)
+        self.assertIsNone(cache.get('second'))
+        self.assertIsNotNone(cache.get('first'))
+        self.assertIsNotNone(cache.get('third'))
+        self.assertLessEqual(cache.info().nbytes, cache.max_bytes)
+
+    def test_runall_uses_cache(self):
+        sim = Simulator(trials_per_condition=150, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100, cache=self.cache)
+        results = sim.runall(record='trace')
+        self.assertEqual(self.cache.info().num_entries, 4 * 2)
+        with mock.patch('fvf.simulator._run_chunk', side_effect=AssertionError('should load from cache')):
+            cached = sim.runall(record='trace')
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.num_fixations, cached[condition].num_fixations)
+            np.testing.assert_array_equal(trials.fix_locs, cached[condition].fix_locs)
+        # a different parameter is not in the cache
+        sim.runall(fvf_params={'quit_threshold': 0.9}, record='trace')
+        self.assertEqual(self.cache.info().num_entries, 2 * 4 * 2)
+
+    def test_sweep_uses_cache(self):
+        grid = {'prev_patch_memory': [1, 2]}
+        conditions = [('hard', 6, True), ('hard', 6, False)]
+        results = sweep.run(grid, conditions, num_trials=200, cache=self.cache)
+        with mock.patch('fvf.sweep._simulate', side_effect=AssertionError('should load from cache')):
+            cached = sweep.run(grid, conditions, num_trials=200, cache=self.cache)
+        np.testing.assert_array_equal(results.values, cached.values)
+
+
+    def test_overlapping_sweeps_share_cache(self):
+        conditions = [('hard', 6, True), ('hard', 12, False)]
+        first = sweep.run({'prev_patch_memory': [1, 2]}, conditions, num_trials=200, cache=self.cache)
+        num_entries = self.cache.info().num_entries
+        # second sweep shares prev_patch_memory=2 with the first, in a different position,
+        # and runs conditions in a different order, with one more condition
+        second = sweep.run({'prev_patch_memory': [2, 3]}, [('hard', 18, True)] + conditions[::-1],
+                           num_trials=200, cache=self.cache)
+        # only simulations not in the first sweep are new: 2 for prev_patch_memory=3, and 2 for the new condition
+        self.assertEqual(self.cache.info().num_entries, num_entries + 4)
+        for condition in conditions:
+            np.testing.assert_array_equal(
+                first.sel(prev_patch_memory=2, condition=condition).values,
+                second.sel(prev_patch_memory=2, condition=condition).values
+            )
+
+    def test_runall_different_conditions_share_cache(self):
+        sim = Simulator(trials_per_condition=150, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100, cache=self.cache)
+        results = sim.runall(record='trace')
+        other_sim = Simulator(trials_per_condition=150, display_sizes=(12,), task_difficulties=('hard',),
+                              target_presence=(False, True), chunk_size=100, cache=self.cache)
+        with mock.patch('fvf.simulator._run_chunk', side_effect=AssertionError('should load from cache')):
+            cached = other_sim.runall(record='trace')
+        for condition, trials in cached.items():
+            np.testing.assert_array_equal(trials.fix_locs, results[condition].fix_locs)
+
+
+if __name__ == '__main__':
+    unittest.main()
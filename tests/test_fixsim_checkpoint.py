@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fvf.checkpoint import MANIFEST
+from fvf.simulator import Simulator
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = os.path.join(self.tmp_dir.name, 'checkpoints')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _sim(self):
+        return Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                         chunk_size=100)
+
+    def _assert_same_results(self, results, other_results):
+        self.assertEqual(list(results.keys()), list(other_results.keys()))
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.response, other_results[condition].response)
+            np.testing.assert_array_equal(trials.num_fixations, other_results[condition].num_fixations)
+            np.testing.assert_array_equal(trials.fix_locs, other_results[condition].fix_locs)
+
+    def test_checkpoint_same_results(self):
+        results = self._sim().runall(record='trace')
+        checkpointed = self._sim().runall(record='trace', checkpoint_dir=self.checkpoint_dir)
+        self._assert_same_results(results, checkpointed)
+        with open(os.path.join(self.checkpoint_dir, MANIFEST)) as fp:
+            lines = fp.read().splitlines()
+        # config, then 3 chunks for each of 4 conditions
+        self.assertEqual(len(lines), 1 + 4 * 3)
+
+    def test_resume(self):
+        sim = self._sim()
+        results = sim.runall(record='trace', num_full_traces=5)
+        full_traces = sim.full_traces
+
+        self._sim().runall(record='trace', num_full_traces=5, checkpoint_dir=self.checkpoint_dir)
+        # one reservoir file per condition, and no reservoir state in the manifest
+        reservoir_files = [filename for filename in os.listdir(self.checkpoint_dir)
+                           if filename.startswith('reservoir')]
+        self.assertEqual(len(reservoir_files), 4)
+        manifest_path = os.path.join(self.checkpoint_dir, MANIFEST)
+        with open(manifest_path) as fp:
+            lines = fp.read().splitlines()
+        self.assertTrue(all('reservoir' not in json.loads(line) for line in lines))
+
+        # every chunk completed, so reservoirs are restored from their files
+        sim = self._sim()
+        resumed = sim.runall(record='trace', num_full_traces=5, checkpoint_dir=self.checkpoint_dir)
+        self._assert_same_results(results, resumed)
+        for condition, trace_sample in full_traces.items():
+            np.testing.assert_array_equal(trace_sample.trial_inds, sim.full_traces[condition].trial_inds)
+            np.testing.assert_array_equal(trace_sample.trials.fix_locs, sim.full_traces[condition].trials.fix_locs)
+
+        # simulate a run killed part way through writing the manifest; reservoirs of conditions whose
+        # last chunks are not in the manifest are ahead of it, so those conditions are run again
+        with open(manifest_path, 'w') as fp:
+            fp.write('\n'.join(lines[:6]) + '\n' + lines[6][:10])
+
+        sim = self._sim()
+        resumed = sim.runall(record='trace', num_full_traces=5, checkpoint_dir=self.checkpoint_dir)
+        self._assert_same_results(results, resumed)
+        for condition, trace_sample in full_traces.items():
+            np.testing.assert_array_equal(trace_sample.trial_inds, sim.full_traces[condition].trial_inds)
+        with open(manifest_path) as fp:
+            entries = [json.loads(line) for line in fp.read().splitlines()]
+        chunk_keys = {(entry['condition_ind'], entry['chunk_ind']) for entry in entries[1:]}
+        self.assertEqual(len(chunk_keys), 4 * 3)
+
+    def test_resume_sequential(self):
+        def sequential_sim():
+            return Simulator(display_sizes=(6, 18), task_difficulties=('hard',), rt_tol=100,
+                             chunk_size=100, max_trials_per_condition=2000)
+        results = sequential_sim().runall(record='summary')
+        sequential_sim().runall(record='summary', checkpoint_dir=self.checkpoint_dir)
+        manifest_path = os.path.join(self.checkpoint_dir, MANIFEST)
+        with open(manifest_path) as fp:
+            lines = fp.read().splitlines()
+        with open(manifest_path, 'w') as fp:
+            fp.write('\n'.join(lines[:3]) + '\n')
+        sim = sequential_sim()
+        resumed = sim.runall(record='summary', checkpoint_dir=self.checkpoint_dir)
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.num_fixations, resumed[condition].num_fixations)
+
+    def test_different_config_raises(self):
+        self._sim().runall(record='summary', checkpoint_dir=self.checkpoint_dir)
+        with self.assertRaises(ValueError):
+            self._sim().runall(record='summary', fvf_params={'prev_patch_memory': 2},
+                               checkpoint_dir=self.checkpoint_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+import fvf
+from fvf import exact
+from fvf.munge import RTResults, NumFixationsResults
+from fvf.simulator import Simulator
+
+
+class TestExact(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def tearDown(self):
+        pass
+
+    def _compare_to_simulation(self, search_type, display_size, num_trials=20000):
+        an_fvf_model = fvf.FVFModel()
+        for target_present in (True, False):
+            exact_distribution = exact.distribution(search_type, display_size, target_present, an_fvf_model)
+            probs = exact_distribution.p_response_present + exact_distribution.p_response_absent
+            self.assertAlmostEqual(probs.sum(), 1.0, places=8)
+            exact_mean = np.sum(probs * exact_distribution.num_fixations)
+            exact_std = np.sqrt(np.sum(probs * (exact_distribution.num_fixations - exact_mean) ** 2))
+            trials = Simulator._run_one_condition(an_fvf_model, search_type, display_size, target_present,
+                                                  num_trials=num_trials, rng=self.rng)
+            stderr = exact_std / np.sqrt(num_trials)
+            self.assertLess(abs(trials.num_fixations.mean() - exact_mean), 4 * stderr)
+            self.assertLess(abs(trials.response.mean() - exact_distribution.p_response_present.sum()), 0.02)
+
+    def test_exchangeable_matches_simulation(self):
+        self._compare_to_simulation('hard', 18)
+
+    def test_item_sets_matches_simulation(self):
+        self._compare_to_simulation('medium', 6)
+        self._compare_to_simulation('easy', 12)
+
+    def test_max_states(self):
+        with self.assertRaises(ValueError):
+            exact.distribution('medium', 18, False, max_states=1000)
+
+    def test_reaction_times(self):
+        rt_results = exact.reaction_times(search_types=('hard',), display_sizes=(6, 12, 18), num_points=1000)
+        self.assertIsInstance(rt_results, RTResults)
+        self.assertEqual(rt_results.display_sizes, (6, 12, 18))
+        for condition, RTs in rt_results.RTs_by_condition.items():
+            self.assertEqual(RTs.shape, (1000,))
+        slope = rt_results.mean_RTs_regress_results[('hard', False)].slope
+        self.assertGreater(slope, 0)
+
+    def test_num_fixations(self):
+        nf_results = exact.num_fixations(search_types=('easy', 'hard'), display_sizes=(6,), num_points=1000)
+        self.assertIsInstance(nf_results, NumFixationsResults)
+        self.assertEqual(len(nf_results.conditions), 4)
+
+    def test_defaults(self):
+        rt_results = exact.reaction_times()
+        self.assertEqual(len(rt_results.conditions), 18)
+        for search_type in ('easy', 'medium', 'hard'):
+            for target_present in (True, False):
+                mean_RTs = [rt_results.mean_RTs_by_condition[(search_type, display_size, target_present)]
+                            for display_size in rt_results.display_sizes]
+                self.assertTrue(np.all(np.isfinite(mean_RTs)))
+        nf_results = exact.num_fixations()
+        self.assertEqual(len(nf_results.conditions), 18)
+
+
+if __name__ == '__main__':
+    unittest.main()
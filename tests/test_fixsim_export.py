@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from fvf import export
+from fvf import results as fvf_results
+from fvf.simulator import Simulator
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.results_dirs = []
+        for seed in (42, 43):
+            sim = Simulator(trials_per_condition=50, display_sizes=(6, 12), task_difficulties=('easy', 'hard'),
+                            seed=seed)
+            results_dir = os.path.join(self.tmp_dir.name, f'run{seed}')
+            fvf_results.save(sim.runall(record='summary'), results_dir)
+            self.results_dirs.append(results_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_export(self):
+        paths = export.export(self.results_dirs[0], formats=('png', 'svg'))
+        self.assertEqual(len(paths), len(export.FIGURES) * 2)
+        for figure in export.FIGURES:
+            for fmt in ('png', 'svg'):
+                path = os.path.join(self.results_dirs[0], 'figures', f'{figure}.{fmt}')
+                self.assertIn(path, paths)
+                self.assertGreater(os.path.getsize(path), 0)
+
+    def test_export_workers(self):
+        figures_dir = os.path.join(self.tmp_dir.name, 'figures')
+        paths = export.export(self.results_dirs, formats=('pdf',), figures_dir=figures_dir, workers=2)
+        self.assertEqual(len(paths), len(export.FIGURES) * 2)
+        for results_dir in self.results_dirs:
+            for figure in export.FIGURES:
+                self.assertTrue(os.path.exists(
+                    os.path.join(figures_dir, os.path.basename(results_dir), f'{figure}.pdf')
+                ))
+
+    def test_export_bad_format(self):
+        with self.assertRaises(ValueError):
+            export.export(self.results_dirs[0], formats=('gif',))
+
+
+if __name__ == '__main__':
+    unittest.main()
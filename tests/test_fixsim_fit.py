@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from fvf import fit
+from fvf.simulator import Simulator
+
+
+def simulate_observed(fvf_params, num_trials=300, seed=7):
+    sim = Simulator(trials_per_condition=num_trials, display_sizes=(6, 12), task_difficulties=('hard',), seed=seed)
+    results = sim.runall(fvf_params=fvf_params, record='summary')
+    mean_RTs, std_RTs, error_rates = {}, {}, {}
+    for condition, trials in results.items():
+        correct = trials.response == condition[2]
+        mean_RTs[condition] = np.mean(trials.reaction_time[correct])
+        std_RTs[condition] = np.std(trials.reaction_time[correct])
+        error_rates[condition] = 1 - np.mean(correct)
+    return fit.Observed(mean_RTs, std_RTs, error_rates)
+
+
+class TestFit(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_loss_is_deterministic(self):
+        observed = simulate_observed({'fixation_duration': 250})
+        loss_1 = fit.loss({'fixation_duration': 300}, observed, num_trials=300)
+        loss_2 = fit.loss({'fixation_duration': 300}, observed, num_trials=300)
+        self.assertEqual(loss_1, loss_2)
+        self.assertLess(fit.loss({'fixation_duration': 250}, observed, num_trials=300), loss_1)
+
+    def test_fit_recovers_fixation_duration(self):
+        observed = simulate_observed({'fixation_duration': 300})
+        fit_result = fit.fit(observed, bounds={'fixation_duration': (150, 450)},
+                             num_trials=300, max_evaluations=40)
+        self.assertLess(abs(fit_result.fvf_params['fixation_duration'] - 300), 30)
+        self.assertEqual(fit_result.num_evaluations, len(fit_result.history))
+
+    def test_fit_in_parallel(self):
+        observed = simulate_observed({'prev_patch_memory': 2, 'fixation_duration': 250})
+        bounds = {'prev_patch_memory': (0, 5), 'fixation_duration': (200, 300)}
+        serial = fit.fit(observed, bounds=bounds, num_trials=200, max_evaluations=15)
+        parallel = fit.fit(observed, bounds=bounds, num_trials=200, max_evaluations=15, workers=2)
+        self.assertEqual(serial.fvf_params, parallel.fvf_params)
+        self.assertEqual(serial.loss, parallel.loss)
+
+    def test_bad_param(self):
+        with self.assertRaises(ValueError):
+            fit.fit(fit.Observed({}), bounds={'not_a_param': (0, 1)})
+
+
+if __name__ == '__main__':
+    unittest.main()
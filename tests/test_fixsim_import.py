@@ -0,0 +1,85 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# run in a fresh interpreter, so modules already imported by other tests do not count
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+{statements}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+HEAVY_MODULES = ('matplotlib', 'scipy', 'numba')
+
+
+def _import(statements):
+    """import in a fresh interpreter; returns time taken in seconds, and names of all modules loaded"""
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT.format(statements=statements)],
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result['elapsed'], result['modules']
+
+
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def assertNoHeavyModules(self, modules):
+        heavy = [module for module in modules if module.split('.')[0] in HEAVY_MODULES]
+        self.assertEqual(heavy, [])
+
+    def test_import_fvf(self):
+        _, modules = _import('import fvf')
+        self.assertNoHeavyModules(modules)
+        self.assertNotIn('fvf.simulator', modules)
+
+    def test_import_simulator(self):
+        # what a worker process that runs chunks of trials imports
+        _, modules = _import('import fvf\nfvf.Simulator\nimport fvf.simulator\nfvf.simulator._run_chunk')
+        self.assertNoHeavyModules(modules)
+
+    def test_import_cli(self):
+        _, modules = _import('import fvf.__main__')
+        self.assertNoHeavyModules(modules)
+
+    def test_lazy_submodules(self):
+        _, modules = _import('import fvf\nfvf.munge\nfvf.plot')
+        self.assertIn('scipy', modules)
+        self.assertIn('matplotlib', modules)
+
+    def test_import_time(self):
+        # benchmark: starting a simulation must not pay for the plotting stack,
+        # so it should take less time than importing the plotting module alone
+        simulator_time = min(_import('import fvf\nfvf.Simulator')[0] for _ in range(3))
+        plot_time = min(_import('import fvf.plot')[0] for _ in range(3))
+        self.assertLess(simulator_time, plot_time)
+
+    def test_plot_does_not_change_rcparams(self):
+        # raises CalledProcessError if the assert fails in the subprocess
+        _import(
+            'import matplotlib\n'
+            'matplotlib.use("Agg")\n'
+            'import matplotlib.pyplot as plt\n'
+            'before = dict(plt.rcParams)\n'
+            'import fvf.plot\n'
+            'fvf.plot.standard_devs({("easy", True): [1, 2, 3], ("easy", False): [1, 2, 3]},\n'
+            '                       search_types=("easy",))\n'
+            'assert dict(plt.rcParams) == before'
+        )
+
+    def test_attribute_error(self):
+        import fvf
+        with self.assertRaises(AttributeError):
+            fvf.not_a_submodule
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import fvf
+from fvf import jit
+from fvf.simulator import Simulator
+
+
+class TestJIT(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_fallback_without_numba(self):
+        with mock.patch.object(jit, 'HAS_NUMBA', False):
+            with self.assertWarns(UserWarning):
+                sim = Simulator(backend='numba')
+        self.assertEqual(sim.backend, 'numpy')
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            Simulator(backend='fortran')
+
+    def test_fallback_kernel_leaves_global_random_state(self):
+        search_arrs = np.zeros((50, 12), dtype=int)
+        np.random.seed(7)
+        expected = np.random.random_sample(5)
+        np.random.seed(7)
+        with mock.patch.object(jit, 'HAS_NUMBA', False), mock.patch.object(jit, '_compiled_kernel', None):
+            trials = jit.run_trials(fvf.FVFModel(), 'medium', search_arrs, rng=np.random.default_rng(42))
+        self.assertEqual(len(trials), 50)
+        np.testing.assert_array_equal(np.random.random_sample(5), expected)
+
+    @unittest.skipUnless(jit.HAS_NUMBA, 'numba not installed')
+    def test_same_seed_same_results(self):
+        an_fvf_model = fvf.FVFModel()
+        batches = []
+        for _ in range(2):
+            batches.append(Simulator._run_one_condition(an_fvf_model, 'medium', 12, True,
+                                                        num_trials=500, backend='numba',
+                                                        rng=np.random.default_rng(42)))
+        np.testing.assert_array_equal(batches[0].fix_locs, batches[1].fix_locs)
+        np.testing.assert_array_equal(batches[0].response, batches[1].response)
+
+    @unittest.skipUnless(jit.HAS_NUMBA, 'numba not installed')
+    def test_equivalent_to_numpy_backend(self):
+        an_fvf_model = fvf.FVFModel()
+        num_trials = 5000
+        rng = np.random.default_rng(42)
+        for search_type in ('easy', 'medium', 'hard'):
+            for target_present in (True, False):
+                jit_trials = Simulator._run_one_condition(an_fvf_model, search_type, 18, target_present,
+                                                          num_trials=num_trials, backend='numba', rng=rng)
+                np_trials = Simulator._run_one_condition(an_fvf_model, search_type, 18, target_present,
+                                                         num_trials=num_trials, backend='numpy', rng=rng)
+                jit_nf = jit_trials.num_fixations.astype(float)
+                np_nf = np_trials.num_fixations.astype(float)
+                stderr = np.sqrt(jit_nf.var() / num_trials + np_nf.var() / num_trials)
+                self.assertLess(abs(jit_nf.mean() - np_nf.mean()), 4 * stderr)
+                self.assertLess(abs(jit_trials.response.mean() - np_trials.response.mean()), 0.03)
+                # traces are consistent with responses and seen items
+                for trial in (jit_trials[0], jit_trials[num_trials - 1]):
+                    seen = np.zeros((18,), dtype=bool)
+                    for fix_loc, fvf_size in zip(trial.fix_locs, trial.fvf_sizes):
+                        seen[fix_loc:fix_loc + fvf_size] = True
+                    np.testing.assert_array_equal(seen, trial.seen_arr)
+                    self.assertEqual(trial.response, bool(np.any(trial.fvf_per_fix[-1] == 1)))
+
+    @unittest.skipUnless(jit.HAS_NUMBA, 'numba not installed')
+    def test_respects_prev_patch_memory(self):
+        an_fvf_model = fvf.FVFModel(prev_patch_memory=4)
+        trials = Simulator._run_one_condition(an_fvf_model, 'hard', 18, False, num_trials=200, backend='numba',
+                                              rng=np.random.default_rng(42))
+        for trial in trials:
+            for ind in range(1, len(trial.fix_locs)):
+                self.assertNotIn(trial.fix_locs[ind], trial.fix_locs[max(ind - 4, 0):ind])
+
+
+if __name__ == '__main__':
+    unittest.main()
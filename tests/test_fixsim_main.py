@@ -0,0 +1,120 @@
+import glob
+import json
+import os
+import tempfile
+import unittest
+
+from fvf import munge, telemetry
+from fvf.__main__ import load_config, main
+from fvf.model import MaxItemsBySearchType
+
+CONFIG = {
+    'trials_per_condition': 250,
+    'display_sizes': [6, 12],
+    'task_difficulties': ['medium', 'hard'],
+    'chunk_size': 100,
+    'seed': 7,
+    'fvf_params': {'quit_threshold': 0.8, 'max_items_by_search_type': {'easy': 30, 'medium': 7, 'hard': 1}},
+    'record': 'trace',
+}
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_path = self._write_config(CONFIG)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_config(self, config, name='config.json'):
+        config_path = os.path.join(self.tmp_dir.name, name)
+        with open(config_path, 'w') as fp:
+            json.dump(config, fp)
+        return config_path
+
+    def _path(self, *parts):
+        return os.path.join(self.tmp_dir.name, *parts)
+
+    def assertSameResults(self, results_dir, other_results_dir):
+        def npy_files(a_results_dir):
+            return sorted(os.path.basename(path) for path in glob.glob(os.path.join(a_results_dir, '*.npy')))
+
+        self.assertEqual(npy_files(results_dir), npy_files(other_results_dir))
+        for npy_file in npy_files(results_dir) + ['conditions.json', 'precision.json']:
+            with open(os.path.join(results_dir, npy_file), 'rb') as fp, \
+                    open(os.path.join(other_results_dir, npy_file), 'rb') as other_fp:
+                self.assertEqual(fp.read(), other_fp.read(), msg=npy_file)
+
+    def test_load_config(self):
+        config = load_config(self.config_path)
+        self.assertEqual(config['display_sizes'], (6, 12))
+        self.assertIsInstance(config['fvf_params']['max_items_by_search_type'], MaxItemsBySearchType)
+        with self.assertRaises(ValueError):
+            load_config(self._write_config({'num_trials': 10}, 'bad_config.json'))
+
+    def test_shards_merge_same_as_one_run(self):
+        main(['run', self._path('single'), '--config', self.config_path])
+        shard_dirs = []
+        for shard_ind in range(3):
+            shard_dir = self._path(f'shard{shard_ind}')
+            main(['run', shard_dir, '--config', self.config_path, '--shard', f'{shard_ind}/3'])
+            shard_dirs.append(shard_dir)
+        main(['merge', self._path('merged')] + shard_dirs[::-1])
+        self.assertSameResults(self._path('single'), self._path('merged'))
+        rt_results = munge.reaction_times(self._path('merged'))
+        self.assertEqual(len(rt_results.conditions), 8)
+
+    def test_shards_sequential(self):
+        config = dict(CONFIG, rt_tol=60, max_trials_per_condition=1000, record='summary')
+        config_path = self._write_config(config, 'sequential.json')
+        main(['run', self._path('single'), '--config', config_path])
+        shard_dirs = [self._path(f'shard{shard_ind}') for shard_ind in range(2)]
+        for shard_ind, shard_dir in enumerate(shard_dirs):
+            main(['run', shard_dir, '--config', config_path, '--shard', f'{shard_ind}/2'])
+        main(['merge', self._path('merged')] + shard_dirs)
+        self.assertSameResults(self._path('single'), self._path('merged'))
+
+    def test_merge_missing_shard(self):
+        shard_dir = self._path('shard0')
+        main(['run', shard_dir, '--config', self.config_path, '--shard', '0/2'])
+        with self.assertRaises(ValueError):
+            main(['merge', self._path('merged'), shard_dir])
+
+    def test_bad_shard(self):
+        with self.assertRaises(SystemExit):
+            main(['run', self._path('results'), '--shard', '2/2'])
+
+    def test_metrics_and_profile(self):
+        results_dir = self._path('results')
+        main(['run', results_dir, '--config', self.config_path, '--profile'])
+        records = telemetry.read_metrics(os.path.join(results_dir, 'metrics.jsonl'))
+        events = [record['event'] for record in records]
+        # 3 chunks of 100, 100 and 50 trials for each of 8 conditions
+        self.assertEqual(events.count('chunk'), 24)
+        self.assertEqual(events.count('condition'), 8)
+        self.assertEqual(events[-1], 'run')
+        self.assertEqual(records[-1]['num_trials'], 250 * 8)
+        self.assertTrue(os.path.isfile(os.path.join(results_dir, 'profile.pstats')))
+        with open(os.path.join(results_dir, 'profile.txt')) as fp:
+            self.assertIn('runall', fp.read())
+
+    def test_checkpoints_removed_after_run(self):
+        main(['run', self._path('results'), '--config', self.config_path])
+        self.assertFalse(os.path.exists(self._path('results', 'checkpoints')))
+        main(['run', self._path('shard0'), '--config', self.config_path, '--shard', '0/2'])
+        self.assertFalse(os.path.exists(self._path('shard0', 'checkpoints')))
+        main(['run', self._path('kept'), '--config', self.config_path, '--keep-checkpoints'])
+        self.assertTrue(os.listdir(self._path('kept', 'checkpoints')))
+        self.assertSameResults(self._path('results'), self._path('kept'))
+
+    def test_legacy_arguments(self):
+        config = {key: value for key, value in CONFIG.items() if key not in ('seed', 'record')}
+        config_path = self._write_config(config, 'no_seed.json')
+        main([self._path('legacy'), 'WARNING', '7', '--config', config_path, '--record', 'trace'])
+        main(['run', self._path('single'), '--config', self.config_path])
+        self.assertSameResults(self._path('legacy'), self._path('single'))
+
+
+if __name__ == '__main__':
+    unittest.main()
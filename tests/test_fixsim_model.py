@@ -1,15 +1,190 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
+
 import fvf
+from fvf.model import Trial, TrialBatch
+from fvf.simulator import make_search_arrs
 
 
 class TestFixSim(unittest.TestCase):
     def setUp(self):
-        pass
+        self.rng = np.random.default_rng(42)
 
     def tearDown(self):
         pass
 
+    def test_run_trial(self):
+        an_fvf_model = fvf.FVFModel()
+        search_arr = make_search_arrs(1, 12, True, rng=self.rng)[0]
+        trial = an_fvf_model.run_trial('medium', search_arr, rng=self.rng)
+        self.assertIsInstance(trial, Trial)
+        self.assertEqual(trial.seen_arr.dtype, bool)
+        self.assertEqual(trial.num_fixations, len(trial.fix_locs))
+        self.assertEqual(trial.reaction_time, trial.num_fixations * an_fvf_model.fixation_duration)
+        seen = np.zeros(search_arr.shape, dtype=bool)
+        for fix_loc, fvf_size, fvf_contents in zip(trial.fix_locs, trial.fvf_sizes, trial.fvf_per_fix):
+            np.testing.assert_array_equal(fvf_contents, search_arr[fix_loc:fix_loc + fvf_size])
+            seen[fix_loc:fix_loc + fvf_size] = True
+        np.testing.assert_array_equal(seen, trial.seen_arr)
+
+    def test_global_random_state(self):
+        # without rng, draws come from numpy's global random state, so numpy.random.seed makes them reproducible
+        an_fvf_model = fvf.FVFModel()
+        trials = []
+        for _ in range(2):
+            np.random.seed(1)
+            search_arrs = make_search_arrs(20, 12, True)
+            trials.append(([an_fvf_model.run_trial('medium', search_arr) for search_arr in search_arrs],
+                           an_fvf_model.run_trials('medium', search_arrs)))
+        (trial_list, batch), (other_trial_list, other_batch) = trials
+        for trial, other_trial in zip(trial_list, other_trial_list):
+            self.assertEqual(trial.fix_locs, other_trial.fix_locs)
+            self.assertEqual(trial.fvf_sizes, other_trial.fvf_sizes)
+        np.testing.assert_array_equal(batch.reaction_time, other_batch.reaction_time)
+        np.testing.assert_array_equal(batch.response, other_batch.response)
+
+    def test_run_trial_respects_prev_patch_memory(self):
+        for prev_patch_memory in (0, 1, 4):
+            an_fvf_model = fvf.FVFModel(prev_patch_memory=prev_patch_memory)
+            for search_arr in make_search_arrs(100, 18, False, rng=self.rng):
+                trial = an_fvf_model.run_trial('hard', search_arr, rng=self.rng)
+                for ind in range(1, len(trial.fix_locs)):
+                    self.assertNotIn(trial.fix_locs[ind],
+                                     trial.fix_locs[max(ind - prev_patch_memory, 0):ind][:prev_patch_memory])
+
+    def test_run_trial_prev_patch_memory_larger_than_display(self):
+        # would loop forever if all patches could be in memory at once
+        an_fvf_model = fvf.FVFModel(prev_patch_memory=10, quit_threshold=0.99)
+        for search_arr in make_search_arrs(20, 6, False, rng=self.rng):
+            trial = an_fvf_model.run_trial('hard', search_arr, rng=self.rng)
+            self.assertFalse(trial.response)
+
+    def test_run_trial_record(self):
+        an_fvf_model = fvf.FVFModel()
+        search_arr = make_search_arrs(1, 12, True, rng=self.rng)[0]
+        trial = an_fvf_model.run_trial('medium', search_arr, record='summary', rng=self.rng)
+        self.assertIsNone(trial.fix_locs)
+        self.assertIsNone(trial.seen_arr)
+        trial = an_fvf_model.run_trial('medium', search_arr, record='trace', rng=self.rng)
+        self.assertEqual(len(trial.fix_locs), trial.num_fixations)
+        self.assertIsNone(trial.fvf_per_fix)
+        with self.assertRaises(ValueError):
+            an_fvf_model.run_trial('medium', search_arr, record='everything', rng=self.rng)
+
+    def test_trial_batch_take(self):
+        an_fvf_model = fvf.FVFModel()
+        trials = an_fvf_model.run_trials('medium', make_search_arrs(50, 12, True, rng=self.rng), rng=self.rng)
+        inds = np.array([3, 0, 49])
+        taken = trials.take(inds, record='trace')
+        self.assertEqual(taken.record, 'trace')
+        for taken_ind, ind in enumerate(inds):
+            self.assertEqual(taken[taken_ind].fix_locs, trials[ind].fix_locs)
+            self.assertEqual(taken[taken_ind].fvf_sizes, trials[ind].fvf_sizes)
+        summary = an_fvf_model.run_trials('medium', make_search_arrs(50, 12, True, rng=self.rng),
+                                          record='summary', rng=self.rng)
+        self.assertIsNone(summary.fix_locs)
+        with self.assertRaises(ValueError):
+            summary.take(inds, record='full')
+
+    def test_run_trials_returns_trials(self):
+        an_fvf_model = fvf.FVFModel()
+        search_arrs = make_search_arrs(100, 12, True, rng=self.rng)
+        trials = an_fvf_model.run_trials('medium', search_arrs, rng=self.rng)
+        self.assertIsInstance(trials, TrialBatch)
+        self.assertEqual(len(trials), 100)
+        for search_arr, trial in zip(search_arrs, trials):
+            self.assertIsInstance(trial, Trial)
+            self.assertEqual(trial.num_fixations, len(trial.fix_locs))
+            self.assertEqual(trial.num_fixations, len(trial.fvf_sizes))
+            self.assertEqual(trial.reaction_time, trial.num_fixations * an_fvf_model.fixation_duration)
+            # seen_arr is exactly the union of all the fvfs
+            seen = np.zeros(search_arr.shape, dtype=bool)
+            for fix_loc, fvf_size in zip(trial.fix_locs, trial.fvf_sizes):
+                seen[fix_loc:fix_loc + fvf_size] = True
+            np.testing.assert_array_equal(seen, trial.seen_arr.astype(bool))
+            # response is True if and only if target was in the last fvf
+            self.assertEqual(trial.response, bool(np.any(trial.fvf_per_fix[-1] == 1)))
+
+    def test_trial_batch_columns(self):
+        an_fvf_model = fvf.FVFModel()
+        trials = an_fvf_model.run_trials('hard', make_search_arrs(100, 18, True, rng=self.rng), rng=self.rng)
+        self.assertEqual(trials.response.dtype, bool)
+        self.assertEqual(trials.reaction_time.dtype, np.int32)
+        self.assertEqual(trials.fix_locs.dtype, np.uint8)
+        self.assertEqual(trials.fvf_sizes.dtype, np.uint8)
+        self.assertEqual(trials.fix_offsets.shape, (101,))
+        self.assertEqual(trials.fix_offsets[-1], trials.fix_locs.shape[0])
+        np.testing.assert_array_equal(np.diff(trials.fix_offsets), trials.num_fixations)
+        last = trials[-1]
+        self.assertEqual(last.num_fixations, int(trials.num_fixations[99]))
+        with self.assertRaises(IndexError):
+            trials[100]
+
+    def test_trial_batch_concatenate(self):
+        an_fvf_model = fvf.FVFModel()
+        batch_1 = an_fvf_model.run_trials('easy', make_search_arrs(30, 6, True, rng=self.rng), rng=self.rng)
+        batch_2 = an_fvf_model.run_trials('easy', make_search_arrs(20, 6, False, rng=self.rng), rng=self.rng)
+        batch = TrialBatch.concatenate([batch_1, batch_2])
+        self.assertEqual(len(batch), 50)
+        for ind, trial in enumerate(list(batch_1) + list(batch_2)):
+            concat_trial = batch[ind]
+            self.assertEqual(trial.response, concat_trial.response)
+            self.assertEqual(trial.fix_locs, concat_trial.fix_locs)
+            self.assertEqual(trial.fvf_sizes, concat_trial.fvf_sizes)
+            for fvf_contents, concat_fvf_contents in zip(trial.fvf_per_fix, concat_trial.fvf_per_fix):
+                np.testing.assert_array_equal(fvf_contents, concat_fvf_contents)
+
+    def test_trial_batch_save_load(self):
+        an_fvf_model = fvf.FVFModel()
+        for record in ('summary', 'trace', 'full'):
+            batch = an_fvf_model.run_trials('medium', make_search_arrs(20, 12, True, rng=self.rng),
+                                            record=record, rng=self.rng)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, 'batch.npz')
+                batch.save(path)
+                loaded = TrialBatch.load(path)
+            self.assertEqual(loaded.record, record)
+            self.assertEqual(loaded.display_size, 12)
+            for column in TrialBatch.columns():
+                if getattr(batch, column) is None:
+                    self.assertIsNone(getattr(loaded, column))
+                else:
+                    np.testing.assert_array_equal(getattr(loaded, column), getattr(batch, column))
+                    self.assertEqual(getattr(loaded, column).dtype, getattr(batch, column).dtype)
+
+    def test_run_trials_respects_prev_patch_memory(self):
+        an_fvf_model = fvf.FVFModel(prev_patch_memory=4)
+        trials = an_fvf_model.run_trials('hard', make_search_arrs(200, 18, False, rng=self.rng), rng=self.rng)
+        for trial in trials:
+            for ind in range(1, len(trial.fix_locs)):
+                self.assertNotIn(trial.fix_locs[ind], trial.fix_locs[max(ind - 4, 0):ind])
+
+    def test_run_trials_prev_patch_memory_larger_than_display(self):
+        an_fvf_model = fvf.FVFModel(prev_patch_memory=10)
+        trials = an_fvf_model.run_trials('hard', make_search_arrs(50, 6, False, rng=self.rng), rng=self.rng)
+        self.assertTrue(all(trial.response is False for trial in trials))
+
+    def test_run_trials_equivalent_to_run_trial(self):
+        an_fvf_model = fvf.FVFModel()
+        num_trials = 2000
+        for search_type in ('easy', 'hard'):
+            for target_present in (True, False):
+                search_arrs = make_search_arrs(num_trials, 12, target_present, rng=self.rng)
+                batch = an_fvf_model.run_trials(search_type, search_arrs, rng=self.rng)
+                single = [an_fvf_model.run_trial(search_type, search_arr, rng=self.rng)
+                          for search_arr in search_arrs]
+                batch_nf = np.array([trial.num_fixations for trial in batch])
+                single_nf = np.array([trial.num_fixations for trial in single])
+                # means should agree within a few standard errors
+                stderr = np.sqrt(batch_nf.var() / num_trials + single_nf.var() / num_trials)
+                self.assertLess(abs(batch_nf.mean() - single_nf.mean()), 4 * stderr + 1e-9)
+                batch_resp = np.mean([trial.response for trial in batch])
+                single_resp = np.mean([trial.response for trial in single])
+                self.assertLess(abs(batch_resp - single_resp), 0.05)
+
 
 if __name__ == '__main__':
     unittest.main()
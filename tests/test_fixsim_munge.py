@@ -0,0 +1,165 @@
+import tempfile
+import unittest
+
+import numpy as np
+from scipy import stats
+
+import fvf
+from fvf import munge
+from fvf import results as fvf_results
+from fvf.accumulate import RT_BIN_EDGES
+from fvf.simulator import Simulator
+
+
+class TestMunge(unittest.TestCase):
+    def setUp(self):
+        sim = Simulator(trials_per_condition=200, display_sizes=(6, 12, 18), task_difficulties=('medium', 'hard'))
+        self.results = sim.runall(record='summary')
+
+    def tearDown(self):
+        pass
+
+    def test_summarize(self):
+        summary = munge.summarize(self.results)
+        self.assertEqual(summary.conditions, list(self.results.keys()))
+        for code, (condition, trials) in enumerate(self.results.items()):
+            correct = trials.response == condition[2]
+            self.assertEqual(summary.num_trials[code], 200)
+            self.assertAlmostEqual(summary.mean_RT[code], np.mean(trials.reaction_time[correct]))
+            self.assertAlmostEqual(summary.std_RT[code], np.std(trials.reaction_time[correct]))
+            self.assertAlmostEqual(summary.error_rate[code], 1 - np.mean(correct))
+            self.assertAlmostEqual(summary.mean_num_fixations[code], np.mean(trials.num_fixations))
+            self.assertAlmostEqual(summary.std_num_fixations[code], np.std(trials.num_fixations))
+            np.testing.assert_array_equal(summary.by_condition('reaction_time')[condition], trials.reaction_time)
+
+    def test_summarize_results_dir(self):
+        with tempfile.TemporaryDirectory() as results_dir:
+            fvf_results.save(self.results, results_dir)
+            summary = munge.summarize(results_dir)
+            summary_from_dict = munge.summarize(self.results)
+            for field in ('num_trials', 'mean_RT', 'std_RT', 'error_rate', 'mean_num_fixations'):
+                np.testing.assert_allclose(getattr(summary, field), getattr(summary_from_dict, field))
+
+    def test_reaction_times_from_summary(self):
+        summary = munge.summarize(self.results)
+        rt_results = munge.reaction_times(summary)
+        nf_results = munge.num_fixations(summary)
+        for key, mean_RTs in rt_results.mean_RTs_all_display_sizes.items():
+            search_type, target_present = key
+            expected = [np.mean(self.results[(search_type, display_size, target_present)].reaction_time[
+                                    self.results[(search_type, display_size, target_present)].response
+                                    == target_present])
+                        for display_size in rt_results.display_sizes]
+            np.testing.assert_allclose(mean_RTs, expected)
+            regress = stats.linregress(rt_results.display_sizes, expected)
+            self.assertAlmostEqual(rt_results.mean_RTs_regress_results[key].slope, regress.slope)
+            self.assertAlmostEqual(rt_results.mean_RTs_regress_results[key].p_value, regress.pvalue)
+            expected_nf = [np.mean(self.results[(search_type, display_size, target_present)].num_fixations)
+                           for display_size in nf_results.display_sizes]
+            np.testing.assert_allclose(nf_results.mean_num_fixations_all_display_sizes[key], expected_nf)
+
+    def test_reaction_times_from_accumulators(self):
+        sim = Simulator(trials_per_condition=200, display_sizes=(6, 12, 18), task_difficulties=('medium', 'hard'))
+        accumulators = sim.runall(accumulate=True)
+        rt_results = munge.reaction_times(accumulators)
+        expected_rt_results = munge.reaction_times(self.results)
+        nf_results = munge.num_fixations(accumulators)
+        expected_nf_results = munge.num_fixations(self.results)
+        self.assertIsNone(rt_results.RTs_by_condition)
+        self.assertIsNone(nf_results.num_fixations_by_condition)
+        for key, mean_RTs in rt_results.mean_RTs_all_display_sizes.items():
+            np.testing.assert_allclose(mean_RTs, expected_rt_results.mean_RTs_all_display_sizes[key])
+            np.testing.assert_allclose(rt_results.std_RTs_all_display_sizes[key],
+                                       expected_rt_results.std_RTs_all_display_sizes[key])
+            self.assertAlmostEqual(rt_results.mean_RTs_regress_results[key].slope,
+                                   expected_rt_results.mean_RTs_regress_results[key].slope)
+            np.testing.assert_allclose(nf_results.mean_num_fixations_all_display_sizes[key],
+                                       expected_nf_results.mean_num_fixations_all_display_sizes[key])
+        with self.assertRaises(ValueError):
+            munge.reaction_times(accumulators, num_bootstrap=100)
+        for condition, counts in rt_results.RT_counts_by_condition.items():
+            np.testing.assert_array_equal(
+                counts, np.histogram(self.results[condition].reaction_time, bins=RT_BIN_EDGES)[0]
+            )
+
+    def test_reaction_times_bootstrap(self):
+        rt_results = munge.reaction_times(self.results, num_bootstrap=500, rng=np.random.default_rng(42))
+        for condition, ci in rt_results.mean_RTs_CI_by_condition.items():
+            trials = self.results[condition]
+            correct_RTs = trials.reaction_time[trials.response == condition[2]]
+            self.assertLess(ci.low, np.mean(correct_RTs))
+            self.assertGreater(ci.high, np.mean(correct_RTs))
+            # close to normal-approximation interval
+            halfwidth = 1.96 * np.std(correct_RTs) / np.sqrt(correct_RTs.shape[0])
+            self.assertAlmostEqual((ci.high - ci.low) / 2, halfwidth, delta=0.25 * halfwidth)
+        for key, regress_cis in rt_results.mean_RTs_regress_CIs.items():
+            regress = rt_results.mean_RTs_regress_results[key]
+            self.assertLess(regress_cis.slope.low, regress.slope)
+            self.assertGreater(regress_cis.slope.high, regress.slope)
+            self.assertLess(regress_cis.intercept.low, regress.intercept)
+            self.assertGreater(regress_cis.intercept.high, regress.intercept)
+
+    def test_reaction_times_bootstrap_workers(self):
+        rt_results = munge.reaction_times(self.results, num_bootstrap=100, rng=np.random.default_rng(42))
+        rt_results_parallel = munge.reaction_times(self.results, num_bootstrap=100, rng=np.random.default_rng(42),
+                                                   workers=2)
+        self.assertEqual(rt_results.mean_RTs_CI_by_condition, rt_results_parallel.mean_RTs_CI_by_condition)
+        self.assertEqual(rt_results.mean_RTs_regress_CIs, rt_results_parallel.mean_RTs_regress_CIs)
+        self.assertIsNone(munge.reaction_times(self.results).mean_RTs_regress_CIs)
+
+    def test_fixations(self):
+        prev_patch_memory = 2
+        sim = Simulator(trials_per_condition=150, display_sizes=(6, 12), task_difficulties=('hard',))
+        results = sim.runall(fvf_params={'prev_patch_memory': prev_patch_memory}, record='trace')
+        with tempfile.TemporaryDirectory() as results_dir:
+            fvf_results.save(results, results_dir)
+            # small chunks, so results must be combined across chunks
+            fixation_results = munge.fixations(results_dir, chunk_size=40)
+        for condition, trials in results.items():
+            display_size = condition[1]
+            loc_counts = np.zeros((display_size,), dtype=int)
+            lags = []
+            coverage = {}
+            for trial in trials:
+                seen = np.zeros((display_size,), dtype=bool)
+                for step, (fix_loc, fvf_size) in enumerate(zip(trial.fix_locs, trial.fvf_sizes)):
+                    loc_counts[fix_loc] += 1
+                    if fix_loc in trial.fix_locs[:step]:
+                        last = step - 1 - trial.fix_locs[:step][::-1].index(fix_loc)
+                        lags.append(step - last)
+                    seen[fix_loc:fix_loc + fvf_size] = True
+                    coverage.setdefault(step, []).append(seen.mean())
+            np.testing.assert_array_equal(fixation_results.fix_loc_counts[condition], loc_counts)
+            np.testing.assert_array_equal(fixation_results.fvf_size_counts[condition],
+                                          np.bincount(trials.fvf_sizes))
+            np.testing.assert_array_equal(fixation_results.revisit_lag_counts[condition], np.bincount(lags))
+            self.assertTrue(np.all(fixation_results.revisit_lag_counts[condition][:prev_patch_memory + 1] == 0))
+            self.assertAlmostEqual(fixation_results.revisit_rates[condition], len(lags) / trials.fix_locs.shape[0])
+            np.testing.assert_allclose(fixation_results.mean_coverage_by_fixation[condition],
+                                       [np.mean(coverage[step]) for step in range(len(coverage))])
+            np.testing.assert_array_equal(fixation_results.num_trials_by_fixation[condition],
+                                          [len(coverage[step]) for step in range(len(coverage))])
+
+    def test_fixations_requires_traces(self):
+        with tempfile.TemporaryDirectory() as results_dir:
+            fvf_results.save(self.results, results_dir)
+            with self.assertRaises(ValueError):
+                munge.fixations(results_dir)
+
+    def test_linregress(self):
+        rng = np.random.default_rng(42)
+        for x in ([6, 12], [6, 12, 18], [1, 2, 4, 8, 16]):
+            y = rng.normal(size=(4, 3, len(x)))
+            y[0, 0] = 5.  # constant
+            slope, intercept, r_value, p_value, std_err = munge._linregress(x, y)
+            for ind in np.ndindex(y.shape[:-1]):
+                expected = stats.linregress(x, y[ind])
+                np.testing.assert_allclose(
+                    [slope[ind], intercept[ind], r_value[ind], p_value[ind], std_err[ind]],
+                    [expected.slope, expected.intercept, expected.rvalue, expected.pvalue, expected.stderr],
+                    atol=1e-10, equal_nan=True
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
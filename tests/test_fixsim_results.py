@@ -0,0 +1,99 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+import fvf
+from fvf import results as fvf_results
+from fvf.model import TrialBatch
+from fvf.simulator import Simulator
+
+
+class TestResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.results_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _run(self, record):
+        sim = Simulator(trials_per_condition=60, display_sizes=(6, 12), task_difficulties=('medium', 'hard'))
+        return sim.runall(record=record)
+
+    def _assert_batches_equal(self, batch, other_batch):
+        self.assertEqual(batch.record, other_batch.record)
+        self.assertEqual(batch.display_size, other_batch.display_size)
+        for column in TrialBatch.columns():
+            if getattr(batch, column) is None:
+                self.assertIsNone(getattr(other_batch, column))
+            else:
+                np.testing.assert_array_equal(getattr(batch, column), getattr(other_batch, column))
+
+    def test_save_load(self):
+        for record in ('summary', 'trace', 'full'):
+            results = self._run(record)
+            results_dir = os.path.join(self.results_dir, record)
+            fvf_results.save(results, results_dir)
+            loaded = fvf_results.load(results_dir)
+            self.assertEqual(loaded.record, record)
+            self.assertEqual(loaded.conditions, list(results.keys()))
+            self.assertIsInstance(loaded.response, np.memmap)
+            for code, (condition, trials) in enumerate(loaded.items()):
+                self._assert_batches_equal(results[condition], trials)
+                start, stop = loaded.condition_offsets[code], loaded.condition_offsets[code + 1]
+                self.assertTrue(np.all(loaded.condition[start:stop] == code))
+            self._assert_batches_equal(results[('hard', 12, False)], loaded.batch(('hard', 12, False)))
+
+    def test_save_load_empty(self):
+        results = Simulator(trials_per_condition=0).runall()
+        self.assertEqual(results, {})
+        fvf_results.save(results, self.results_dir)
+        loaded = fvf_results.load(self.results_dir)
+        self.assertEqual(loaded.conditions, [])
+        self.assertEqual(loaded.response.shape, (0,))
+        self.assertEqual(list(loaded.items()), [])
+
+    def test_convert_json(self):
+        results = self._run('summary')
+        for name, column in (('reaction_times', 'reaction_time'),
+                             ('num_fixations', 'num_fixations'),
+                             ('responses', 'response')):
+            with open(os.path.join(self.results_dir, f'{name}.json'), 'w') as fp:
+                json.dump({', '.join([search_type, str(display_size), str(target_present)]):
+                           getattr(trials, column).tolist()
+                           for (search_type, display_size, target_present), trials in results.items()}, fp)
+        converted = fvf_results.convert(self.results_dir)
+        self.assertEqual(converted.record, 'summary')
+        for condition, trials in converted.items():
+            self._assert_batches_equal(results[condition], trials)
+
+    def test_convert_pickle_of_trial_lists(self):
+        results = self._run('trace')
+        # format saved by older versions: a list of Trial tuples for each condition
+        with open(os.path.join(self.results_dir, 'results.pickle'), 'wb') as fp:
+            pickle.dump({condition: list(trials) for condition, trials in results.items()}, fp)
+        new_results_dir = os.path.join(self.results_dir, 'columnar')
+        converted = fvf_results.convert(self.results_dir, new_results_dir)
+        self.assertEqual(converted.record, 'trace')
+        for condition, trials in converted.items():
+            self._assert_batches_equal(results[condition], trials)
+
+    def test_munge_from_results_dir(self):
+        results = self._run('summary')
+        fvf_results.save(results, self.results_dir)
+        rt_results = fvf.munge.reaction_times(self.results_dir)
+        nf_results = fvf.munge.num_fixations(self.results_dir)
+        for condition, trials in results.items():
+            correct = trials.response == condition[2]
+            self.assertAlmostEqual(rt_results.mean_RTs_by_condition[condition],
+                                   np.mean(trials.reaction_time[correct]))
+            self.assertAlmostEqual(nf_results.mean_num_fixations_by_condition[condition],
+                                   np.mean(trials.num_fixations))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import tracemalloc
 import unittest
 
+import numpy as np
+
 import fvf
+from fvf.simulator import Simulator, TraceReservoir, make_search_arrs
 
 
 class TestFixSim(unittest.TestCase):
@@ -13,7 +17,222 @@ class TestFixSim(unittest.TestCase):
     def test_init(self):
         an_fvf_model = fvf.FVFModel()
 
-    def test_
+    def test_make_search_arrs(self):
+        rng = np.random.default_rng(42)
+        search_arrs = make_search_arrs(100, 12, True, target=1, rng=rng)
+        self.assertEqual(search_arrs.shape, (100, 12))
+        np.testing.assert_array_equal(np.sum(search_arrs == 1, axis=1), np.ones(100))
+        search_arrs = make_search_arrs(100, 12, False, target=1, rng=rng)
+        self.assertFalse(np.any(search_arrs == 1))
+
+    def test_run_one_condition(self):
+        an_fvf_model = fvf.FVFModel()
+        trials = Simulator._run_one_condition(an_fvf_model, 'easy', 6, True, num_trials=100,
+                                              rng=np.random.default_rng(42))
+        self.assertEqual(len(trials), 100)
+
+    def test_runall(self):
+        sim = Simulator(trials_per_condition=50)
+        results = sim.runall()
+        self.assertEqual(len(results), 18)
+        for (search_type, display_size, target_present), trials in results.items():
+            self.assertEqual(len(trials), 50)
+            if not target_present:
+                self.assertTrue(all(trial.response is False for trial in trials))
+
+    def test_runall_same_seed_same_results(self):
+        sim = Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100)
+        results = sim.runall(record='trace')
+        results_again = sim.runall(record='trace')
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.num_fixations, results_again[condition].num_fixations)
+            np.testing.assert_array_equal(trials.fix_locs, results_again[condition].fix_locs)
+
+    def test_runall_accumulate(self):
+        sim = Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100)
+        results = sim.runall(record='summary')
+        precision = sim.precision
+        accumulators = sim.runall(accumulate=True)
+        self.assertEqual(list(results.keys()), list(accumulators.keys()))
+        for condition, trials in results.items():
+            acc = accumulators[condition]
+            correct = trials.response == condition[2]
+            self.assertEqual(acc.num_trials, 250)
+            self.assertEqual(acc.correct_RT_sum, trials.reaction_time[correct].sum())
+            self.assertEqual(acc.num_fixations_sum, trials.num_fixations.sum())
+            self.assertEqual(sim.precision[condition], precision[condition])
+
+    def test_runall_accumulate_constant_memory(self):
+        def peak(num_trials):
+            sim = Simulator(trials_per_condition=num_trials, display_sizes=(18,), task_difficulties=('hard',),
+                            target_presence=(False,), chunk_size=500)
+            tracemalloc.start()
+            try:
+                sim.runall(accumulate=True)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        # each chunk is folded in as soon as it is finished, so peak memory is that of a chunk or two
+        self.assertLess(peak(16000), 1.5 * peak(4000))
+
+    def test_runall_shard(self):
+        sim = Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100)
+        results = sim.runall(record='summary')
+        chunks_by_shard = []
+        for shard_ind in range(4):
+            shard_results = sim.runall(record='summary', shard=(shard_ind, 4))
+            self.assertEqual(set(shard_results.keys()), set(sim.chunk_sizes.keys()))
+            chunks_by_shard.append((shard_results, dict(sim.chunk_sizes)))
+        for condition, trials in results.items():
+            pieces = []
+            for shard_results, chunk_sizes in chunks_by_shard:
+                if condition in shard_results:
+                    start = 0
+                    for chunk_ind, num_trials in chunk_sizes[condition]:
+                        RTs = shard_results[condition].reaction_time[start:start + num_trials]
+                        pieces.append((chunk_ind, RTs))
+                        start += num_trials
+            pieces = sorted(pieces, key=lambda piece: piece[0])
+            self.assertEqual([chunk_ind for chunk_ind, _ in pieces], [0, 1, 2])
+            np.testing.assert_array_equal(np.concatenate([RTs for _, RTs in pieces]), trials.reaction_time)
+        with self.assertRaises(ValueError):
+            sim.runall(shard=(4, 4))
+        with self.assertRaises(ValueError):
+            sim.runall(shard=(0, 2), num_full_traces=5)
+
+    def test_runall_workers(self):
+        sim = Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                        chunk_size=100)
+        results = sim.runall(record='trace', num_full_traces=5)
+        full_traces = sim.full_traces
+        results_parallel = sim.runall(record='trace', num_full_traces=5, workers=2)
+        self.assertEqual(list(results.keys()), list(results_parallel.keys()))
+        for condition, trials in results.items():
+            self.assertEqual(len(trials), 250)
+            np.testing.assert_array_equal(trials.response, results_parallel[condition].response)
+            np.testing.assert_array_equal(trials.num_fixations, results_parallel[condition].num_fixations)
+            np.testing.assert_array_equal(trials.fix_locs, results_parallel[condition].fix_locs)
+            np.testing.assert_array_equal(full_traces[condition].trial_inds,
+                                          sim.full_traces[condition].trial_inds)
+
+    def test_runall_sequential_workers(self):
+        sim = Simulator(display_sizes=(6, 18), task_difficulties=('hard',),
+                        rt_tol=100, error_rate_tol=0.05, chunk_size=100, max_trials_per_condition=5000)
+        results = sim.runall(record='summary')
+        precision = sim.precision
+        results_parallel = sim.runall(record='summary', workers=2)
+        self.assertEqual(precision, sim.precision)
+        for condition, trials in results.items():
+            np.testing.assert_array_equal(trials.num_fixations, results_parallel[condition].num_fixations)
+
+    def test_runall_common_random_numbers_params(self):
+        sim = Simulator(trials_per_condition=200, display_sizes=(18,), task_difficulties=('hard',),
+                        target_presence=(False,), common_random_numbers=True)
+        trials = sim.runall(record='trace')[('hard', 18, False)]
+        trials_higher = sim.runall(fvf_params={'quit_threshold': 0.9}, record='trace')[('hard', 18, False)]
+        # same fixations until the lower threshold is reached, then more fixations
+        self.assertTrue(np.all(trials_higher.num_fixations >= trials.num_fixations))
+        for trial, trial_higher in zip(trials, trials_higher):
+            np.testing.assert_array_equal(trial.fix_locs, trial_higher.fix_locs[:trial.num_fixations])
+
+    def test_runall_common_random_numbers_reduces_slope_variance(self):
+        slopes = {}
+        for common_random_numbers in (False, True):
+            slopes[common_random_numbers] = []
+            for seed in range(20):
+                sim = Simulator(trials_per_condition=500, display_sizes=(12, 18), task_difficulties=('hard',),
+                                target_presence=(True,), seed=seed, common_random_numbers=common_random_numbers)
+                results = sim.runall(record='summary')
+                slopes[common_random_numbers].append(results[('hard', 18, True)].reaction_time.mean()
+                                                     - results[('hard', 12, True)].reaction_time.mean())
+        self.assertLess(np.std(slopes[True]), np.std(slopes[False]))
+
+    def test_runall_record(self):
+        sim = Simulator(trials_per_condition=50, display_sizes=(6,), task_difficulties=('medium',))
+        for record in ('summary', 'trace', 'full'):
+            results = sim.runall(record=record)
+            for trials in results.values():
+                self.assertEqual(trials.record, record)
+                trial = trials[0]
+                self.assertEqual(trial.fix_locs is None, record == 'summary')
+                self.assertEqual(trial.seen_arr is None, record != 'full')
+
+    def test_runall_num_full_traces(self):
+        sim = Simulator(trials_per_condition=50, display_sizes=(6, 12), task_difficulties=('medium',))
+        results = sim.runall(record='summary', num_full_traces=5)
+        self.assertEqual(set(sim.full_traces.keys()), set(results.keys()))
+        for condition, trace_sample in sim.full_traces.items():
+            self.assertEqual(len(trace_sample.trials), 5)
+            self.assertEqual(trace_sample.trials.record, 'full')
+            # sampled trials are the same trials as in the results
+            np.testing.assert_array_equal(trace_sample.trials.num_fixations,
+                                          results[condition].num_fixations[trace_sample.trial_inds])
+
+    def test_runall_num_full_traces_bounded_memory(self):
+        def peak_and_retained(num_trials, **runall_kwargs):
+            sim = Simulator(trials_per_condition=num_trials, display_sizes=(18,), task_difficulties=('hard',),
+                            target_presence=(False,), chunk_size=500)
+            tracemalloc.start()
+            try:
+                results = sim.runall(**runall_kwargs)  # noqa: F841, kept so its memory is counted
+                retained, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return peak, retained
+
+        small_peak, _ = peak_and_retained(4000, record='summary', num_full_traces=20)
+        large_peak, _ = peak_and_retained(16000, record='summary', num_full_traces=20)
+        _, full_retained = peak_and_retained(16000, record='full')
+        # full traces are only kept for a few chunks at a time, not for every trial
+        self.assertLess(large_peak, 1.5 * small_peak)
+        self.assertLess(large_peak, full_retained)
+
+    def test_trace_reservoir_uniform(self):
+        an_fvf_model = fvf.FVFModel()
+        rng = np.random.default_rng(42)
+        batch = Simulator._run_one_condition(an_fvf_model, 'easy', 6, True, num_trials=20, rng=rng)
+        counts = np.zeros((60,))
+        for _ in range(500):
+            reservoir = TraceReservoir(10, rng)
+            for _ in range(3):
+                reservoir.add(batch)
+            trace_sample = reservoir.sample()
+            self.assertEqual(len(np.unique(trace_sample.trial_inds)), 10)
+            counts[trace_sample.trial_inds] += 1
+        # each of 60 trials should be in sample with probability 10 / 60
+        self.assertLess(np.abs(counts / 500 - 1 / 6).max(), 0.1)
+
+    def test_runall_sequential(self):
+        sim = Simulator(display_sizes=(6, 18), task_difficulties=('hard',),
+                        rt_tol=100, error_rate_tol=0.05, chunk_size=100, max_trials_per_condition=5000)
+        results = sim.runall(record='summary')
+        for condition, trials in results.items():
+            condition_precision = sim.precision[condition]
+            self.assertEqual(condition_precision.num_trials, len(trials))
+            self.assertTrue(condition_precision.converged)
+            self.assertLessEqual(condition_precision.mean_RT_halfwidth, 100)
+            self.assertEqual(len(trials) % 100, 0)
+        # harder condition needs more trials
+        self.assertGreater(sim.precision[('hard', 18, False)].num_trials,
+                           sim.precision[('hard', 6, False)].num_trials)
+
+    def test_runall_sequential_max_trials(self):
+        sim = Simulator(display_sizes=(18,), task_difficulties=('hard',), target_presence=(False,),
+                        rt_tol=0.001, chunk_size=100, max_trials_per_condition=250)
+        results = sim.runall(record='summary')
+        self.assertEqual(len(results[('hard', 18, False)]), 250)
+        self.assertFalse(sim.precision[('hard', 18, False)].converged)
+
+    def test_sequential_invalid_args(self):
+        for kwargs in ({'rt_tol': 0}, {'error_rate_tol': -0.01},
+                       {'rt_tol': 10, 'max_trials_per_condition': 0}, {'chunk_size': 0}):
+            with self.assertRaises(ValueError):
+                Simulator(**kwargs)
+
 
 if __name__ == '__main__':
     unittest.main()
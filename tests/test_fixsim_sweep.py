@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from fvf import sweep
+from fvf.model import MaxItemsBySearchType
+
+CONDITIONS = [('medium', 6, True), ('hard', 12, False)]
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_grid_shape_and_sel(self):
+        results = sweep.run({'prev_patch_memory': [0, 4], 'fixation_duration': [200, 250, 300]},
+                            conditions=CONDITIONS, num_trials=200)
+        self.assertEqual(results.dims, ('prev_patch_memory', 'fixation_duration', 'condition', 'statistic'))
+        self.assertEqual(results.values.shape, (2, 3, 2, len(sweep.STATISTICS)))
+        mean_RT = results.sel(statistic='mean_RT')
+        self.assertEqual(mean_RT.dims, ('prev_patch_memory', 'fixation_duration', 'condition'))
+        value = results.sel(prev_patch_memory=4, fixation_duration=250,
+                            condition=('hard', 12, False), statistic='num_trials')
+        self.assertEqual(value, 200)
+
+    def test_fixation_duration_only_rescales(self):
+        results = sweep.run({'fixation_duration': [100, 300]}, conditions=CONDITIONS, num_trials=200)
+        mean_RT = results.sel(statistic='mean_RT').values
+        np.testing.assert_allclose(mean_RT[1], 3 * mean_RT[0])
+        mean_nf = results.sel(statistic='mean_num_fixations').values
+        np.testing.assert_array_equal(mean_nf[0], mean_nf[1])
+
+    def test_max_items_shared_across_search_types(self):
+        results = sweep.run({'max_items_by_search_type': [MaxItemsBySearchType(30, 7, 1),
+                                                          MaxItemsBySearchType(10, 7, 1)]},
+                            conditions=CONDITIONS, num_trials=200)
+        # neither condition is 'easy', so both parameter sets share simulations
+        np.testing.assert_array_equal(results.values[0], results.values[1])
+
+    def test_param_sets_and_workers(self):
+        param_sets = [{'prev_patch_memory': 2, 'quit_threshold': 0.8},
+                      {'prev_patch_memory': 4, 'fixation_duration': 300}]
+        serial = sweep.run(param_sets, conditions=CONDITIONS, num_trials=200)
+        parallel = sweep.run(param_sets, conditions=CONDITIONS, num_trials=200, workers=2)
+        self.assertEqual(serial.dims, ('param_set', 'condition', 'statistic'))
+        np.testing.assert_array_equal(serial.values, parallel.values)
+
+    def test_bad_param(self):
+        with self.assertRaises(ValueError):
+            sweep.run({'not_a_param': [1]}, conditions=CONDITIONS, num_trials=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
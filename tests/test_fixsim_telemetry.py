@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fvf import telemetry
+from fvf.simulator import CHUNK_STREAM_TAG, Simulator, stream_id
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.sim = Simulator(trials_per_condition=250, display_sizes=(6, 12), task_difficulties=('hard',),
+                             chunk_size=100, seed=7)
+
+    def tearDown(self):
+        pass
+
+    def test_callbacks(self):
+        records = []
+        results = self.sim.runall(record='summary', callbacks=[records.append])
+        chunk_records = [metrics for metrics in records if isinstance(metrics, telemetry.ChunkMetrics)]
+        condition_records = [metrics for metrics in records if isinstance(metrics, telemetry.ConditionMetrics)]
+        self.assertEqual(len(chunk_records), 3 * len(results))
+        self.assertEqual(len(condition_records), len(results))
+        self.assertIsInstance(records[-1], telemetry.RunMetrics)
+        for metrics in chunk_records:
+            self.assertEqual(metrics.source, 'run')
+            self.assertEqual(metrics.seed, 7)
+            self.assertEqual(metrics.spawn_key,
+                             (CHUNK_STREAM_TAG, stream_id(*metrics.condition), metrics.chunk_ind))
+            self.assertGreater(metrics.wall_time, 0)
+            self.assertAlmostEqual(metrics.trials_per_sec, metrics.num_trials / metrics.wall_time)
+        for metrics in condition_records:
+            trials = results[metrics.condition]
+            self.assertEqual(metrics.num_trials, len(trials))
+            self.assertEqual(metrics.num_fixations, trials.num_fixations.sum())
+            self.assertAlmostEqual(metrics.mean_num_fixations, np.mean(trials.num_fixations))
+            self.assertEqual(metrics.spawn_keys, [(CHUNK_STREAM_TAG, stream_id(*metrics.condition), chunk_ind)
+                                                  for chunk_ind in range(3)])
+        self.assertEqual(records[-1].num_trials, 250 * len(results))
+        self.assertEqual(records[-1].num_conditions, len(results))
+
+    def test_callbacks_workers_and_checkpoints(self):
+        records = []
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            self.sim.runall(record='summary', workers=2, checkpoint_dir=checkpoint_dir)
+            self.sim.runall(record='summary', workers=2, checkpoint_dir=checkpoint_dir,
+                            callbacks=[records.append])
+        chunk_records = [metrics for metrics in records if isinstance(metrics, telemetry.ChunkMetrics)]
+        self.assertTrue(all(metrics.source == 'checkpoint' for metrics in chunk_records))
+        self.assertEqual(sum(metrics.num_trials for metrics in chunk_records), records[-1].num_trials)
+
+    def test_metrics_writer(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            metrics_jsonl = os.path.join(tmp_dir, 'metrics.jsonl')
+            records = []
+            with telemetry.MetricsWriter(metrics_jsonl) as writer:
+                self.sim.runall(record='summary', callbacks=[writer, records.append])
+            lines = telemetry.read_metrics(metrics_jsonl)
+        self.assertEqual(len(lines), len(records))
+        for line, metrics in zip(lines, records):
+            self.assertEqual(line['event'], telemetry.EVENTS[type(metrics)])
+            self.assertIn('timestamp', line)
+            self.assertEqual(line['num_trials'], metrics.num_trials)
+        with self.assertRaises(ValueError):
+            telemetry.MetricsWriter(metrics_jsonl, mode='r')
+
+
+if __name__ == '__main__':
+    unittest.main()